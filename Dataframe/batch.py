@@ -0,0 +1,308 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from ingest_cache import hash_file
+
+MANIFEST_NAME = 'batch_manifest.jsonl'
+# The token index the directory CLIs keep next to their 'output' directory
+INDEX_DIR_NAME = 'index'
+FORMAT_EXTENSIONS = {'csv': '.csv', 'pickle': '.pickle', 'feather': '.feather', 'parquet': '.parquet'}
+RECORD_COLUMNS = ['path', 'output', 'format', 'status', 'rows', 'error', 'seconds', 'finished']
+
+
+def find_files(target, extensions, exclude=()):
+    """
+    List the files a batch run covers.
+
+    Parameters:
+    - target (str): A directory (its files, like the interactive listing) or
+      a glob pattern ('**' matches subdirectories).
+    - extensions (tuple): The file extensions to keep.
+    - exclude (iterable): Directories whose files, at any depth, are left
+      out, such as the output directory of an earlier run.
+
+    Returns:
+    - list: The sorted file paths.
+    """
+    if os.path.isdir(target):
+        paths = [os.path.join(target, name) for name in os.listdir(target)]
+    else:
+        paths = glob.glob(target, recursive=True)
+    excluded = [os.path.join(os.path.abspath(directory), '') for directory in exclude]
+    return sorted(path for path in paths if os.path.isfile(path) and path.endswith(extensions)
+                  and not os.path.abspath(path).startswith(tuple(excluded)))
+
+
+def default_output_dir(target, files):
+    """Return the 'output' directory next to a target directory or the files a glob matched."""
+    if os.path.isdir(target):
+        return os.path.join(target, 'output')
+    if not files:
+        return os.path.join(os.path.dirname(target) or '.', 'output')
+    return os.path.join(os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files]), 'output')
+
+
+def output_paths(files, output_dir, format):
+    """
+    Name the output file of every input.
+
+    Outputs are named after the input file; inputs from different
+    directories that share a name get a short hash of their path appended.
+
+    Returns:
+    - dict: Mapping of input path to output path.
+    """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in files]
+    paths = {}
+    for path, stem in zip(files, stems):
+        if stems.count(stem) > 1:
+            stem = f"{stem}-{hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=4).hexdigest()}"
+        paths[path] = os.path.join(output_dir, stem + FORMAT_EXTENSIONS[format])
+    return paths
+
+
+def read_manifest(manifest_path):
+    """
+    Return the latest manifest record of every input and output format.
+
+    Records are appended as files finish, so the last record of a path and
+    format wins; a line cut off by a crash is ignored.
+
+    Returns:
+    - dict: Mapping of (path, format) to the record.
+    """
+    records = {}
+    if not os.path.exists(manifest_path):
+        return records
+    with open(manifest_path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[(record['path'], record['format'])] = record
+    return records
+
+
+def compact_manifest(manifest_path):
+    """
+    Rewrite the manifest with only the latest record of every input, dropping removed inputs.
+
+    Returns:
+    - dict: The records kept, as returned by read_manifest.
+    """
+    records = {key: record for key, record in read_manifest(manifest_path).items() if record['status'] != 'removed'}
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        for record in records.values():
+            handle.write(json.dumps(record) + '\n')
+    os.replace(temp_path, manifest_path)
+    return records
+
+
+def input_state(record, path, output_file):
+    """
+    Tell whether an input still matches its last successful manifest record.
+
+    The size and modification time are compared first; only when they
+    differ is the content hashed, so touched but identical files are not
+    reprocessed.
+
+    Returns:
+    - str: 'unchanged', 'touched' (same content, new modification time) or
+      'changed'.
+    """
+    if record is None or record['status'] != 'ok' or record['output'] != output_file or not os.path.exists(output_file):
+        return 'changed'
+    stat = os.stat(path)
+    if stat.st_size != record.get('size'):
+        return 'changed'
+    if stat.st_mtime_ns == record.get('mtime_ns'):
+        return 'unchanged'
+    return 'touched' if hash_file(path) == record.get('hash') else 'changed'
+
+
+def _run_file(process, file_path, output_file, format):
+    """Process one file in a worker and describe the outcome as a manifest record."""
+    stat = os.stat(file_path)
+    record = {'path': file_path, 'output': output_file, 'format': format,
+              'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': hash_file(file_path)}
+    started = time.perf_counter()
+    # Written under a temporary name, so a crash never leaves a partial output behind
+    temp_file = output_file + '.tmp'
+    try:
+        rows = process(file_path, temp_file, format)
+        os.replace(temp_file, output_file)
+        record.update(status='ok', rows=rows, error=None)
+    except Exception as e:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        record.update(status='error', rows=None, error=f"{type(e).__name__}: {e}")
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    record['finished'] = pd.Timestamp.now().isoformat()
+    return record
+
+
+def _remove_output(output_file, outputs):
+    """Delete an output no current input writes to."""
+    if output_file not in outputs and os.path.exists(output_file):
+        os.remove(output_file)
+
+
+def run_batch(target, process, extensions, format='parquet', workers=None, output_dir=None, resume=True,
+              settle_seconds=0):
+    """
+    Process the new and changed matching files in a process pool, recording each one in a manifest.
+
+    Every finished file appends a record (path, size, modification time and
+    content hash of the input, output, status, rows, seconds, error) to
+    batch_manifest.jsonl in the output directory. A later run, including one
+    resumed after a crash, skips inputs whose last successful record still
+    matches them (see input_state) and whose output exists; changed and
+    failed inputs are processed again. Outputs of inputs that were deleted,
+    or that moved to a new output name, are removed.
+
+    Files in the output directory, or in the 'output' and 'index'
+    directories the interactive CLIs write next to the inputs, are never
+    taken as inputs, so a run does not process what an earlier one wrote.
+
+    Parameters:
+    - target (str): A directory or a glob pattern.
+    - process (callable): Picklable function called in a worker with the
+      input path, the output path and the format; saves the processed file
+      and returns its row count.
+    - extensions (tuple): The file extensions to process.
+    - format (str): The output format ('csv', 'pickle', 'feather' or 'parquet').
+    - workers (int, optional): Number of worker processes; every CPU by default.
+    - output_dir (str, optional): Defaults to an 'output' directory next to
+      the inputs.
+    - resume (bool): Skip inputs processed by an earlier run; False
+      reprocesses everything.
+    - settle_seconds (float): Leave files modified more recently than this
+      for a later run, as they may still be being written.
+
+    Returns:
+    - DataFrame: The records of the files processed in this run.
+    """
+    if format not in FORMAT_EXTENSIONS:
+        raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
+    if workers is not None and workers < 1:
+        raise ValueError("The number of workers must be at least 1.")
+    files = find_files(target, extensions)
+    default_dir = os.path.abspath(default_output_dir(target, files))
+    output_dir = os.path.abspath(output_dir or default_dir)
+    # The outputs and token index of earlier runs are not inputs, even when a '**' glob reaches them
+    exclude = (output_dir, default_dir, os.path.join(os.path.dirname(default_dir), INDEX_DIR_NAME))
+    files = [os.path.abspath(path) for path in find_files(target, extensions, exclude)]
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    outputs = output_paths(files, output_dir, format)
+    current_outputs = set(outputs.values())
+
+    done = compact_manifest(manifest_path) if os.path.exists(manifest_path) else {}
+    cutoff = time.time() - settle_seconds
+    pending, refreshed, unchanged, settling = [], [], 0, 0
+    for path in files:
+        if settle_seconds and os.path.getmtime(path) > cutoff:
+            settling += 1
+            continue
+        state = input_state(done.get((path, format)), path, outputs[path]) if resume else 'changed'
+        if state == 'changed':
+            pending.append(path)
+        else:
+            unchanged += 1
+            if state == 'touched':
+                stat = os.stat(path)
+                refreshed.append(dict(done[(path, format)], size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+
+    # Inputs that no longer exist leave orphaned outputs behind
+    orphans = [record for (path, record_format), record in done.items()
+               if record_format == format and not os.path.exists(path)]
+
+    with open(manifest_path, 'a+', encoding='utf-8') as manifest:
+        for record in refreshed:
+            manifest.write(json.dumps(record) + '\n')
+        for record in orphans:
+            _remove_output(record['output'], current_outputs)
+            manifest.write(json.dumps(dict(record, status='removed', finished=pd.Timestamp.now().isoformat())) + '\n')
+        manifest.flush()
+        print(f"{len(files)} file(s) found: {unchanged} unchanged, {len(pending)} new or changed"
+              + (f", {settling} still being written" if settling else "")
+              + f"; {len(orphans)} orphaned output(s) removed.")
+
+        records = []
+        if not pending:
+            return pd.DataFrame(records, columns=RECORD_COLUMNS)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_file, process, path, outputs[path], format) for path in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                previous = done.get((record['path'], format))
+                if record['status'] == 'ok' and previous is not None and previous['output'] != record['output']:
+                    _remove_output(previous['output'], current_outputs)
+                manifest.write(json.dumps(record) + '\n')
+                manifest.flush()
+                records.append(record)
+                detail = f"{record['rows']} rows" if record['status'] == 'ok' else record['error']
+                print(f"[{len(records)}/{len(pending)}] {record['path']}: {record['status']} "
+                      f"({detail}, {record['seconds']}s)")
+    return pd.DataFrame(records, columns=RECORD_COLUMNS)
+
+
+def watch_batch(target, process, extensions, format='parquet', workers=None, output_dir=None, interval=30):
+    """
+    Run run_batch every interval seconds, picking up files as they land, until interrupted.
+
+    Files modified within the last interval are left for the next pass, so
+    a drop that is still being copied is not processed half-written.
+
+    Returns:
+    - DataFrame: The records of every file processed while watching.
+    """
+    runs = []
+    try:
+        while True:
+            runs.append(run_batch(target, process, extensions, format, workers, output_dir, settle_seconds=interval))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    return pd.concat(runs, ignore_index=True) if runs else pd.DataFrame(columns=RECORD_COLUMNS)
+
+
+def batch_main(argv, process, extensions, description):
+    """
+    Parse the batch command line of a directory CLI and run it.
+
+    Parameters:
+    - argv (list): The arguments after the script name.
+    - process (callable): See run_batch.
+    - extensions (tuple): The file extensions the CLI reads.
+    - description (str): Shown in the --help output.
+
+    Returns:
+    - int: The exit status; 1 when any file failed.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('target', help="directory or glob pattern (quote it, e.g. 'data/**/*.csv')")
+    parser.add_argument('--format', choices=list(FORMAT_EXTENSIONS), default='parquet', help="output format")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: every CPU)")
+    parser.add_argument('--output-dir', default=None, help="default: an 'output' directory next to the inputs")
+    parser.add_argument('--no-resume', dest='resume', action='store_false',
+                        help="reprocess files an earlier run already finished")
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                        help="keep running, checking for new or changed files every SECONDS")
+    args = parser.parse_args(argv)
+    if args.watch is not None:
+        records = watch_batch(args.target, process, extensions, args.format, args.workers, args.output_dir,
+                              args.watch)
+    else:
+        records = run_batch(args.target, process, extensions, args.format, args.workers, args.output_dir,
+                            args.resume)
+    failed = int((records['status'] == 'error').sum())
+    print(f"Processed {len(records) - failed} file(s), {failed} failed.")
+    return 1 if failed else 0
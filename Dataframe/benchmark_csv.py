@@ -0,0 +1,118 @@
+import itertools
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from csv_reader import parse_csv
+
+
+def make_csv(file_path, rows, columns, quoted=0.0):
+    """
+    Write a sample export cycling through id, amount, name, date and notes columns.
+
+    Parameters:
+    - file_path (str): The CSV file to write.
+    - rows (int): Number of rows.
+    - columns (int): Number of columns.
+    - quoted (float): Fraction of the text cells that contain commas and
+      quotes, and so have to be quoted.
+    """
+    rng = np.random.default_rng(0)
+    names = [f'user{i}' for i in range(1000)]
+    notes = [f'see https://example.com/{i} for details' for i in range(1000)]
+    quoted_notes = [f'Smith, J. said "see https://example.com/{i}", then left' for i in range(1000)]
+    data = {}
+    for column in range(columns):
+        kind = column % 5
+        if kind == 0:
+            values = np.arange(rows)
+        elif kind == 1:
+            values = np.round(rng.random(rows) * 1000, 2)
+        elif kind == 2:
+            values = np.array(names)[rng.integers(0, 1000, rows)]
+        elif kind == 3:
+            days = pd.to_timedelta(rng.integers(0, 1500, rows), unit='D')
+            values = (pd.Timestamp('2020-01-01') + days).strftime('%Y-%m-%d')
+        else:
+            values = np.where(rng.random(rows) < quoted, np.array(quoted_notes)[rng.integers(0, 1000, rows)],
+                              np.array(notes)[rng.integers(0, 1000, rows)])
+        data[f'col{column}'] = values
+    pd.DataFrame(data).to_csv(file_path, index=False)
+
+
+def _run_engine(engine, file_path):
+    """Parse the file with one engine in a fresh worker process and time it there."""
+    started = time.perf_counter()
+    df, used, fallback = parse_csv(file_path, engine)
+    seconds = time.perf_counter() - started
+    # A digest of the parsed values, to check the engines agree
+    digest = (int(pd.util.hash_pandas_object(df, index=False).sum()), tuple(map(str, df.dtypes)))
+    return seconds, used, fallback, digest
+
+
+def benchmark(file_path, engines=('c', 'pyarrow')):
+    """
+    Time every engine on a CSV file, each in its own process.
+
+    Parameters:
+    - file_path (str): The CSV file to parse.
+    - engines (tuple): The engines to compare; the first is the baseline.
+
+    Returns:
+    - DataFrame: One row per engine with the seconds taken, the speedup over
+      the baseline, the engine that actually parsed the file (after any
+      fallback) and whether it produced the same data as the baseline.
+    """
+    rows = []
+    for engine in engines:
+        # Spawned rather than forked, so every engine starts from a cold process
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            seconds, used, fallback, digest = executor.submit(_run_engine, engine, file_path).result()
+        rows.append({'engine': engine, 'parsed_by': used, 'seconds': round(seconds, 3), 'digest': digest,
+                     'fallback': fallback})
+    results = pd.DataFrame(rows)
+    results.insert(3, 'speedup', (results['seconds'].iloc[0] / results['seconds']).round(2))
+    digests = results.pop('digest')
+    results.insert(4, 'matches', [digest == digests.iloc[0] for digest in digests])
+    return results
+
+
+def benchmark_matrix(sizes=(100000, 1000000), column_counts=(8, 32), quoting=(0.0, 0.5), engines=('c', 'pyarrow')):
+    """
+    Time the engines over a matrix of file sizes, column counts and quoting densities.
+
+    Parameters:
+    - sizes (tuple): Row counts.
+    - column_counts (tuple): Column counts.
+    - quoting (tuple): Fractions of quoted text cells.
+    - engines (tuple): The engines to compare; see benchmark.
+
+    Returns:
+    - DataFrame: One row per file and engine, with the file's rows, columns,
+      quoted fraction and size in MB.
+    """
+    frames = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for rows, columns, quoted in itertools.product(sizes, column_counts, quoting):
+            file_path = os.path.join(temp_dir, f'sample_{rows}_{columns}_{quoted}.csv')
+            make_csv(file_path, rows, columns, quoted)
+            results = benchmark(file_path, engines)
+            results.insert(0, 'rows', rows)
+            results.insert(1, 'columns', columns)
+            results.insert(2, 'quoted', quoted)
+            results.insert(3, 'mb', round(os.path.getsize(file_path) / 2 ** 20, 1))
+            frames.append(results)
+            os.remove(file_path)
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    print(f"{os.cpu_count()} CPU(s)")
+    if len(sys.argv) > 1:
+        print(benchmark(sys.argv[1]).to_string(index=False))
+    else:
+        print(benchmark_matrix().to_string(index=False))
@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from docx_reader import iter_docx_paragraphs
+
+
+def read_python_docx(file_path):
+    """The former readDOCtoPickle path: build the document model, then read para.text."""
+    import docx
+    return [paragraph.text for paragraph in docx.Document(file_path).paragraphs]
+
+
+def read_docx2txt(file_path):
+    """The former readWordtoPickle path: docx2txt's whole-document text."""
+    import docx2txt
+    return docx2txt.process(file_path).split('\n')
+
+
+def read_streaming(file_path):
+    """Stream the paragraphs (and table cells) out of word/document.xml."""
+    return list(iter_docx_paragraphs(file_path, tables=True))
+
+
+def make_document(file_path, pages):
+    """Write a contract-like document of about 40 paragraphs and one small table per page."""
+    import docx
+    document = docx.Document()
+    for page in range(pages):
+        document.add_heading(f'Section {page + 1}', level=2)
+        for clause in range(40):
+            document.add_paragraph(
+                f'{page + 1}.{clause + 1} The Supplier shall notify legal{clause}@example.com and publish '
+                f'notices at https://example.com/contracts/{page}/{clause} within thirty days of the request.')
+        table = document.add_table(rows=3, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = 'Amount due'
+    document.save(file_path)
+
+
+def _current_rss():
+    """Resident memory of this process in bytes (Linux), or None elsewhere."""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return None
+
+
+def _run_reader(reader, file_path):
+    """Run one reader in a fresh worker process and measure it there."""
+    # Importing pandas in the worker peaks above what a small reader uses, so
+    # the peak is sampled while the reader runs rather than taken from ru_maxrss
+    baseline = _current_rss()
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    samples = []
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            samples.append(_current_rss())
+
+    sampler = threading.Thread(target=sample)
+    if baseline is not None:
+        sampler.start()
+    started = time.perf_counter()
+    paragraphs = reader(file_path)
+    seconds = time.perf_counter() - started
+    done.set()
+    if baseline is None:
+        return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - peak_before, len(paragraphs)
+    sampler.join()
+    return seconds, max(samples + [_current_rss()]) - baseline, len(paragraphs)
+
+
+def benchmark(file_path, readers=None):
+    """
+    Time every reader on a .docx file, each in its own process.
+
+    Parameters:
+    - file_path (str): The document to read.
+    - readers (dict, optional): Mapping of label to reader function.
+
+    Returns:
+    - DataFrame: One row per reader with the seconds taken, how far its
+      resident memory grew at the peak and the number of paragraphs (or
+      lines) read.
+    """
+    readers = readers or {'python-docx': read_python_docx, 'docx2txt': read_docx2txt, 'streaming': read_streaming}
+    rows = []
+    for label, reader in readers.items():
+        # Spawned rather than forked, so no memory is inherited from this process
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            seconds, peak_rss, paragraphs = executor.submit(_run_reader, reader, file_path).result()
+        rows.append({
+            'reader': label,
+            'seconds': round(seconds, 3),
+            'peak_growth_mb': round(peak_rss / 2 ** 20, 1),
+            'paragraphs': paragraphs,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(benchmark(sys.argv[1]).to_string(index=False))
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'contract.docx')
+            make_document(file_path, 300)
+            print(benchmark(file_path).to_string(index=False))
@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from excel_reader import spill_excel
+
+
+def read_via_csv(file_path):
+    """The former dataProcessor path: Excel -> temporary CSV -> DataFrame."""
+    temp_csv_file = os.path.splitext(file_path)[0] + '.csv'
+    pd.read_excel(file_path).to_csv(temp_csv_file, index=False)
+    df = pd.read_csv(temp_csv_file)
+    os.remove(temp_csv_file)
+    return df
+
+
+def read_direct(file_path):
+    """Read the first sheet straight into a DataFrame."""
+    return pd.read_excel(file_path)
+
+
+def read_spilled(file_path):
+    """Stream the first sheet into a memory-mapped Arrow file."""
+    return spill_excel(file_path)
+
+
+def make_workbook(file_path, rows):
+    """Write a sample sheet mixing text, numbers and dates."""
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        'id': np.arange(rows),
+        'name': [f'user{i}' for i in rng.integers(0, 10000, rows)],
+        'email': [f'user{i}@example.com' for i in rng.integers(0, 10000, rows)],
+        'amount': rng.random(rows) * 1000,
+        'joined': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, rows), unit='D'),
+        'notes': [f'see https://example.com/{i} for details' for i in rng.integers(0, 10000, rows)],
+    }).to_excel(file_path, index=False)
+
+
+def _run_reader(reader, file_path):
+    """Run one reader in a fresh worker process and measure it there."""
+    started = time.perf_counter()
+    df = reader(file_path)
+    seconds = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    dtypes = ', '.join(f'{column}:{dtype}' for column, dtype in df.dtypes.items())
+    return seconds, peak_rss, dtypes
+
+
+def benchmark(file_path, readers=None):
+    """
+    Time every reader on a workbook, each in its own process.
+
+    Parameters:
+    - file_path (str): The workbook to read.
+    - readers (dict, optional): Mapping of label to reader function.
+
+    Returns:
+    - DataFrame: One row per reader with the seconds taken, the peak resident
+      memory of its process and the dtypes it produced.
+    """
+    readers = readers or {'csv round-trip': read_via_csv, 'direct': read_direct, 'direct + spill': read_spilled}
+    rows = []
+    for label, reader in readers.items():
+        # Spawned rather than forked, so no memory is inherited from this process
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            seconds, peak_rss, dtypes = executor.submit(_run_reader, reader, file_path).result()
+        rows.append({
+            'reader': label,
+            'seconds': round(seconds, 3),
+            'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+            'dtypes': dtypes,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(benchmark(sys.argv[1]).to_string(index=False))
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'sample.xlsx')
+            make_workbook(file_path, 50000)
+            print(benchmark(file_path).to_string(index=False))
@@ -0,0 +1,135 @@
+import time
+import pandas as pd
+import regex
+from pattern_pack import LEGACY_PATTERNS, SAFE_PATTERNS
+
+# Repeated units that drive common backtracking traps: long runs of a single
+# class, separators that almost form a path or address, and whitespace runs
+# that do not reach the end of the cell.
+ADVERSARIAL_UNITS = {
+    'letters': 'a',
+    'spaces': ' ',
+    'path': 'a/',
+    'dots': 'a.',
+    'at_signs': 'a@',
+    'domain': 'a-.',
+    'email_list': 'a@b.cd;',
+    'digits_dots': '1.',
+    'hex_pairs': '0a:',
+}
+
+SIZES = (2000, 4000, 8000, 16000)
+
+# Growth is only judged between scans taking at least this long; shorter
+# timings are dominated by noise.
+MIN_SECONDS = 2e-3
+
+ENGINES = ('regex', 're')
+
+# Cap on a single legacy scan so a quadratic or exponential pattern only
+# stalls the benchmark for this long.
+TIMEOUT = 2.0
+
+
+def time_scan(pattern, text, timeout=TIMEOUT, repeat=5, engine='regex'):
+    """
+    Time findall of a pattern over a text.
+
+    Parameters:
+    - pattern (Pattern): The compiled pattern.
+    - text (str): The text to scan.
+    - timeout (float): Seconds after which a scan is abandoned ('regex' only).
+    - repeat (int): Number of scans of a fast pattern; the best one is kept.
+    - engine (str): 'regex', which can abandon a scan, or 're', which the
+      processors run but which cannot; only use 're' for patterns expected
+      to be linear.
+
+    Returns:
+    - float: Seconds taken, or None if the scan timed out.
+    """
+    if engine not in ENGINES:
+        raise ValueError("Unsupported engine. Please choose 'regex' or 're'.")
+    if engine == 'regex':
+        timed = regex.compile(pattern.pattern, pattern.flags & (regex.I | regex.M | regex.S | regex.X | regex.A))
+        scan = lambda: timed.findall(text, timeout=timeout)
+    else:
+        scan = lambda: pattern.findall(text)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            scan()
+        except TimeoutError:
+            return None
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+        if best > 0.1:
+            break
+    return best
+
+
+def benchmark(patterns, pack, sizes=SIZES, units=ADVERSARIAL_UNITS, engine='regex'):
+    """
+    Time every pattern of a pack on every adversarial input at growing sizes.
+
+    Each input is a unit repeated n times followed by a character none of the
+    patterns accepts, so a scan has to fail after consuming the whole run.
+
+    Parameters:
+    - patterns (dict): Mapping of name to compiled pattern.
+    - pack (str): Label of the pack in the result.
+    - sizes (tuple): Repeat counts, each normally double the previous one.
+    - units (dict): Mapping of input family to the repeated unit.
+    - engine (str): The regex engine to time with; see time_scan.
+
+    Returns:
+    - DataFrame: One row per pattern and input family with the seconds taken
+      at the largest size and the worst growth ratio between two consecutive
+      sizes whose scans took at least MIN_SECONDS (about 2 for linear
+      patterns, 4 for quadratic ones); timed out scans are reported as such.
+    """
+    rows = []
+    for name, pattern in patterns.items():
+        for family, unit in units.items():
+            timings = []
+            for size in sizes:
+                text = unit * size + '!'
+                if isinstance(pattern.pattern, bytes):
+                    text = text.encode('utf-8')
+                seconds = time_scan(pattern, text, engine=engine)
+                timings.append(seconds)
+                if seconds is None:
+                    break
+            ratios = [later / earlier for earlier, later in zip(timings, timings[1:])
+                      if earlier and later and earlier >= MIN_SECONDS]
+            rows.append({
+                'pack': pack,
+                'engine': engine,
+                'pattern': name,
+                'input': family,
+                'length': len(unit) * sizes[len(timings) - 1] + 1,
+                'seconds': round(timings[-1], 4) if timings[-1] is not None else None,
+                'growth': round(max(ratios), 2) if ratios else None,
+                'timed_out': timings[-1] is None,
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    # Legacy patterns can backtrack for minutes, so only the regex engine
+    # (which can abandon a scan) runs them; the safe pack is also timed with
+    # re, the engine the processors use
+    results = pd.concat([benchmark(LEGACY_PATTERNS, 'legacy'), benchmark(SAFE_PATTERNS, 'safe'),
+                         benchmark(SAFE_PATTERNS, 'safe', engine='re')], ignore_index=True)
+
+    # Worst case of every pattern over all input families
+    worst = results.sort_values('seconds', ascending=False, na_position='first').groupby(['pack', 'engine', 'pattern']).head(1)
+    summary = worst.set_index(['pack', 'engine', 'pattern']).sort_index()
+    print(summary.to_string())
+
+    slow = results[(results['pack'] == 'safe') & (results['timed_out'] | (results['growth'] > 3))]
+    if slow.empty:
+        print("Every pattern of the safe pack scaled linearly on every adversarial input.")
+    else:
+        print("Safe patterns that did not scale linearly:")
+        print(slow.to_string(index=False))
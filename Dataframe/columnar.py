@@ -0,0 +1,401 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from ingest_cache import _from_table, _to_table
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    ds = None
+    pq = None
+
+COLUMNAR_FORMATS = {'feather': '.feather', 'parquet': '.parquet'}
+DEFAULT_ROW_GROUP_SIZE = 100000
+PARQUET_COMPRESSION = ('zstd', 'snappy', 'gzip', 'brotli', 'lz4', 'none')
+DEFAULT_COMPRESSION = 'zstd'
+# Written into a partitioned dataset's directory: the full schema, with the partition column named in its metadata
+DATASET_METADATA = '_common_metadata'
+PARTITION_KEY = b'partition_column'
+FEATHER_MAGIC = b'ARROW1'
+PARQUET_MAGIC = b'PAR1'
+
+
+def write_columnar(df, filename, format='feather', row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                   compression=DEFAULT_COMPRESSION, partition_column=None):
+    """
+    Save a DataFrame as an Arrow IPC (Feather) file, a Parquet file or a partitioned Parquet dataset.
+
+    Feather files are written uncompressed so they can be memory-mapped and
+    read without copying; Parquet files are compressed and decoded on read.
+    Both are split into row groups (record batches in Feather) of
+    row_group_size rows, which read_columnar can load on their own.
+
+    With a partition column, filename becomes a directory holding one
+    subdirectory per value of that column (column=value, Hive style), so
+    read_columnar can load only the partitions a job needs. Output is
+    written in a staging directory unique to this call and renamed over
+    filename when complete, so concurrent writers of the same output never
+    share temporary files.
+
+    Parameters:
+    - df (DataFrame): The DataFrame to save.
+    - filename (str): The name of the output file (or directory).
+    - format (str): 'feather' or 'parquet'.
+    - row_group_size (int): Number of rows per row group.
+    - compression (str): The Parquet codec ('zstd', 'snappy', 'gzip',
+      'brotli', 'lz4' or 'none').
+    - partition_column (str, optional): The column to partition a Parquet
+      output by, e.g. the source file or a date.
+
+    Returns:
+    - dict: 'path', 'files', 'rows', 'bytes' (written), 'seconds' and
+      'mb_per_second'.
+    """
+    if pa is None:
+        raise ImportError("Columnar output requires pyarrow to be installed.")
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError("Unsupported format. Please choose 'feather' or 'parquet'.")
+    if compression not in PARQUET_COMPRESSION:
+        raise ValueError("Unsupported compression. Please choose 'zstd', 'snappy', 'gzip', 'brotli', 'lz4' or 'none'.")
+    if partition_column is not None and format != 'parquet':
+        raise ValueError("Partitioned output requires the 'parquet' format.")
+    started = time.perf_counter()
+    try:
+        table = _to_table(df)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        raise ValueError(f"The DataFrame cannot be stored as {format} ({e}); save it as pickle instead.")
+    if partition_column is not None:
+        sizes = _write_partitioned(table, filename, partition_column, compression, row_group_size)
+    else:
+        staging_dir = _staging_dir(filename)
+        try:
+            temp_file = os.path.join(staging_dir, 'output')
+            if format == 'feather':
+                with pa.OSFile(temp_file, 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table, max_chunksize=row_group_size)
+            else:
+                pq.write_table(table, temp_file, row_group_size=row_group_size, compression=compression)
+            sizes = [os.path.getsize(temp_file)]
+            _replace_output(temp_file, filename, staging_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    seconds = time.perf_counter() - started
+    return {
+        'path': filename,
+        'files': len(sizes),
+        'rows': table.num_rows,
+        'bytes': sum(sizes),
+        'seconds': round(seconds, 3),
+        'mb_per_second': round(sum(sizes) / 2 ** 20 / seconds, 1) if seconds else None,
+    }
+
+
+def format_write_report(report):
+    """Summarize write_columnar's report in one line."""
+    return (f"Wrote {report['rows']} rows, {report['bytes'] / 2 ** 20:.1f} MB in {report['files']} file(s) "
+            f"to {report['path']} in {report['seconds']:.2f}s ({report['mb_per_second']} MB/s)")
+
+
+def _partition_field(schema, partition_column):
+    """
+    Return the field the partition column is stored as in directory names.
+
+    Categorical columns are partitioned by their values; the dictionary
+    type is restored on read from the dataset's schema.
+    """
+    field = schema.field(partition_column)
+    if pa.types.is_dictionary(field.type):
+        return pa.field(field.name, field.type.value_type)
+    return field
+
+
+def _write_partitioned(table, path, partition_column, compression, row_group_size):
+    """Write a Hive-partitioned Parquet dataset atomically; returns the size of every file written."""
+    if partition_column not in table.column_names:
+        raise ValueError(f"Partition column '{partition_column}' not found.")
+    field = _partition_field(table.schema, partition_column)
+    position = table.schema.get_field_index(partition_column)
+    sizes = []
+    staging_dir = _staging_dir(path)
+    temp_dir = os.path.join(staging_dir, 'output')
+    try:
+        ds.write_dataset(table.set_column(position, field, table[partition_column].cast(field.type)), temp_dir,
+                         format='parquet',
+                         partitioning=ds.partitioning(pa.schema([field]), flavor='hive'),
+                         file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+                         max_rows_per_group=row_group_size, min_rows_per_group=0,
+                         file_visitor=lambda written: sizes.append(written.size))
+        metadata = {**(table.schema.metadata or {}), PARTITION_KEY: partition_column.encode('utf-8')}
+        metadata_path = os.path.join(temp_dir, DATASET_METADATA)
+        pq.write_metadata(table.schema.with_metadata(metadata), metadata_path)
+        sizes.append(os.path.getsize(metadata_path))
+        _replace_output(temp_dir, path, staging_dir)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return sizes
+
+
+def _staging_dir(path):
+    """
+    Make a directory next to an output for one writer to build it in.
+
+    Its name is unique, so writers of the same output never share temporary
+    files; the caller removes it once the output is in place.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    return tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+
+
+def _replace_output(temp_path, path, staging_dir):
+    """Move a finished file or dataset directory into place over any earlier output of the same name."""
+    if os.path.isfile(temp_path) and not os.path.isdir(path):
+        os.replace(temp_path, path)
+        return
+    # A directory cannot be renamed over an existing path, so the old output
+    # is moved aside into the staging directory and removed with it
+    if os.path.lexists(path):
+        os.rename(path, os.path.join(staging_dir, 'replaced'))
+    os.rename(temp_path, path)
+
+
+def _is_dataset(source):
+    return isinstance(source, (str, os.PathLike)) and os.path.isdir(source)
+
+
+def _open_dataset(path):
+    """Open a partitioned dataset written by write_columnar; returns it with its schema and partition column."""
+    metadata_path = os.path.join(path, DATASET_METADATA)
+    if not os.path.exists(metadata_path):
+        raise ValueError(f"{path} is not a partitioned Parquet dataset (no {DATASET_METADATA} file).")
+    schema = pq.read_schema(metadata_path)
+    partition_column = schema.metadata[PARTITION_KEY].decode('utf-8')
+    field = _partition_field(schema, partition_column)
+    stored_schema = schema.set(schema.get_field_index(partition_column), field)
+    dataset = ds.dataset(path, schema=stored_schema, format='parquet',
+                         partitioning=ds.partitioning(pa.schema([field]), flavor='hive'))
+    return dataset, schema, partition_column
+
+
+def _partition_filter(partition_column, partitions):
+    """Build the filter that selects some partitions; None selects the rows with no value."""
+    values = [value for value in partitions if value is not None]
+    # isin([]) builds a null-typed array that cannot be compared with the column, so it is never used
+    expression = ds.field(partition_column).isin(values) if values else None
+    if len(values) < len(partitions):
+        is_null = ds.field(partition_column).is_null()
+        expression = is_null if expression is None else expression | is_null
+    return ds.scalar(False) if expression is None else expression
+
+
+def _dataset_info(path):
+    dataset, schema, partition_column = _open_dataset(path)
+    fragments = list(dataset.get_fragments())
+    partitions = {ds.get_partition_keys(fragment.partition_expression).get(partition_column) for fragment in fragments}
+    return {
+        'format': 'parquet',
+        'columns': [name for name in schema.names if name not in _index_columns(schema)],
+        'rows': dataset.count_rows(),
+        'row_groups': sum(fragment.num_row_groups for fragment in fragments),
+        'partition_column': partition_column,
+        'partitions': sorted(partitions, key=lambda value: (value is None, str(value))),
+    }
+
+
+def _read_dataset(path, columns=None, partitions=None):
+    dataset, schema, partition_column = _open_dataset(path)
+    selected = None if columns is None else list(columns) + _index_columns(schema)
+    # Partitions that are not selected are skipped by their directory name, without being opened
+    expression = None if partitions is None else _partition_filter(partition_column, list(partitions))
+    table = dataset.to_table(columns=selected, filter=expression)
+    if partition_column in table.column_names and pa.types.is_dictionary(schema.field(partition_column).type):
+        field = schema.field(partition_column)
+        position = table.schema.get_field_index(partition_column)
+        table = table.set_column(position, field, table[partition_column].dictionary_encode().cast(field.type))
+    return _from_table(table.replace_schema_metadata(schema.metadata))
+
+
+def _open(source):
+    """Return an Arrow input stream over a path (memory-mapped) or an in-memory upload."""
+    if isinstance(source, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(source))
+    if hasattr(source, 'getbuffer'):
+        # Streamlit uploads are BytesIO objects; wrap their bytes without a copy
+        return pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    return pa.BufferReader(source.read())
+
+
+def _is_parquet(stream):
+    magic = stream.read(len(FEATHER_MAGIC))
+    stream.seek(0)
+    if magic.startswith(PARQUET_MAGIC):
+        return True
+    if magic == FEATHER_MAGIC:
+        return False
+    raise ValueError("Unsupported file format. Please provide a Feather or Parquet file.")
+
+
+def _index_columns(schema):
+    """Return the stored index columns named in the pandas metadata, if any."""
+    metadata = json.loads((schema.metadata or {}).get(b'pandas', b'{}'))
+    return [name for name in metadata.get('index_columns', []) if isinstance(name, str)]
+
+
+def _range_index(schema, lengths, row_groups):
+    """
+    Rebuild the slice of a stored RangeIndex covered by some row groups.
+
+    pyarrow only restores a RangeIndex kept as metadata when every row is
+    read; otherwise the rows would be relabelled from 0.
+    """
+    metadata = json.loads((schema.metadata or {}).get(b'pandas', b'{}'))
+    ranges = [index for index in metadata.get('index_columns', []) if isinstance(index, dict)]
+    if len(ranges) != 1 or ranges[0].get('kind') != 'range':
+        return None
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+    positions = np.concatenate([np.arange(starts[i], starts[i + 1]) for i in row_groups] or [np.arange(0)])
+    index = pd.Index(ranges[0]['start'] + ranges[0]['step'] * positions, name=ranges[0]['name'])
+    if len(index) > 1 and (np.diff(index) == ranges[0]['step']).all():
+        return pd.RangeIndex(index[0], index[-1] + ranges[0]['step'], ranges[0]['step'], name=index.name)
+    return index
+
+
+def columnar_info(source):
+    """
+    Describe a Feather or Parquet file, or a partitioned Parquet dataset, without loading its data.
+
+    Parameters:
+    - source (str or file): Path or binary file object.
+
+    Returns:
+    - dict: 'format', 'columns' (the DataFrame columns), 'rows' and
+      'row_groups' (the number of row groups); for a partitioned dataset
+      also 'partition_column' and 'partitions' (its values).
+    """
+    if pa is None:
+        raise ImportError("Columnar input requires pyarrow to be installed.")
+    if _is_dataset(source):
+        return _dataset_info(source)
+    stream = _open(source)
+    if _is_parquet(stream):
+        parquet = pq.ParquetFile(stream)
+        schema = parquet.schema_arrow
+        rows, row_groups, format = parquet.metadata.num_rows, parquet.num_row_groups, 'parquet'
+    else:
+        reader = pa.ipc.open_file(stream)
+        schema = reader.schema
+        rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        row_groups, format = reader.num_record_batches, 'feather'
+    index_columns = _index_columns(schema)
+    columns = [name for name in schema.names if name not in index_columns]
+    return {'format': format, 'columns': columns, 'rows': rows, 'row_groups': row_groups}
+
+
+def read_columnar(source, columns=None, row_groups=None, partitions=None):
+    """
+    Load the columns and row groups a view needs from a Feather or Parquet file.
+
+    Paths are memory-mapped: with Feather, only the pages of the selected
+    columns are ever read from disk, so opening one column of a large file
+    takes about as long as opening a small one. A partitioned dataset (a
+    directory written by write_columnar) is read partition by partition,
+    with the rows grouped by partition.
+
+    Parameters:
+    - source (str or file): Path or binary file object.
+    - columns (list, optional): The columns to load; all by default.
+    - row_groups (list, optional): Positions of the row groups to load; all
+      by default. Not available for partitioned datasets.
+    - partitions (list, optional): The values of the partition column to
+      load from a partitioned dataset; all by default.
+
+    Returns:
+    - DataFrame: The selected data.
+    """
+    if pa is None:
+        raise ImportError("Columnar input requires pyarrow to be installed.")
+    if _is_dataset(source):
+        if row_groups is not None:
+            raise ValueError("Row groups can only be selected from a single Feather or Parquet file.")
+        return _read_dataset(source, columns, partitions)
+    if partitions is not None:
+        raise ValueError("Partitions can only be selected from a partitioned Parquet dataset.")
+    stream = _open(source)
+    if _is_parquet(stream):
+        parquet = pq.ParquetFile(stream)
+        schema = parquet.schema_arrow
+        selected = None if columns is None else list(columns) + _index_columns(schema)
+        if row_groups is None:
+            table = parquet.read(columns=selected, use_pandas_metadata=True)
+        else:
+            table = parquet.read_row_groups(row_groups, columns=selected, use_pandas_metadata=True)
+            lengths = [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)]
+    else:
+        reader = pa.ipc.open_file(stream)
+        schema = reader.schema
+        if row_groups is None:
+            table = reader.read_all()
+        else:
+            batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+            table = pa.Table.from_batches([batches[i] for i in row_groups], schema=schema)
+            lengths = [batch.num_rows for batch in batches]
+        if columns is not None:
+            table = table.select(list(columns) + _index_columns(schema))
+    df = _from_table(table)
+    if row_groups is not None:
+        index = _range_index(schema, lengths, row_groups)
+        if index is not None:
+            df.index = index
+    return df
+
+
+def prompt_parquet_options():
+    """Ask for the partition column and compression codec of a Parquet output."""
+    partition_column = input("Partition by column (leave blank for a single file): ").strip() or None
+    compression = input(f"Compression codec ({', '.join(PARQUET_COMPRESSION)}; "
+                        f"leave blank for {DEFAULT_COMPRESSION}): ").strip().lower()
+    return partition_column, compression or DEFAULT_COMPRESSION
+
+
+def convert_pickle(pickle_path, format='feather', output_path=None):
+    """
+    Convert a pickled DataFrame to Feather or Parquet.
+
+    Parameters:
+    - pickle_path (str): The pickle file to convert.
+    - format (str): 'feather' or 'parquet'.
+    - output_path (str, optional): Defaults to the pickle's path with the
+      format's extension.
+
+    Returns:
+    - str: The path of the converted file.
+    """
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError("Unsupported format. Please choose 'feather' or 'parquet'.")
+    if output_path is None:
+        output_path = os.path.splitext(pickle_path)[0] + COLUMNAR_FORMATS[format]
+    write_columnar(pd.read_pickle(pickle_path), output_path, format)
+    return output_path
+
+
+if __name__ == "__main__":
+    # python columnar.py [feather|parquet] file.pickle ...
+    arguments = sys.argv[1:]
+    format = 'feather'
+    if arguments and arguments[0] in COLUMNAR_FORMATS:
+        format = arguments.pop(0)
+    if not arguments:
+        print("Usage: python columnar.py [feather|parquet] file.pickle ...")
+    for pickle_path in arguments:
+        try:
+            print(f"Converted {pickle_path} to {convert_pickle(pickle_path, format)}")
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
@@ -0,0 +1,177 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pc = None
+    pa_csv = None
+
+CSV_ENGINES = ('auto', 'pyarrow', 'c')
+DEFAULT_CSV_ENGINE = 'auto'
+# Below this size the single-threaded parser finishes before threads pay off
+AUTO_MIN_BYTES = 2 ** 20
+DEFAULT_BLOCK_SIZE = 16 * 2 ** 20
+# The integers pandas' default parser reads as int64 (pyarrow reads those with a + as floats)
+INTEGER_PATTERN = r'^\s*[+-]?\d+\s*$'
+# pandas' default missing-value markers, so both engines agree on what is NaN
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>',
+             'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def _source_size(source):
+    """Return the size in bytes of a path or in-memory upload, or None if unknown."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer().nbytes
+    return None
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def _cast_number(text, type):
+    try:
+        return pc.cast(text, type)
+    except pa.ArrowInvalid:
+        # The cast rejects the surrounding whitespace and leading + that pandas accepts
+        return pc.cast(pc.replace_substring_regex(pc.utf8_trim_whitespace(text), r'^\+', ''), type)
+
+
+def _parse_numbers(column, name, inferred):
+    """
+    Convert a text column pyarrow inferred as numbers the way pandas does.
+
+    pyarrow also reads hex such as 0x10 as integers, and integers with a
+    leading + or beyond int64 as floats, where pandas keeps text, int64 or
+    uint64. Hex and integers beyond int64 raise; +5 becomes an int64.
+    """
+    if pa.types.is_integer(inferred):
+        if pc.any(pc.match_substring(column, 'x', ignore_case=True)).as_py():
+            raise ValueError(f"Column '{name}' holds hex numbers, which the default parser keeps as text.")
+        return _cast_number(column, pa.int64())
+    numbers = _cast_number(column, pa.float64())
+    # A float column of integers can only come from a + or an integer beyond int64
+    could_be_integers = (pc.any(pc.match_substring(column, '+')).as_py()
+                         or (pc.max(pc.abs(numbers)).as_py() or 0) >= 2 ** 63)
+    if could_be_integers and pc.all(pc.match_substring_regex(column, INTEGER_PATTERN), min_count=0).as_py():
+        try:
+            return _cast_number(column, pa.int64())
+        except pa.ArrowInvalid:
+            raise ValueError(f"Column '{name}' holds integers beyond int64.")
+    return numbers
+
+
+def read_csv_arrow(source, usecols=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Parse a CSV file with pyarrow's multi-threaded reader into the DataFrame pd.read_csv would build.
+
+    The file is split into blocks that are parsed and converted on every
+    core. Type inference is aligned with pandas' default parser: only
+    integers, floats, booleans and text are inferred (dates stay text), the
+    same markers are read as missing, and empty columns are float64.
+    Columns pyarrow would read as numbers are read as text and converted
+    with pandas' number syntax, so hex stays text and +5 is an integer.
+
+    Parameters:
+    - source (str or file): Path or binary file object (e.g. a Streamlit upload).
+    - usecols (list, optional): The columns to parse; all by default.
+    - block_size (int): Bytes per parsing block.
+
+    Returns:
+    - DataFrame: The parsed data.
+
+    Raises:
+    - ValueError: When the file uses something the reader handles
+      differently from pandas (duplicate column names, rows whose type
+      differs from the first block, ragged rows, invalid UTF-8, numbers
+      pandas reads differently);
+      parse_csv falls back to the default parser then.
+    """
+    if pa is None:
+        raise ImportError("The pyarrow CSV engine requires pyarrow to be installed.")
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=block_size)
+    # Quoted fields may span lines, as the default parser allows
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+    try:
+        # The first block fixes the inferred types; peek at it to keep date columns as text
+        _rewind(source)
+        with pa_csv.open_csv(source, read_options=read_options, parse_options=parse_options) as reader:
+            schema = reader.schema
+        _rewind(source)
+        if len(set(schema.names)) != len(schema.names):
+            raise ValueError("Duplicate column names are renamed by the default parser only.")
+        columns = schema.names if usecols is None else [name for name in schema.names if name in set(usecols)]
+        if usecols is not None and len(columns) != len(set(usecols)):
+            raise ValueError("Some of the requested columns are not in the file.")
+        numeric = {name for name in columns
+                   if pa.types.is_integer(schema.field(name).type) or pa.types.is_floating(schema.field(name).type)}
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={name: pa.string() for name in columns
+                          if pa.types.is_temporal(schema.field(name).type) or name in numeric},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+            true_values=['True', 'TRUE', 'true'],
+            false_values=['False', 'FALSE', 'false'],
+        )
+        table = pa_csv.read_csv(source, read_options=read_options, parse_options=parse_options,
+                                convert_options=convert_options)
+        for name in numeric:
+            table = table.set_column(table.schema.get_field_index(name), name,
+                                     _parse_numbers(table.column(name), name, schema.field(name).type))
+    except pa.ArrowException as e:
+        raise ValueError(f"The pyarrow CSV reader cannot parse this file: {e}")
+    finally:
+        _rewind(source)
+    if any(pa.types.is_binary(field.type) for field in table.schema):
+        raise ValueError("The file is not valid UTF-8.")
+    df = table.to_pandas()
+    for name in columns:
+        if pa.types.is_null(table.schema.field(name).type):
+            # Columns with no values: all NaN, or no rows at all
+            df[name] = df[name].astype('float64' if len(df) else 'object')
+    return df
+
+
+def parse_csv(source, engine=DEFAULT_CSV_ENGINE, usecols=None):
+    """
+    Parse a CSV file with the chosen engine, falling back to pandas' default parser.
+
+    Parameters:
+    - source (str or file): Path or binary file object.
+    - engine (str): 'pyarrow' (multi-threaded), 'c' (pandas' default,
+      single-threaded) or 'auto' (pyarrow for files of AUTO_MIN_BYTES or
+      more, when it is installed).
+    - usecols (list, optional): The columns to parse; all by default.
+
+    Returns:
+    - tuple: The DataFrame, the engine that parsed it, and the reason the
+      pyarrow engine fell back (None if it did not).
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError("Unsupported engine. Please choose 'auto', 'pyarrow' or 'c'.")
+    if engine == 'auto':
+        size = _source_size(source)
+        engine = 'pyarrow' if pa is not None and (size is None or size >= AUTO_MIN_BYTES) else 'c'
+    fallback = None
+    if engine == 'pyarrow':
+        try:
+            return read_csv_arrow(source, usecols), 'pyarrow', None
+        except (ImportError, ValueError) as e:
+            fallback = str(e)
+    _rewind(source)
+    df = pd.read_csv(source, usecols=usecols)
+    _rewind(source)
+    return df, 'c', fallback
+
+
+def read_csv(source, engine=DEFAULT_CSV_ENGINE, usecols=None):
+    """Parse a CSV file into a DataFrame; see parse_csv for the engines."""
+    return parse_csv(source, engine, usecols)[0]
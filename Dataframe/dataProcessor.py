@@ -1,19 +1,47 @@
 import os
 import pandas as pd
 import re
+import sys
+from batch import batch_main
+from columnar import (COLUMNAR_FORMATS, DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, format_write_report,
+                      prompt_parquet_options, write_columnar)
+from csv_reader import DEFAULT_CSV_ENGINE, read_csv
+from dtype_optimizer import format_memory_report, memory_report, optimize_dtypes
+from excel_reader import spill_excel
+from extraction import DEFAULT_CHUNK_SIZE, default_extractor, to_python_lists
+from ingest_cache import IngestCache
+from profiler import prompt_profiler
+from streaming import STREAMABLE_EXTENSIONS, read_chunks, read_csv_chunks, stream_extract
+from token_index import TokenIndex
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists', profiler=None, index=None, cache=None,
+                 optimize=False, csv_engine=DEFAULT_CSV_ENGINE):
         self.ePatt = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}')
         self.wPatt = re.compile(r'[a-zA-Z]{5,15}')
         self.uPatt = re.compile(r'\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*')
-
-    def read_file_to_dataframe(self, file_path):
+        self.extractor = default_extractor(self.ePatt, self.wPatt, self.uPatt, backend=backend,
+                                           workers=workers, chunk_size=chunk_size,
+                                           dedup=dedup, memo_size=memo_size, output=output,
+                                           profiler=profiler, index=index)
+        self.cache = cache
+        self.optimize = optimize
+        self.csv_engine = csv_engine
+        self.memory_report = None
+
+    def read_file_to_dataframe(self, file_path, spill=False):
         """
         Read a file into a DataFrame.
 
         Parameters:
         - file_path (str): The path to the file to be read.
+        - spill (bool): Spill Excel data to a memory-mapped Arrow file; see
+          read_excel_to_dataframe.
+
+        With optimize set, the loaded columns are shrunk to compact dtypes
+        before processing and the before/after sizes are kept in
+        memory_report.
 
         Returns:
         - DataFrame: The DataFrame containing the data from the file.
@@ -21,82 +49,156 @@ class DataProcessor:
         if not os.path.exists(file_path):
             raise FileNotFoundError("File not found.")
 
-        # Determine file format and read accordingly
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith('.xls') or file_path.endswith('.xlsx'):
-            df = self.read_excel_to_dataframe(file_path)
+        # Serve repeat loads of the same file content from the cache
+        if self.cache is not None:
+            df = self.cache.load(file_path, lambda path: self.parse_file(path, spill))
         else:
-            raise ValueError("Unsupported file format. Please provide a CSV or XLS/XLSX file.")
+            df = self.parse_file(file_path, spill)
+
+        if self.optimize:
+            optimized = optimize_dtypes(df, for_storage=True)
+            self.memory_report = memory_report(df, optimized)
+            df = optimized
 
         # Process data using regular expressions
-        df = self.process_data(df)
+        df = self.process_data(df, source=file_path)
 
         return df
 
-    def read_excel_to_dataframe(self, file_path):
+    def parse_file(self, file_path, spill=False):
+        """
+        Parse a CSV or Excel file into a DataFrame without processing it.
+
+        Parameters:
+        - file_path (str): The path to the file to be read.
+        - spill (bool): Spill Excel data to a memory-mapped Arrow file.
+
+        Returns:
+        - DataFrame: The DataFrame containing the data from the file.
+        """
+        # Determine file format and read accordingly
+        if file_path.endswith('.csv'):
+            return read_csv(file_path, self.csv_engine)
+        elif file_path.endswith('.xls') or file_path.endswith('.xlsx'):
+            return self.read_excel_to_dataframe(file_path, spill)
+        else:
+            raise ValueError("Unsupported file format. Please provide a CSV or XLS/XLSX file.")
+
+    def read_excel_to_dataframe(self, file_path, spill=False, spill_dir=None):
         """
         Read an Excel file into a DataFrame.
 
         Parameters:
         - file_path (str): The path to the Excel file to be read.
+        - spill (bool): Stream the sheet into a memory-mapped Arrow file for
+          workbooks too big to keep in process memory; see spill_excel.
+        - spill_dir (str, optional): Directory of the spill file; defaults to the
+          system temp directory.
 
         Returns:
         - DataFrame: The DataFrame containing the data from the Excel file.
         """
-        # Convert Excel file to CSV
-        temp_csv_file = file_path[:-5] + '.csv'
-        excel_data = pd.read_excel(file_path)
-        excel_data.to_csv(temp_csv_file, index=False)
-
-        # Read the CSV file into a DataFrame
-        df = pd.read_csv(temp_csv_file)
-
-        # Remove the temporary CSV file
-        os.remove(temp_csv_file)
+        if spill:
+            # Streamed into the spill file without loading the sheet first
+            return spill_excel(file_path, spill_dir=spill_dir)
 
-        return df
+        # Read the first sheet directly, keeping the dtypes Excel provides
+        return pd.read_excel(file_path)
 
-    def process_data(self, df):
+    def process_data(self, df, source=None):
         """
         Process the data in the DataFrame using regular expressions.
 
         Parameters:
         - df (DataFrame): The DataFrame containing the data to be processed.
+        - source (str, optional): The file the data was read from; with a
+          token index, the extracted tokens are indexed under this name.
 
         Returns:
         - DataFrame: The DataFrame with processed data.
         """
-        # Apply regular expression patterns to relevant columns
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                df[column + '_emails'] = df[column].apply(lambda x: self.ePatt.findall(str(x)))
-                df[column + '_words'] = df[column].apply(lambda x: self.wPatt.findall(str(x)))
-                df[column + '_urls'] = df[column].apply(lambda x: self.uPatt.findall(str(x)))
+        if self.extractor.output == 'long':
+            return self.extractor.process(df, source=source)
+
+        # Apply regular expression patterns to relevant columns in a single pass
+        for column, values in self.extractor.process_dataframe(df, source=source).items():
+            df[column] = values
         return df
 
-    def save_dataframe(self, df, filename, format='csv'):
+    def stream_csv(self, file_path, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Process a CSV file chunk by chunk, appending each processed chunk to a
+        CSV output so memory use stays bounded by the chunk size.
+
+        Parameters:
+        - file_path (str): The path to the CSV file to be read.
+        - filename (str): The name of the output CSV file.
+        - chunk_size (int): The number of rows read and processed at a time.
+
+        Returns:
+        - int: The number of rows processed.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError("File not found.")
+        return stream_extract(self.extractor, read_csv_chunks(file_path, chunk_size), filename, source=file_path)
+
+    def stream_xlsx(self, file_path, filename, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None):
+        """
+        Process an XLSX sheet chunk by chunk without loading it whole, appending
+        each processed chunk to a CSV output.
+
+        Parameters:
+        - file_path (str): The path to the XLSX file to be read.
+        - filename (str): The name of the output CSV file.
+        - chunk_size (int): The number of rows read and processed at a time.
+        - sheet_name (str, optional): The sheet to read; the first by default.
+
+        Returns:
+        - int: The number of rows processed.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError("File not found.")
+        return stream_extract(self.extractor, read_chunks(file_path, chunk_size, sheet_name), filename,
+                              source=file_path)
+
+    def save_dataframe(self, df, filename, format='csv', partition_column=None,
+                       compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
         """
         Save the DataFrame to a file.
 
         Parameters:
         - df (DataFrame): The DataFrame to be saved.
         - filename (str): The name of the output file.
-        - format (str): The format in which to save the DataFrame ('csv' or 'pickle').
+        - format (str): The format in which to save the DataFrame ('csv', 'pickle',
+          'feather' or 'parquet').
+        - partition_column (str, optional): Write a Parquet dataset partitioned
+          by this column; see write_columnar.
+        - compression (str): The Parquet compression codec.
+        - row_group_size (int): Number of rows per Feather/Parquet row group.
 
         Returns:
-        - None
+        - dict: The bytes written and throughput (see write_columnar) for
+          Feather and Parquet, otherwise None.
         """
         # Save DataFrame based on format
         if format == 'csv':
-            df.to_csv(filename, index=False)
+            to_python_lists(df).to_csv(filename, index=False)
         elif format == 'pickle':
             df.to_pickle(filename)
+        elif format in COLUMNAR_FORMATS:
+            return write_columnar(df, filename, format, row_group_size, compression, partition_column)
         else:
-            raise ValueError("Unsupported format. Please choose 'csv' or 'pickle'.")
+            raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
+
+def process_to_file(file_path, output_file, format):
+    """Process one file and save it; the worker function of the batch mode."""
+    processor = DataProcessor(optimize=True)
+    df = processor.read_file_to_dataframe(file_path)
+    processor.save_dataframe(df, output_file, format)
+    return len(df)
 
 def main():
-    processor = DataProcessor()
+    processor = DataProcessor(cache=IngestCache(), optimize=True)
 
     while True:
         try:
@@ -121,8 +223,41 @@ def main():
             file_choice = int(input("Enter the number corresponding to the file you want to use: "))
             file_path = os.path.join(file_dir, files[file_choice - 1])
 
+            # Sparse columns are only skipped when asked for, with the columns to keep
+            processor.extractor.profiler = prompt_profiler()
+
+            # Index the extracted tokens next to the output directory
+            processor.extractor.index = TokenIndex(os.path.join(file_dir, "index"))
+
+            # Offer to stream CSV and XLSX files that may not fit in memory
+            chunk_size = None
+            if file_path.endswith(STREAMABLE_EXTENSIONS):
+                chunk_size = input("Enter a chunk size to stream the file (leave blank to load it whole): ").strip()
+
+            if chunk_size:
+                output_filename = input("Enter the filename for the output file (without extension): ")
+                output_dir = os.path.join(file_dir, "output")
+                if not os.path.exists(output_dir):
+                    os.makedirs(output_dir)
+                output_file = os.path.join(output_dir, f"{output_filename}.csv")
+                if file_path.endswith('.xlsx'):
+                    rows = processor.stream_xlsx(file_path, output_file, int(chunk_size))
+                else:
+                    rows = processor.stream_csv(file_path, output_file, int(chunk_size))
+                print(f"Streamed {rows} rows to CSV: {output_file}")
+                skipped = processor.extractor.profiler.skipped() if processor.extractor.profiler else []
+                if skipped:
+                    print(f"Skipped columns without matches in the sample: {', '.join(skipped)}")
+                continue
+
             # Read file to DataFrame
             dataframe = processor.read_file_to_dataframe(file_path)
+            print(format_memory_report(processor.memory_report))
+
+            # Report the columns the profiler judged too sparse to scan
+            skipped = processor.extractor.profiler.skipped() if processor.extractor.profiler else []
+            if skipped:
+                print(f"Skipped columns without matches in the sample: {', '.join(skipped)}")
 
             # Enter the filename for the output file
             output_filename = input("Enter the filename for the output file (without extension): ")
@@ -133,7 +268,7 @@ def main():
                 os.makedirs(output_dir)
 
             # Choose output format
-            format_choice = input("Choose output format ('csv' or 'pickle'): ")
+            format_choice = input("Choose output format ('csv', 'pickle', 'feather' or 'parquet'): ")
 
             # Save DataFrame
             if format_choice.lower() == 'csv':
@@ -144,8 +279,16 @@ def main():
                 output_file = os.path.join(output_dir, f"{output_filename}.pickle")
                 processor.save_dataframe(dataframe, output_file, 'pickle')
                 print(f"DataFrame saved as pickle: {output_file}")
+            elif format_choice.lower() in COLUMNAR_FORMATS:
+                format_choice = format_choice.lower()
+                output_file = os.path.join(output_dir, f"{output_filename}{COLUMNAR_FORMATS[format_choice]}")
+                partition_column, compression = (prompt_parquet_options() if format_choice == 'parquet'
+                                                   else (None, DEFAULT_COMPRESSION))
+                report = processor.save_dataframe(dataframe, output_file, format_choice, partition_column, compression)
+                print(f"DataFrame saved as {format_choice}: {output_file}")
+                print(format_write_report(report))
             else:
-                print("Unsupported format. Please choose 'csv' or 'pickle'.")
+                print("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
         except (FileNotFoundError, ValueError) as e:
             print(f"Error: {e}")
         except KeyboardInterrupt:
@@ -153,4 +296,8 @@ def main():
             break
 
 if __name__ == "__main__":
+    # python dataProcessor.py <directory or glob> [--format parquet] [--workers N]
+    if len(sys.argv) > 1:
+        sys.exit(batch_main(sys.argv[1:], process_to_file, ('.csv', '.xls', '.xlsx'),
+                            "Extract emails, words and URLs from every CSV/Excel file."))
     main()
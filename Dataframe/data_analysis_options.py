@@ -1,6 +1,9 @@
 import streamlit as st
+from lazy_dataset import as_dataset, columns_in_expression
 
-def display_data_analysis_options(combined_dataframe, analyzer):
+def display_data_analysis_options(dataset, analyzer):
+    # Every option loads only the columns it touches (a DataFrame also works)
+    dataset = as_dataset(dataset)
     selected_option = st.sidebar.radio(
         "Select Option",
         ["Describe DataFrame", "Show DataFrame Shape", "Show Column Names", "Show Missing Values",
@@ -10,64 +13,75 @@ def display_data_analysis_options(combined_dataframe, analyzer):
 
     if selected_option == "Describe DataFrame":
         st.subheader("DataFrame Description")
-        st.write(analyzer.describe_dataframe(combined_dataframe))
+        st.write(analyzer.describe_dataframe(dataset.load(view=selected_option)))
     elif selected_option == "Show DataFrame Shape":
         st.subheader("DataFrame Shape")
-        st.write(f"Number of rows: {combined_dataframe.shape[0]}")
-        st.write(f"Number of columns: {combined_dataframe.shape[1]}")
+        st.write(f"Number of rows: {dataset.num_rows}")
+        st.write(f"Number of columns: {len(dataset.columns)}")
     elif selected_option == "Show Column Names":
         st.subheader("Column Names")
-        st.write(combined_dataframe.columns.tolist())
+        st.write(dataset.columns)
     elif selected_option == "Show Missing Values":
         st.subheader("Missing Values")
         st.write("Null Value Handling:")
         show_isnull = st.sidebar.checkbox("Show isnull() Mask")
         if show_isnull:
-            st.write(combined_dataframe.isnull())
+            st.write(dataset.load(view=selected_option).isnull())
         show_notnull = st.sidebar.checkbox("Show notnull() Mask")
         if show_notnull:
-            st.write(combined_dataframe.notnull())
+            st.write(dataset.load(view=selected_option).notnull())
     elif selected_option == "Examine Rows and Columns":
         st.subheader("Examine Rows and Columns")
-        start_row = st.sidebar.number_input("Start Row", min_value=0, max_value=combined_dataframe.shape[0] - 1,
+        num_rows, num_columns = dataset.num_rows, len(dataset.columns)
+        start_row = st.sidebar.number_input("Start Row", min_value=0, max_value=num_rows - 1,
                                             value=0)
-        end_row = st.sidebar.number_input("End Row", min_value=start_row, max_value=combined_dataframe.shape[0] - 1,
-                                          value=min(start_row + 10, combined_dataframe.shape[0] - 1))
-        start_col = st.sidebar.number_input("Start Column", min_value=0, max_value=combined_dataframe.shape[1] - 1,
+        end_row = st.sidebar.number_input("End Row", min_value=start_row, max_value=num_rows - 1,
+                                          value=min(start_row + 10, num_rows - 1))
+        start_col = st.sidebar.number_input("Start Column", min_value=0, max_value=num_columns - 1,
                                             value=0)
-        end_col = st.sidebar.number_input("End Column", min_value=start_col, max_value=combined_dataframe.shape[1] - 1,
-                                          value=min(start_col + 5, combined_dataframe.shape[1] - 1))
+        end_col = st.sidebar.number_input("End Column", min_value=start_col, max_value=num_columns - 1,
+                                          value=min(start_col + 5, num_columns - 1))
         st.write("Selected Rows and Columns:")
-        st.write(combined_dataframe.iloc[start_row:end_row + 1, start_col:end_col + 1])
+        selected = dataset.load(dataset.columns[start_col:end_col + 1], view=selected_option)
+        st.write(selected.iloc[start_row:end_row + 1])
     elif selected_option == "Inspect Specific Columns":
         st.subheader("Inspect Specific Columns")
-        selected_columns = st.sidebar.multiselect("Select columns to inspect", combined_dataframe.columns.tolist())
+        selected_columns = st.sidebar.multiselect("Select columns to inspect", dataset.columns)
         if selected_columns:
             st.write("Data for selected columns:")
-            st.write(combined_dataframe[selected_columns])
+            st.write(dataset.load(selected_columns, view=selected_option))
     elif selected_option == "Filter Rows based on Condition":
         st.subheader("Filter Rows based on Condition")
         condition = st.sidebar.text_input("Enter condition (e.g., column_name > 5):")
+        extra_columns = st.sidebar.multiselect("Also show columns", dataset.columns)
         if st.sidebar.button("Filter Rows"):
-            filtered_df = analyzer.filter_dataframe(combined_dataframe, condition)
+            # Only the columns named in the condition are needed to filter
+            condition_columns = columns_in_expression(condition, dataset.columns) or None
+            filtered_df = analyzer.filter_dataframe(dataset.load(condition_columns, view=selected_option), condition)
             if filtered_df is not None:
+                shown_columns = filtered_df.columns.tolist() + extra_columns
                 st.write("Filtered DataFrame:")
-                st.write(filtered_df)
+                st.write(dataset.load(shown_columns, view=selected_option).loc[filtered_df.index])
     elif selected_option == "Derive New Column from Multiple Columns":
         st.subheader("Derive New Column from Multiple Columns")
         formula = st.sidebar.text_input("Enter formula (e.g., column_name_1 * column_name_2):")
         new_column_name = st.sidebar.text_input("Enter name for new column:")
         if st.sidebar.button("Derive Column"):
-            derived_df = analyzer.derive_column(combined_dataframe, formula, new_column_name)
+            formula_columns = columns_in_expression(formula, dataset.columns) or None
+            derived_df = analyzer.derive_column(dataset.load(formula_columns, view=selected_option).copy(),
+                                                formula, new_column_name)
             if derived_df is not None:
                 st.write("DataFrame with new column:")
                 st.write(derived_df)
     elif selected_option == "Drop Rows/Columns":
         st.subheader("Drop Rows/Columns")
-        rows_to_drop = st.sidebar.multiselect("Select rows to drop (by index):", combined_dataframe.index.tolist())
-        cols_to_drop = st.sidebar.multiselect("Select columns to drop:", combined_dataframe.columns.tolist())
+        rows_to_drop = st.sidebar.multiselect("Select rows to drop (by index):", list(range(dataset.num_rows)))
+        cols_to_drop = st.sidebar.multiselect("Select columns to drop:", dataset.columns)
         if st.sidebar.button("Drop"):
-            dropped_df = analyzer.drop_rows_columns(combined_dataframe, rows_to_drop, cols_to_drop)
+            # Dropped columns are never loaded
+            kept_columns = [column for column in dataset.columns if column not in cols_to_drop]
+            dropped_df = analyzer.drop_rows_columns(dataset.load(kept_columns, view=selected_option),
+                                                    rows_to_drop, [])
             if dropped_df is not None:
                 st.write("DataFrame after dropping rows/columns:")
                 st.write(dropped_df)
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import networkx as nx
 from networkx.algorithms import community
+from columnar import columnar_info, read_columnar
+from csv_reader import read_csv
 
 class DataFrameAnalyzer:
     @staticmethod
@@ -14,6 +16,24 @@ class DataFrameAnalyzer:
             st.error(f"Error reading pickle file: {e}")
             return None
 
+    @staticmethod
+    def read_columnar_info(columnar_file):
+        """Reads the columns and row count of a Feather or Parquet file without its data."""
+        try:
+            return columnar_info(columnar_file)
+        except Exception as e:
+            st.error(f"Error reading columnar file: {e}")
+            return None
+
+    @staticmethod
+    def read_columnar_to_dataframe(columnar_file, columns=None):
+        """Reads only the given columns of a Feather or Parquet file into a DataFrame."""
+        try:
+            return read_columnar(columnar_file, columns)
+        except Exception as e:
+            st.error(f"Error reading columnar file: {e}")
+            return None
+
     @staticmethod
     def derive_column(dataframe, formula, new_column_name):
         """Derives a new column based on a formula."""
@@ -147,7 +167,7 @@ def run_app():
 
     # Combine CSV dataframes
     if csv_files:
-        dataframes = [pd.read_csv(file) for file in csv_files]
+        dataframes = [read_csv(file) for file in csv_files]
         combined_df = pd.concat(dataframes)
         st.subheader("Combined DataFrame")
         st.write(combined_df)
@@ -0,0 +1,138 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from batch import default_output_dir, find_files
+from docx_reader import iter_docx_paragraphs
+from extraction import default_extractor
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+CORPUS_COLUMNS = ['doc_id', 'paragraph_no', 'text', 'emails', 'words', 'urls']
+CORPUS_FORMATS = {'parquet': '.parquet', 'feather': '.feather'}
+DEFAULT_CORPUS_NAME = 'corpus'
+
+
+def corpus_schema():
+    """The Arrow schema of the paragraph table, fixed so every document's rows share it."""
+    return pa.schema([
+        ('doc_id', pa.string()),
+        ('paragraph_no', pa.int32()),
+        ('text', pa.string()),
+        ('emails', pa.list_(pa.string())),
+        ('words', pa.list_(pa.string())),
+        ('urls', pa.list_(pa.string())),
+    ])
+
+
+def document_paragraphs(source, doc_id, extractor=None):
+    """
+    Read one .docx file into paragraph rows with their extracted entities.
+
+    Parameters:
+    - source (str or file): Path or binary file object of the document.
+    - doc_id (str): The name the rows are filed under.
+    - extractor (MultiPatternExtractor, optional): Extracts the emails,
+      words and URLs; the default extractor by default.
+
+    Returns:
+    - DataFrame: One row per paragraph with the CORPUS_COLUMNS.
+    """
+    extractor = extractor or default_extractor()
+    texts = list(iter_docx_paragraphs(source))
+    df = pd.DataFrame({'doc_id': doc_id, 'paragraph_no': range(len(texts)), 'text': texts},
+                      columns=['doc_id', 'paragraph_no', 'text'])
+    df['paragraph_no'] = df['paragraph_no'].astype('int32')
+    for column, values in extractor.process_dataframe(df, columns=['text']).items():
+        df[column[len('text_'):]] = values
+    return df[CORPUS_COLUMNS]
+
+
+def _parse_document(file_path, doc_id):
+    """Parse one document in a worker; returns its Arrow table or the error."""
+    try:
+        df = document_paragraphs(file_path, doc_id)
+        return pa.Table.from_pandas(df, schema=corpus_schema(), preserve_index=False), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def build_corpus(target, output_file, workers=None, format='parquet'):
+    """
+    Parse every .docx file under a directory or glob into one long-form paragraph table.
+
+    Documents are parsed in a process pool and each one's rows are appended
+    to the output as soon as they arrive, so the corpus is never held in
+    memory as a whole. Rows keep document order. The file is written under
+    a temporary name and renamed when complete.
+
+    Parameters:
+    - target (str): A directory or a glob pattern.
+    - output_file (str): The Parquet or Feather file to write.
+    - workers (int, optional): Number of worker processes; every CPU by default.
+    - format (str): 'parquet' or 'feather'.
+
+    Returns:
+    - DataFrame: One row per document with its doc_id, paragraph count and
+      error (if it could not be parsed).
+    """
+    if pa is None:
+        raise ImportError("Building a corpus requires pyarrow to be installed.")
+    if format not in CORPUS_FORMATS:
+        raise ValueError("Unsupported format. Please choose 'parquet' or 'feather'.")
+    files = find_files(target, ('.docx',))
+    base = target if os.path.isdir(target) else os.path.commonpath([os.path.dirname(path) for path in files] or ['.'])
+    doc_ids = [os.path.relpath(path, base) for path in files]
+
+    temp_file = output_file + '.tmp'
+    schema = corpus_schema()
+    if format == 'parquet':
+        writer = pq.ParquetWriter(temp_file, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(temp_file, schema)
+    summary = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() yields in submission order, so the corpus keeps document order
+            for doc_id, (table, error) in zip(doc_ids, executor.map(_parse_document, files, doc_ids, chunksize=8)):
+                if table is not None:
+                    writer.write_table(table)
+                summary.append({'doc_id': doc_id, 'paragraphs': 0 if table is None else table.num_rows,
+                                'error': error})
+    except BaseException:
+        writer.close()
+        os.remove(temp_file)
+        raise
+    writer.close()
+    os.replace(temp_file, output_file)
+    return pd.DataFrame(summary, columns=['doc_id', 'paragraphs', 'error'])
+
+
+if __name__ == "__main__":
+    # python docx_corpus.py <directory or glob> [--output corpus.parquet] [--workers N]
+    parser = argparse.ArgumentParser(description="Parse every .docx file into one paragraph-level table.")
+    parser.add_argument('target', help="directory or glob pattern (quote it, e.g. 'contracts/**/*.docx')")
+    parser.add_argument('--format', choices=list(CORPUS_FORMATS), default='parquet', help="output format")
+    parser.add_argument('--output', default=None, help="default: output/corpus.<format> next to the inputs")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: every CPU)")
+    args = parser.parse_args()
+    output_file = args.output
+    if output_file is None:
+        output_dir = default_output_dir(args.target, find_files(args.target, ('.docx',)))
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, DEFAULT_CORPUS_NAME + CORPUS_FORMATS[args.format])
+    started = time.perf_counter()
+    summary = build_corpus(args.target, output_file, args.workers, args.format)
+    failed = summary['error'].notna()
+    print(f"Wrote {summary['paragraphs'].sum()} paragraphs from {(~failed).sum()} document(s) to {output_file} "
+          f"in {time.perf_counter() - started:.1f}s.")
+    for doc_id, error in zip(summary.loc[failed, 'doc_id'], summary.loc[failed, 'error']):
+        print(f"Error: {doc_id}: {error}")
+    sys.exit(1 if failed.any() else 0)
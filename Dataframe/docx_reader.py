@@ -0,0 +1,75 @@
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+DOCUMENT_PART = 'word/document.xml'
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Run content that python-docx renders as text, and the text it renders
+_RUN_TEXT = {_W + 'tab': '\t', _W + 'ptab': '\t', _W + 'br': '\n', _W + 'cr': '\n', _W + 'noBreakHyphen': '-'}
+
+
+def iter_docx_paragraphs(source, tables=False):
+    """
+    Stream the paragraph text of a .docx file without building its document model.
+
+    word/document.xml is parsed incrementally straight out of the zip and
+    every finished body element is discarded, so memory stays flat however
+    long the document is. Text follows python-docx's Paragraph.text: text
+    runs, tabs and line breaks, but not text boxes nested in a paragraph.
+
+    Parameters:
+    - source (str or file): Path or binary file object (e.g. a Streamlit
+      upload) of the .docx file.
+    - tables (bool): Also yield the text of every table cell (its paragraphs
+      joined by newlines), in document order; by default only body
+      paragraphs are yielded, like python-docx's Document.paragraphs.
+
+    Returns:
+    - iterator: The text of each paragraph (and cell).
+    """
+    with zipfile.ZipFile(source) as archive, archive.open(DOCUMENT_PART) as part:
+        body = None
+        paragraphs = []  # text pieces of the paragraphs being parsed, innermost last
+        cells = []  # paragraph texts of the table cells being parsed, innermost last
+        table_depth = 0
+        for event, element in iterparse(part, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == _W + 'p':
+                    paragraphs.append([])
+                elif tag == _W + 'tbl':
+                    table_depth += 1
+                elif tag == _W + 'tc':
+                    cells.append([])
+                elif tag == _W + 'body':
+                    body = element
+                continue
+
+            if tag == _W + 't':
+                if paragraphs:
+                    paragraphs[-1].append(element.text or '')
+            elif tag in _RUN_TEXT:
+                if paragraphs:
+                    paragraphs[-1].append(_RUN_TEXT[tag])
+            elif tag == _W + 'p':
+                text = ''.join(paragraphs.pop())
+                # Paragraphs nested in another (text boxes) are not part of its text
+                if not paragraphs:
+                    if cells:
+                        cells[-1].append(text)
+                    elif table_depth == 0:
+                        yield text
+            elif tag == _W + 'tc':
+                text = '\n'.join(cells.pop())
+                if tables:
+                    yield text
+            elif tag == _W + 'tbl':
+                table_depth -= 1
+
+            if body is not None and element in body:
+                # A body-level element is complete; drop it to keep memory flat
+                body.remove(element)
+
+
+def read_docx_paragraphs(source, tables=False):
+    """Return the paragraph text of a .docx file as a list; see iter_docx_paragraphs."""
+    return list(iter_docx_paragraphs(source, tables))
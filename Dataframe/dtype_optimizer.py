@@ -0,0 +1,142 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Text that is a date beyond doubt: ISO dates, optionally with a time.
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$')
+DATE_SAMPLE_SIZE = 100
+
+
+def _optimize_integers(series):
+    if series.min() >= 0:
+        return pd.to_numeric(series, downcast='unsigned')
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _optimize_floats(series):
+    # Only downcast when every value survives the round-trip through float32
+    values = series.to_numpy()
+    narrowed = values.astype(np.float32)
+    if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+        return pd.Series(narrowed, index=series.index, name=series.name)
+    return series
+
+
+def _looks_like_dates(values):
+    sample = values[:DATE_SAMPLE_SIZE]
+    return len(sample) > 0 and all(DATE_PATTERN.match(value) for value in sample)
+
+
+def _optimize_strings(series, category_ratio=None):
+    values = series.dropna()
+    if len(values) == 0 or pd.api.types.infer_dtype(values, skipna=True) != 'string':
+        # Mixed objects (e.g. lists of extracted matches) are left alone
+        return series
+    if _looks_like_dates(values.tolist()):
+        parsed = pd.to_datetime(series, errors='coerce')
+        if parsed.notna().sum() == len(values):
+            return parsed
+    if category_ratio is not None and values.nunique() <= category_ratio * len(values):
+        return series.astype('category')
+    if isinstance(series.dtype, pd.StringDtype):
+        return series
+    # Arrow-backed, with NaN for missing values as in the object column
+    return series.astype(pd.StringDtype('pyarrow', na_value=np.nan))
+
+
+def optimize_dtypes(df, category_ratio=0.5, parse_dates=True, for_storage=False):
+    """
+    Shrink a freshly loaded DataFrame's memory footprint without changing its values.
+
+    By default only conversions that keep arithmetic and comparisons as they
+    were are made, so the frame can feed derived columns and queries: object
+    text columns become Arrow-backed strings (still with NaN for missing
+    values), and those holding only ISO dates datetimes. Numbers keep their 64-bit types, since narrower ones wrap or
+    lose precision in derived columns (200 * 250 is 80 in uint8), and text
+    is not made categorical, since unordered categoricals reject < and >.
+
+    With for_storage, for frames that are saved (the CLI outputs), integers
+    are also downcast to the smallest (unsigned where possible) integer type,
+    floats to float32 when no value loses precision, and text columns with
+    few distinct values become categoricals.
+
+    Parameters:
+    - df (DataFrame): The DataFrame to optimize.
+    - category_ratio (float): With for_storage, text columns with at most
+      this share of distinct values become categoricals.
+    - parse_dates (bool): Parse columns of ISO date strings.
+    - for_storage (bool): Also narrow numbers and categorize text.
+
+    Returns:
+    - DataFrame: The optimized copy.
+    """
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            columns[column] = series
+        elif pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+            columns[column] = _optimize_integers(series) if for_storage and len(series) else series
+        elif pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+            columns[column] = _optimize_floats(series) if for_storage else series
+        elif dtype == object or isinstance(dtype, pd.StringDtype):
+            optimized = _optimize_strings(series, category_ratio if for_storage else None)
+            if not parse_dates and pd.api.types.is_datetime64_dtype(optimized.dtype):
+                optimized = series
+            columns[column] = optimized
+        else:
+            columns[column] = series
+    optimized = pd.DataFrame(columns, index=df.index)
+    optimized.columns = df.columns
+    return optimized
+
+
+def memory_report(before, after):
+    """
+    Compare the memory used by each column before and after optimizing.
+
+    Parameters:
+    - before (DataFrame): The original DataFrame.
+    - after (DataFrame): The optimized DataFrame.
+
+    Returns:
+    - DataFrame: One row per column plus a 'TOTAL' row, with the dtypes, the
+      bytes used before and after, and the reduction factor.
+    """
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'column': [str(column) for column in before.columns],
+        'dtype_before': [str(dtype) for dtype in before.dtypes],
+        'dtype_after': [str(dtype) for dtype in after.dtypes],
+        'bytes_before': before_bytes.to_numpy(),
+        'bytes_after': after_bytes.to_numpy(),
+    })
+    return with_total(report)
+
+
+def with_total(report):
+    """
+    Append a 'TOTAL' row and the reduction factors to per-column memory rows.
+
+    Parameters:
+    - report (DataFrame): Rows of memory_report without the 'TOTAL' row,
+      possibly gathered from several reports.
+
+    Returns:
+    - DataFrame: The rows plus the total, with a 'reduction' column.
+    """
+    report = report[['column', 'dtype_before', 'dtype_after', 'bytes_before', 'bytes_after']]
+    total = pd.DataFrame([{'column': 'TOTAL', 'dtype_before': '', 'dtype_after': '',
+                           'bytes_before': report['bytes_before'].sum(), 'bytes_after': report['bytes_after'].sum()}])
+    report = pd.concat([report, total], ignore_index=True)
+    report['reduction'] = (report['bytes_before'] / report['bytes_after'].where(report['bytes_after'] > 0)).round(2)
+    return report
+
+
+def format_memory_report(report):
+    """Return a one-line summary of a memory report's total."""
+    total = report.iloc[-1]
+    return (f"Memory: {total['bytes_before'] / 2 ** 20:.1f} MB -> {total['bytes_after'] / 2 ** 20:.1f} MB "
+            f"({total['reduction']}x smaller)")
@@ -0,0 +1,365 @@
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+SHEET_COLUMN = 'sheet'
+DEFAULT_ROW_CHUNK = 50000
+# Smaller batches when spilling, so little parsed-cell garbage is left on the heap
+SPILL_ROW_CHUNK = 10000
+
+
+def _parse_sheets(file_path, sheets):
+    """Open the workbook once and parse the given sheets (runs in a worker)."""
+    with pd.ExcelFile(file_path) as xls:
+        return [xls.parse(sheet) for sheet in sheets]
+
+
+def read_excel_sheets(file_path, sheet_name=None, workers=1):
+    """
+    Read one, several or all sheets of an Excel workbook, opening it once.
+
+    pd.read_excel() opens and parses the workbook again for every sheet it is
+    called with. Here the workbook is opened once and every requested sheet is
+    parsed from that handle; with several workers the sheets are split into
+    one batch per worker, so each worker opens the workbook only once too.
+
+    Parameters:
+    - file_path (str): The path to the XLS/XLSX file.
+    - sheet_name (str or list, optional): The sheet to read, a list of sheets,
+      or None (default) for every sheet.
+    - workers (int, optional): Number of worker processes parsing sheets; 1
+      (default) parses them in the calling process and None uses every CPU.
+
+    Returns:
+    - DataFrame: A single sheet as is, or several sheets concatenated with a
+      leading 'sheet' column naming the sheet each row came from ('sheet_1',
+      'sheet_2', ... when a sheet already has a column of that name).
+    """
+    if workers is not None and workers < 1:
+        raise ValueError("The number of workers must be at least 1.")
+    if sheet_name is not None and not isinstance(sheet_name, list):
+        return pd.read_excel(file_path, sheet_name=sheet_name)
+
+    with pd.ExcelFile(file_path) as xls:
+        sheets = xls.sheet_names if sheet_name is None else sheet_name
+        if workers == 1 or len(sheets) < 2:
+            frames = [xls.parse(sheet) for sheet in sheets]
+        else:
+            frames = None
+
+    if frames is None:
+        batch_count = min(workers or len(sheets), len(sheets))
+        batches = [sheets[i::batch_count] for i in range(batch_count)]
+        with ProcessPoolExecutor(max_workers=batch_count) as executor:
+            parsed = list(executor.map(_parse_sheets, [file_path] * batch_count, batches))
+        # Batches are interleaved; put the sheets back in workbook order
+        by_sheet = {sheet: frame for batch, frames in zip(batches, parsed) for sheet, frame in zip(batch, frames)}
+        frames = [by_sheet[sheet] for sheet in sheets]
+
+    # A sheet may have a 'sheet' column of its own; number the provenance column past it
+    sheet_column = SHEET_COLUMN
+    suffix = 0
+    while any(sheet_column in frame.columns for frame in frames):
+        suffix += 1
+        sheet_column = f'{SHEET_COLUMN}_{suffix}'
+    for sheet, frame in zip(sheets, frames):
+        frame.insert(0, sheet_column, sheet)
+    if not frames:
+        return pd.DataFrame(columns=[SHEET_COLUMN])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _header_names(header):
+    """Name header cells the way pd.read_excel does (Unnamed: i, then .1 suffixes)."""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f'Unnamed: {i}' if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_xlsx_chunks(file_path, sheet_name=None, chunk_size=DEFAULT_ROW_CHUNK):
+    """
+    Read an .xlsx sheet lazily in row chunks with constant memory.
+
+    The sheet's XML is streamed by openpyxl's read-only mode, so only the
+    rows of the current chunk are held as Python objects; pd.read_excel
+    materializes the whole sheet first. The first row is the header, and
+    trailing empty rows are dropped as pd.read_excel does. The file and the
+    sheet are checked before this returns, so a caller can open its output
+    only once the input is known to be readable.
+
+    Parameters:
+    - file_path (str): The path to the .xlsx file.
+    - sheet_name (str, optional): The sheet to read; the first by default.
+    - chunk_size (int): Number of rows per chunk.
+
+    Returns:
+    - iterator: DataFrames of at most chunk_size rows, with row labels
+      continuing from one chunk to the next; a sheet with only a header
+      yields one empty DataFrame with its columns. Each chunk is typed on
+      its own, as pd.read_csv's chunks are: a column without values in a
+      chunk is NaN floats there.
+    """
+    if openpyxl is None:
+        raise ImportError("Streaming .xlsx files requires openpyxl to be installed.")
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1.")
+    if not file_path.endswith('.xlsx'):
+        raise ValueError("Unsupported file format. Only XLSX files can be streamed.")
+    workbook = _open_workbook(file_path)
+    try:
+        if sheet_name is not None and sheet_name not in workbook.sheetnames:
+            raise ValueError(f"Sheet '{sheet_name}' not found. Please choose one of: {', '.join(workbook.sheetnames)}.")
+    finally:
+        workbook.close()
+    return _iter_xlsx_chunks(file_path, sheet_name, chunk_size)
+
+
+def _open_workbook(file_path):
+    try:
+        return openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    except (openpyxl.utils.exceptions.InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+        raise ValueError(f"Invalid XLSX file: {e}")
+
+
+def _iter_xlsx_chunks(file_path, sheet_name, chunk_size):
+    """Yield the row chunks of a sheet checked by read_xlsx_chunks."""
+    workbook = _open_workbook(file_path)
+    try:
+        worksheet = workbook.worksheets[0] if sheet_name is None else workbook[sheet_name]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _header_names(header)
+        start = 0
+        batch = []
+        # Empty rows are only counted until a later row shows they are not trailing
+        empty_rows = 0
+        for row in rows:
+            if all(value is None for value in row):
+                empty_rows += 1
+                continue
+            for held in chain(repeat((None,) * len(columns), empty_rows), [row]):
+                batch.append(held)
+                if len(batch) == chunk_size:
+                    yield _chunk_frame(batch, columns, start)
+                    start += len(batch)
+                    batch = []
+            empty_rows = 0
+        if batch or start == 0:
+            yield _chunk_frame(batch, columns, start)
+    finally:
+        workbook.close()
+
+
+def _chunk_frame(rows, columns, start):
+    """Build one chunk's DataFrame; columns without a value in it are NaN floats, as in pd.read_excel."""
+    frame = pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(start, start + len(rows)))
+    for position in range(len(columns)):
+        values = frame.iloc[:, position]
+        if values.dtype == object and values.isna().all():
+            frame.isetitem(position, values.astype('float64'))
+    return frame
+
+
+def _arrow_column(values, expected):
+    """
+    Convert one chunk of a column to the column's Arrow type.
+
+    Returns:
+    - tuple: The array (None if it does not fit) and the type the column
+      should have instead (None if Arrow cannot hold the values at all).
+    """
+    try:
+        # A chunk with no values says nothing about the type, so it takes any other
+        array = pa.nulls(len(values)) if values.isna().all() else pa.array(values, from_pandas=True)
+    except pa.ArrowException:
+        return None, None
+    if expected is None or array.type == expected:
+        return array, array.type
+    try:
+        return array.cast(expected), expected
+    except pa.ArrowException:
+        pass
+    # e.g. a column empty in the first chunk, or integers followed by floats
+    try:
+        widened = pa.unify_schemas([pa.schema([('column', expected)]), pa.schema([('column', array.type)])],
+                                   promote_options='permissive').field('column').type
+    except pa.ArrowException:
+        return None, None
+    return None, widened
+
+
+def _write_spill(chunks, path, types, in_memory):
+    """
+    Write the chunks to an Arrow IPC file batch by batch.
+
+    Columns are named by position. The columns in in_memory are collected
+    as they are instead; types fixes the Arrow type of the other columns.
+
+    Returns:
+    - tuple: The original column labels, the collected in-memory parts and
+      the number of rows, or the position and new type (None: keep it in
+      memory) of a column that does not fit its type, to retry with.
+    """
+    labels = None
+    parts = {}
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if labels is None:
+                labels = list(chunk.columns)
+                parts = {position: [] for position in in_memory}
+            arrays = {}
+            for position in range(len(labels)):
+                values = chunk.iloc[:, position]
+                if position in in_memory:
+                    parts[position].append(values.reset_index(drop=True))
+                    continue
+                array, column_type = _arrow_column(values, types.get(position))
+                if array is None:
+                    return None, (position, column_type)
+                types[position] = column_type
+                arrays[str(position)] = array
+            batch = pa.record_batch(list(arrays.values()), names=list(arrays))
+            if writer is None:
+                writer = pa.ipc.new_file(path, batch.schema)
+            writer.write_batch(batch)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # No rows: an empty file still records the columns
+        with pa.ipc.new_file(path, pa.schema([])):
+            pass
+    return (labels or [], parts, rows), None
+
+
+def _spill(read_chunks, spill_dir=None):
+    """
+    Spill the DataFrame chunks produced by read_chunks into a memory-mapped Arrow IPC file.
+
+    A column whose values in a later chunk do not fit the type taken from
+    the first ones is widened (e.g. to float, or from an empty column to the
+    type of its values), or kept in memory when Arrow cannot hold it; the
+    chunks are then read and written again.
+
+    Returns:
+    - DataFrame: The data, with Arrow-backed columns that map the file.
+    """
+    if pa is None:
+        raise ImportError("Spilling requires pyarrow to be installed.")
+    handle, path = tempfile.mkstemp(suffix='.arrow', dir=spill_dir)
+    os.close(handle)
+    try:
+        types = {}
+        in_memory = set()
+        while True:
+            written, retry = _write_spill(read_chunks(), path, types, in_memory)
+            if retry is None:
+                break
+            position, column_type = retry
+            if column_type is None:
+                in_memory.add(position)
+                types.pop(position, None)
+            else:
+                types[position] = column_type
+        labels, parts, rows = written
+        # ArrowDtype columns wrap the mapped buffers: nothing is copied onto the heap
+        result = pa.ipc.open_file(pa.memory_map(path)).read_all().to_pandas(types_mapper=pd.ArrowDtype)
+    finally:
+        try:
+            # The mapping stays valid after the file is unlinked (POSIX); on
+            # systems that refuse, the file is left to the temp directory.
+            os.remove(path)
+        except OSError:
+            pass
+    # Each column's type is fixed by all of its values; it is then given the
+    # type pd.read_excel gives such values
+    for position in range(len(labels)):
+        name = str(position)
+        column_type = types.get(position, pa.null())
+        if position in parts:
+            column = pd.concat(parts[position], ignore_index=True) if parts[position] else pd.Series(dtype='object')
+            result.insert(position, name, column)
+        elif pa.types.is_null(column_type):
+            # Entirely empty columns have no type; they read as NaN
+            result[name] = pd.Series(np.nan, index=range(rows))
+        elif (pa.types.is_integer(column_type) or pa.types.is_boolean(column_type)) and result[name].hasnans:
+            # Integers and booleans with gaps read as floats
+            result[name] = result[name].astype(pd.ArrowDtype(pa.float64()))
+        elif pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+            # pandas' own Arrow-backed strings, sharing the mapped buffers
+            result[name] = result[name].astype('str')
+    result.columns = labels
+    return result
+
+
+def spill_excel(file_path, sheet_name=None, spill_dir=None, chunk_size=SPILL_ROW_CHUNK):
+    """
+    Read an Excel sheet into a memory-mapped Arrow IPC (Feather) file.
+
+    An .xlsx sheet is streamed with read_xlsx_chunks and written to a
+    temporary file one batch of rows at a time, so the sheet is never held
+    in memory as a whole. The file is read back through a memory map as
+    Arrow-backed columns, whose buffers live in the OS page cache, which can
+    evict them under memory pressure, instead of the process heap. Columns
+    Arrow cannot type (e.g. objects mixing numbers and text) are kept in
+    memory as they are. An .xls sheet cannot be streamed and is parsed whole
+    before it is spilled.
+
+    Parameters:
+    - file_path (str): The path to the XLS/XLSX file.
+    - sheet_name (str, optional): The sheet to read; the first by default.
+    - spill_dir (str, optional): Directory of the temporary file; defaults to
+      the system temp directory, so read-only source folders are not touched.
+    - chunk_size (int): Number of rows written per batch.
+
+    Returns:
+    - DataFrame: The sheet, with a RangeIndex.
+    """
+    if file_path.endswith('.xlsx'):
+        return _spill(lambda: read_xlsx_chunks(file_path, sheet_name, chunk_size), spill_dir)
+    return spill_to_arrow(pd.read_excel(file_path, sheet_name=0 if sheet_name is None else sheet_name), spill_dir)
+
+
+def spill_to_arrow(df, spill_dir=None):
+    """
+    Move a DataFrame's columns into a memory-mapped Arrow IPC (Feather) file.
+
+    See spill_excel, which spills a sheet without loading it first.
+
+    Parameters:
+    - df (DataFrame): The DataFrame to spill.
+    - spill_dir (str, optional): Directory of the temporary file.
+
+    Returns:
+    - DataFrame: The same data, with the same index and column order.
+    """
+    result = _spill(lambda: [df], spill_dir)
+    result.index = df.index
+    return result
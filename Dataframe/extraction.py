@@ -0,0 +1,524 @@
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+import numpy as np
+import pandas as pd
+from pattern_set import PatternSet
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+
+BACKENDS = ('python', 'arrow')
+OUTPUTS = ('lists', 'arrow', 'long')
+ENTITY_COLUMNS = ['row_id', 'column', 'entity']
+DEFAULT_CHUNK_SIZE = 100000
+
+
+EMAIL_PATTERN = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}'
+WORD_PATTERN = r'\b[a-zA-Z]{5,15}\b'
+URL_PATTERN = r'\b\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*\b'
+
+
+def is_text_column(series):
+    """Return True if the Series holds text (object, string, Arrow string, or categorical of text dtype)."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    return dtype == 'object' or isinstance(dtype, pd.StringDtype)
+
+
+# ASCII characters that Python's \s treats as whitespace but RE2 does not.
+_RE2_UNSAFE_CHARS = '[\x0b\x1c-\x1f]'
+
+
+def _findall(pattern, text):
+    if isinstance(pattern.pattern, bytes):
+        return pattern.findall(text.encode('utf-8'))
+    return pattern.findall(text)
+
+
+def _arrow_prefilter(pattern):
+    """
+    Return an RE2 pattern that matches every ASCII string the Python pattern
+    matches, or None if the pattern cannot be evaluated by Arrow.
+    """
+    source = pattern.pattern
+    if isinstance(source, bytes):
+        try:
+            source = source.decode('ascii')
+        except UnicodeDecodeError:
+            return None
+    # '$' also matches before a trailing newline in Python, and flags change
+    # the meaning of the pattern; leave such patterns to Python.
+    unescaped = re.sub(r'\[[^\]]*\]', '', re.sub(r'\\.', '', source))
+    if '$' in unescaped or pattern.flags & ~(re.UNICODE | re.ASCII):
+        return None
+    try:
+        pc.match_substring_regex(pa.array(['']), source)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return source
+
+
+def _value_keys(series):
+    """
+    Return the keys a column is factorized on in dedup mode.
+
+    Extraction runs on each cell's text, and cells that compare equal can
+    print differently (0 and False, 1 and True, 0.0 and -0.0), so every
+    value is keyed by its type and text unless the column only holds text.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if isinstance(dtype, pd.StringDtype):
+        return series
+    return pd.Series([(type(value), str(value)) for value in series], index=series.index, dtype='object')
+
+
+def _is_missing(value):
+    return pd.api.types.is_scalar(value) and pd.isna(value)
+
+
+class ExtractionMemo:
+    """
+    Bounded least-recently-used memo of extraction results keyed by cell value
+    (see _value_keys).
+
+    Parameters:
+    - maxsize (int): Maximum number of values kept.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the results stored for a value, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, results):
+        """Store the results for a value, evicting the least recently used."""
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every stored value."""
+        self._entries.clear()
+
+
+class MultiPatternExtractor:
+    """
+    Extract the matches of several regular expressions from DataFrame columns
+    in a single pass over the cells.
+
+    Each cell is converted to text once and every pattern is run on that same
+    string, so the output for each pattern is exactly what ``findall`` returns.
+    Bytes patterns are run on the UTF-8 encoding of the cell.
+
+    Two backends are available:
+    - 'python': every cell is converted with str() and scanned.
+    - 'arrow': the column is converted to an Arrow string array once, nulls
+      yield empty lists, and each pattern is first evaluated on the whole
+      array with Arrow's vectorized regex kernels so only the rows that can
+      match are scanned in Python.
+
+    With more than one worker, the text columns are split into row chunks that
+    are extracted in a process pool and stitched back together in the
+    original row order.
+
+    In dedup mode each column is factorized and the patterns run only once
+    per distinct value; the results are copied back to every cell through the
+    codes (each cell gets its own list). Values are told apart by type as
+    well as value, so 0 and False are extracted separately. An optional LRU
+    memo keeps the results of recently seen values across calls, e.g. for
+    every file of a batch processed with the same extractor.
+
+    Parameters:
+    - patterns (dict): Ordered mapping of output suffix to regular expression
+      (str, bytes or compiled pattern).
+    - backend (str): 'python' (default) or 'arrow'.
+    - workers (int, optional): Number of worker processes; 1 (default) runs in
+      the calling process and None uses every CPU.
+    - chunk_size (int): Number of rows per chunk sent to a worker.
+    - dedup (bool): Extract once per distinct value of a column.
+    - memo_size (int): Number of distinct values kept in the LRU memo in dedup
+      mode; 0 (default) disables the memo.
+    - output (str): How the matches are returned by process():
+      'lists' (default) appends columns holding Python lists, 'arrow' appends
+      Arrow list<string> columns with dictionary-encoded values, and 'long'
+      returns a (row_id, column, entity) table instead.
+    - prefilters (dict, optional): Literal prefilters overriding the ones
+      derived from the patterns; see PatternSet.
+    - max_cell_length (int, optional): Longest cell that is scanned; longer
+      cells yield no matches. See PatternSet.
+    - cell_timeout (float, optional): Seconds a single pattern may spend on a
+      single cell before it is abandoned; requires the 'regex' package.
+    - profiler (ColumnProfiler, optional): Samples the text columns first and
+      skips the ones where the patterns hardly ever match.
+    - index (TokenIndex, optional): Inverted index the matches of every
+      processed file are added to.
+    """
+
+    def __init__(self, patterns, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists', prefilters=None,
+                 max_cell_length=None, cell_timeout=None, profiler=None, index=None):
+        if not patterns:
+            raise ValueError("At least one pattern is required.")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported backend '{backend}'. Please choose one of: {', '.join(BACKENDS)}.")
+        if backend == 'arrow' and pa is None:
+            raise ImportError("The 'arrow' backend requires pyarrow to be installed.")
+        if workers is not None and workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be at least 1.")
+        if memo_size < 0:
+            raise ValueError("The memo size cannot be negative.")
+        if output not in OUTPUTS:
+            raise ValueError(f"Unsupported output '{output}'. Please choose one of: {', '.join(OUTPUTS)}.")
+        if output == 'arrow' and pa is None:
+            raise ImportError("The 'arrow' output requires pyarrow to be installed.")
+        self.patterns = {name: re.compile(pattern) if isinstance(pattern, (str, bytes)) else pattern
+                         for name, pattern in patterns.items()}
+        self.names = list(self.patterns)
+        self.pattern_set = PatternSet(self.patterns, prefilters, max_cell_length, cell_timeout)
+        self.backend = backend
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.dedup = dedup
+        self.memo = ExtractionMemo(memo_size) if memo_size else None
+        self.output = output
+        self.profiler = profiler
+        self.index = index
+        self._re2_patterns = {}
+        if backend == 'arrow':
+            self._re2_patterns = {name: _arrow_prefilter(pattern) for name, pattern in self.patterns.items()}
+
+    def extract(self, text):
+        """
+        Extract all matches of every pattern from a single string.
+
+        Parameters:
+        - text (str): The text to scan.
+
+        Returns:
+        - dict: Mapping of pattern name to the list ``findall`` returns.
+        """
+        return {name: _findall(pattern, text) for name, pattern in self.patterns.items()}
+
+    def extract_series(self, series):
+        """
+        Extract matches from every cell of a Series.
+
+        Parameters:
+        - series (Series): The column to scan.
+
+        Returns:
+        - dict: Mapping of pattern name to a Series of match lists.
+        """
+        if self.dedup:
+            return self._extract_series_dedup(series)
+        return self._extract_values(series)
+
+    def extract_texts(self, texts, record=True):
+        """
+        Extract all matches of every pattern from a list of strings.
+
+        The texts go through the pattern set's prefilters and per-cell budget,
+        as every cell of a column does.
+
+        Parameters:
+        - texts (list): The texts to scan.
+        - record (bool): Add the scans to the pattern report.
+
+        Returns:
+        - dict: Mapping of pattern name to the ``findall`` result of every text.
+        """
+        encoded = None
+        results = {}
+        for name, pattern in self.patterns.items():
+            if isinstance(pattern.pattern, bytes):
+                if encoded is None:
+                    encoded = [text.encode('utf-8') for text in texts]
+                results[name] = self.pattern_set.findall_column(name, encoded, record=record)
+            else:
+                results[name] = self.pattern_set.findall_column(name, texts, record=record)
+        return results
+
+    def _extract_values(self, series):
+        if self.backend == 'arrow':
+            return self._extract_series_arrow(series)
+        return {name: pd.Series(values, index=series.index, dtype='object')
+                for name, values in self.extract_texts([str(value) for value in series]).items()}
+
+    def _extract_series_arrow(self, series):
+        strings = series.astype('string[pyarrow]')
+        array = pa.array(strings)
+        texts = strings.to_numpy(dtype=object)
+        valid = pc.is_valid(array)
+        # Arrow's RE2 kernels agree with Python's re on plain ASCII text; any
+        # other row is always handed to Python.
+        ascii_rows = pc.and_(
+            pc.fill_null(pc.string_is_ascii(array), False),
+            pc.invert(pc.fill_null(pc.match_substring_regex(array, _RE2_UNSAFE_CHARS), True)),
+        )
+        results = {}
+        for name, pattern in self.patterns.items():
+            prefilter = self._re2_patterns[name]
+            if prefilter is None:
+                candidates = valid
+            else:
+                hits = pc.fill_null(pc.match_substring_regex(array, prefilter), False)
+                candidates = pc.and_(valid, pc.or_(hits, pc.invert(ascii_rows)))
+            rows = np.flatnonzero(candidates.to_numpy(zero_copy_only=False))
+            selected = [texts[i] for i in rows]
+            if isinstance(pattern.pattern, bytes):
+                selected = [text.encode('utf-8') for text in selected]
+            values = [[] for _ in range(len(texts))]
+            for i, found in zip(rows, self.pattern_set.findall_column(name, selected, cells=len(texts))):
+                values[i] = found
+            results[name] = pd.Series(values, index=series.index, dtype='object')
+        return results
+
+    def _extract_series_dedup(self, series):
+        keys = _value_keys(series)
+        try:
+            codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+        except TypeError:
+            # Unhashable cells (e.g. lists) cannot be factorized.
+            return self._extract_values(series)
+        # Codes are numbered in order of appearance, so each value's first row is its representative
+        first_rows = np.unique(codes, return_index=True)[1]
+        unique_results = self._extract_uniques(series.iloc[first_rows], list(uniques))
+        results = {}
+        for name in self.names:
+            matches = unique_results[name]
+            # Every cell gets its own list, so changing one row's matches leaves the others alone
+            results[name] = pd.Series([list(matches[code]) for code in codes], index=series.index, dtype='object')
+        return results
+
+    def _extract_uniques(self, values, keys):
+        if self.memo is None:
+            return {name: extracted.tolist() for name, extracted in self._extract_values(values).items()}
+        missing_values = [_is_missing(value) for value in values]
+        found = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            found[i] = None if missing_values[i] else self.memo.get(key)
+            if found[i] is None:
+                missing.append(i)
+        if missing:
+            extracted = self._extract_values(values.iloc[missing])
+            for position, i in enumerate(missing):
+                # Stored as tuples, so no caller can change what the memo holds
+                found[i] = tuple(tuple(extracted[name].iloc[position]) for name in self.names)
+                if not missing_values[i]:
+                    self.memo.put(keys[i], found[i])
+        return {name: [matches[k] for matches in found] for k, name in enumerate(self.names)}
+
+    def __getstate__(self):
+        # Worker processes start with an empty memo of the same size; the
+        # profiler and index are only used by the calling process.
+        state = self.__dict__.copy()
+        state['profiler'] = state['index'] = None
+        if self.memo is not None:
+            state['memo'] = ExtractionMemo(self.memo.maxsize)
+        return state
+
+    def pattern_report(self):
+        """Return the per-pattern prefilter, hit rate, budget and timing report."""
+        return self.pattern_set.report()
+
+    def profile_report(self):
+        """Return the profiler's last column report, or None without a profiler."""
+        if self.profiler is None:
+            return None
+        return self.profiler.last_report
+
+    def process(self, df, columns=None, source=None):
+        """
+        Extract every text column of the DataFrame in the configured output format.
+
+        Parameters:
+        - df (DataFrame): The DataFrame to process.
+        - columns (list, optional): The columns to scan instead of the text
+          columns; see process_dataframe.
+        - source (str, optional): The file the DataFrame was read from; see
+          process_dataframe.
+
+        Returns:
+        - DataFrame: The DataFrame with the extracted columns appended, or the
+          long-form entity table when output is 'long'.
+        """
+        return self.assemble(df, self.process_dataframe(df, columns, source))
+
+    def assemble(self, df, new_columns):
+        """
+        Combine a DataFrame with its extracted columns in the configured output format.
+
+        Parameters:
+        - df (DataFrame): The processed DataFrame.
+        - new_columns (dict): The columns process_dataframe built for it.
+
+        Returns:
+        - DataFrame: See process.
+        """
+        if self.output == 'long':
+            return entities_table(new_columns)
+        return pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+
+    def process_dataframe(self, df, columns=None, source=None):
+        """
+        Build one match column per pattern for every text column of the DataFrame.
+
+        Parameters:
+        - df (DataFrame): The DataFrame to process.
+        - columns (list, optional): The columns to scan instead of the text
+          columns; cells of non-text columns are scanned as their str(). The
+          profiler is only consulted when no columns are given.
+        - source (str, optional): The file the DataFrame was read from; with an
+          index, the matches are indexed under this name.
+
+        Returns:
+        - dict: Mapping of new column name ('<column>_<pattern name>') to Series.
+        """
+        if columns is None:
+            text_columns = [column for column in df.columns if is_text_column(df[column])]
+            if self.profiler is not None:
+                text_columns = self.profiler.select(df, self, text_columns)
+        else:
+            text_columns = list(columns)
+        if self.workers != 1 and len(df) > self.chunk_size and text_columns:
+            new_columns = self._process_parallel(df[text_columns])
+        else:
+            new_columns = self._process_serial(df[text_columns])
+        if self.index is not None and source is not None:
+            self.index.add(source, entities_table(new_columns))
+        return new_columns
+
+    def _process_serial(self, df):
+        new_columns = {}
+        for column in df.columns:
+            for name, values in self.extract_series(df[column]).items():
+                if self.output == 'arrow':
+                    values = to_arrow_lists(values, self.patterns[name])
+                new_columns[f"{column}_{name}"] = values
+        return new_columns
+
+    def _process_parallel(self, df):
+        chunks = (df.iloc[start:start + self.chunk_size] for start in range(0, len(df), self.chunk_size))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # map() yields results in submission order, so rows stay in place.
+            results = list(executor.map(_process_chunk, repeat(self), chunks))
+        for _, stats in results:
+            self.pattern_set.merge_stats(stats)
+        return {column: pd.concat([columns[column] for columns, _ in results]) for column in results[0][0]}
+
+
+def _process_chunk(extractor, chunk):
+    """Extract one row chunk inside a worker process."""
+    extractor.pattern_set.reset_stats()
+    return extractor._process_serial(chunk), extractor.pattern_set.stats
+
+
+def to_arrow_lists(series, pattern=None):
+    """
+    Convert a Series of match lists to an Arrow list column whose values are
+    dictionary-encoded, so repeated matches are stored once.
+
+    Parameters:
+    - series (Series): Series holding a list of matches per cell.
+    - pattern (Pattern, optional): The pattern that produced the matches; bytes
+      patterns give binary values. Patterns with several groups return tuples,
+      which are left as Python lists.
+
+    Returns:
+    - Series: The Arrow-backed Series, or the input if it cannot be converted.
+    """
+    if pattern is not None and pattern.groups > 1:
+        return series
+    value_type = pa.binary() if pattern is not None and isinstance(pattern.pattern, bytes) else pa.string()
+    array = pa.array(series.tolist(), type=pa.list_(value_type))
+    encoded = pa.ListArray.from_arrays(array.offsets, array.values.dictionary_encode())
+    return pd.Series(pd.arrays.ArrowExtensionArray(encoded), index=series.index)
+
+
+def is_arrow_list_column(series):
+    """Return True if the Series is an Arrow-backed list column."""
+    dtype = series.dtype
+    return isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype)
+
+
+def to_python_lists(df):
+    """
+    Return the DataFrame with its Arrow list columns converted back to Python lists.
+
+    Parameters:
+    - df (DataFrame): The DataFrame to convert.
+
+    Returns:
+    - DataFrame: A copy if any column was converted, otherwise the input.
+    """
+    arrow_columns = [column for column in df.columns if is_arrow_list_column(df[column])]
+    if not arrow_columns:
+        return df
+    df = df.copy()
+    for column in arrow_columns:
+        df[column] = pd.Series(df[column].tolist(), index=df.index, dtype='object')
+    return df
+
+
+def entities_table(new_columns):
+    """
+    Build the long-form (row_id, column, entity) table from extracted columns.
+
+    Parameters:
+    - new_columns (dict): Mapping of column name to a Series of match lists.
+
+    Returns:
+    - DataFrame: One row per match, with 'row_id' holding the source row label.
+    """
+    frames = []
+    for column, values in new_columns.items():
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        frames.append(pd.DataFrame({
+            'row_id': np.repeat(values.index.to_numpy(), lengths),
+            'column': column,
+            'entity': list(chain.from_iterable(values)),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=ENTITY_COLUMNS)
+    table = pd.concat(frames, ignore_index=True)
+    table['column'] = table['column'].astype('category')
+    return table
+
+
+def is_entities_table(df):
+    """Return True if the DataFrame is a long-form entity table."""
+    return list(df.columns) == ENTITY_COLUMNS
+
+
+def default_extractor(email_pattern=EMAIL_PATTERN, word_pattern=WORD_PATTERN, url_pattern=URL_PATTERN,
+                      backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE, dedup=False, memo_size=0,
+                      output='lists', profiler=None, index=None):
+    """Build the email/word/url extractor used by the DataProcessor classes."""
+    return MultiPatternExtractor({'emails': email_pattern, 'words': word_pattern, 'urls': url_pattern},
+                                 backend=backend, workers=workers, chunk_size=chunk_size,
+                                 dedup=dedup, memo_size=memo_size, output=output, profiler=profiler,
+                                 index=index)
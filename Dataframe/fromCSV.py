@@ -1,6 +1,16 @@
 import os
 import pandas as pd
 import re
+import sys
+from batch import batch_main
+from columnar import (COLUMNAR_FORMATS, DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, format_write_report,
+                      prompt_parquet_options, write_columnar)
+from csv_reader import DEFAULT_CSV_ENGINE, read_csv
+from dtype_optimizer import format_memory_report, memory_report, optimize_dtypes
+from excel_reader import read_excel_sheets
+from extraction import DEFAULT_CHUNK_SIZE, default_extractor, to_python_lists
+from ingest_cache import IngestCache
+from streaming import STREAMABLE_EXTENSIONS, read_chunks, stream_extract
 
 class FileHandler:
     @staticmethod
@@ -15,44 +25,40 @@ class FileHandler:
         return output_dir
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists'):
         self.email_pattern = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}')
         self.word_pattern = re.compile(r'\b[a-zA-Z]{5,15}\b')
         self.url_pattern = re.compile(r'\b\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*\b')
+        self.extractor = default_extractor(self.email_pattern, self.word_pattern, self.url_pattern,
+                                           backend=backend, workers=workers, chunk_size=chunk_size,
+                                           dedup=dedup, memo_size=memo_size, output=output)
 
     def process_data(self, df):
-        new_columns = {}
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                new_columns[column + '_emails'] = df[column].apply(lambda x: self.email_pattern.findall(str(x)))
-                new_columns[column + '_words'] = df[column].apply(lambda x: self.word_pattern.findall(str(x)))
-                new_columns[column + '_urls'] = df[column].apply(lambda x: self.url_pattern.findall(str(x)))
-        return pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+        return self.extractor.process(df)
 
 class DataFrameHandler:
     @staticmethod
-    def read_file_to_dataframe(file_path, sheet_name=None):
+    def read_file_to_dataframe(file_path, sheet_name=None, workers=1, engine=DEFAULT_CSV_ENGINE):
         if file_path.endswith('.csv'):
-            return pd.read_csv(file_path)
+            return read_csv(file_path, engine)
         elif file_path.endswith(('.xls', '.xlsx')):
-            if sheet_name is None:
-                xls = pd.ExcelFile(file_path)
-                sheet_name = xls.sheet_names
-            if isinstance(sheet_name, list):
-                return pd.concat([pd.read_excel(file_path, sheet_name=sheet) for sheet in sheet_name])
-            else:
-                return pd.read_excel(file_path, sheet_name=sheet_name)
+            # Open the workbook once; multiple sheets get a 'sheet' column
+            return read_excel_sheets(file_path, sheet_name, workers)
         else:
             raise ValueError("Unsupported file format. Please provide a CSV or XLS/XLSX file.")
 
     @staticmethod
-    def save_dataframe(df, filename, format='csv'):
+    def save_dataframe(df, filename, format='csv', partition_column=None,
+                       compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
         if format == 'csv':
-            df.to_csv(filename, index=False)
+            to_python_lists(df).to_csv(filename, index=False)
         elif format == 'pickle':
             df.to_pickle(filename)
+        elif format in COLUMNAR_FORMATS:
+            return write_columnar(df, filename, format, row_group_size, compression, partition_column)
         else:
-            raise ValueError("Unsupported format. Please choose 'csv' or 'pickle'.")
+            raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
 
 def get_directory():
     while True:
@@ -76,20 +82,41 @@ def get_directory():
 
         yield file_dir, files
 
-def process_file(file_dir, files):
+def choose_file(file_dir, files):
     file_choice = int(input("Enter the number corresponding to the file you want to use: "))
-    file_path = os.path.join(file_dir, files[file_choice - 1])
+    return os.path.join(file_dir, files[file_choice - 1])
 
+def ask_chunk_size(file_path):
+    if not file_path.endswith(STREAMABLE_EXTENSIONS):
+        return None
+    chunk_size = input("Enter a chunk size to stream the file (leave blank to load it whole): ").strip()
+    return int(chunk_size) if chunk_size else None
+
+def process_file(file_path, cache=None):
     sheet_name = input("Enter the sheet name(s) you want to read (comma-separated, or leave blank to read all): ")
     sheet_name = None if not sheet_name else [s.strip() for s in sheet_name.split(',')]
 
-    dataframe = DataFrameHandler.read_file_to_dataframe(file_path, sheet_name)
+    if cache is None:
+        return DataFrameHandler.read_file_to_dataframe(file_path, sheet_name)
+
+    # Repeat loads of the same file content are served from the cache
+    return cache.load(file_path, lambda path: DataFrameHandler.read_file_to_dataframe(path, sheet_name),
+                      variant=f"sheet_name={sheet_name}")
 
-    return dataframe
+def stream_file(processor, output_dir, file_path, chunk_size):
+    output_filename = input("Enter the filename for the output file (without extension): ")
+    output_file = os.path.join(output_dir, f"{output_filename}.csv")
+
+    try:
+        rows = stream_extract(processor.extractor, read_chunks(file_path, chunk_size), output_file,
+                              source=file_path)
+        print(f"Streamed {rows} rows to CSV: {output_file}")
+    except ValueError as ve:
+        print(f"Error: {ve}")
 
 def save_dataframe(output_dir, dataframe):
     output_filename = input("Enter the filename for the output file (without extension): ")
-    format_choice = input("Choose output format ('csv' or 'pickle'): ")
+    format_choice = input("Choose output format ('csv', 'pickle', 'feather' or 'parquet'): ")
 
     try:
         if format_choice.lower() == 'csv':
@@ -100,16 +127,44 @@ def save_dataframe(output_dir, dataframe):
             output_file = os.path.join(output_dir, f"{output_filename}.pickle")
             DataFrameHandler.save_dataframe(dataframe, output_file, 'pickle')
             print(f"DataFrame saved as pickle: {output_file}")
+        elif format_choice.lower() in COLUMNAR_FORMATS:
+            format_choice = format_choice.lower()
+            output_file = os.path.join(output_dir, f"{output_filename}{COLUMNAR_FORMATS[format_choice]}")
+            partition_column, compression = (prompt_parquet_options() if format_choice == 'parquet'
+                                               else (None, DEFAULT_COMPRESSION))
+            report = DataFrameHandler.save_dataframe(dataframe, output_file, format_choice, partition_column, compression)
+            print(f"DataFrame saved as {format_choice}: {output_file}")
+            print(format_write_report(report))
         else:
-            print("Unsupported format. Please choose 'csv' or 'pickle'.")
+            print("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
     except ValueError as ve:
         print(f"Error: {ve}")
 
+def process_to_file(file_path, output_file, format):
+    """Read one file, compact its dtypes and save it; the worker function of the batch mode."""
+    dataframe = optimize_dtypes(DataFrameHandler.read_file_to_dataframe(file_path), for_storage=True)
+    DataFrameHandler.save_dataframe(dataframe, output_file, format)
+    return len(dataframe)
+
 if __name__ == "__main__":
+    # python fromCSV.py <directory or glob> [--format parquet] [--workers N]
+    if len(sys.argv) > 1:
+        sys.exit(batch_main(sys.argv[1:], process_to_file, ('.csv', '.xls', '.xlsx'),
+                            "Read every CSV/Excel file (all sheets) and save it with compact dtypes."))
+
     processor = DataProcessor()
+    cache = IngestCache()
 
     dir_gen = get_directory()
     for file_dir, files in dir_gen:
         output_dir = FileHandler.create_output_directory(file_dir)
-        dataframe = process_file(file_dir, files)
+        file_path = choose_file(file_dir, files)
+        chunk_size = ask_chunk_size(file_path)
+        if chunk_size:
+            stream_file(processor, output_dir, file_path, chunk_size)
+            continue
+        dataframe = process_file(file_path, cache)
+        optimized = optimize_dtypes(dataframe, for_storage=True)
+        print(format_memory_report(memory_report(dataframe, optimized)))
+        dataframe = optimized
         save_dataframe(output_dir, dataframe)
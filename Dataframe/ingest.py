@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+SOURCE_COLUMN = 'source_file'
+
+
+def common_dtype(dtypes, has_missing=False):
+    """
+    Return the narrowest dtype that holds the values of every given dtype.
+
+    Parameters:
+    - dtypes (list): The dtypes of one column across several frames.
+    - has_missing (bool): Whether some frames lack the column, so it must also
+      hold missing values.
+
+    Returns:
+    - dtype: The common dtype; object when the kinds cannot be combined.
+    """
+    unique = list(dict.fromkeys(dtypes))
+    if len(unique) == 1 and not has_missing:
+        return unique[0]
+    if all(pd.api.types.is_bool_dtype(dtype) for dtype in unique):
+        return pd.BooleanDtype() if has_missing else unique[0]
+    if all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in unique):
+        dtype = np.result_type(*[getattr(dtype, 'numpy_dtype', dtype) for dtype in unique])
+        if has_missing and dtype.kind in 'iu':
+            # Keep integers integral instead of falling back to float64
+            return pd.api.types.pandas_dtype(dtype.name.capitalize())
+        return dtype
+    if all(isinstance(dtype, np.dtype) and dtype.kind == 'M' for dtype in unique):
+        return np.result_type(*unique)
+    if all(isinstance(dtype, pd.StringDtype) for dtype in unique):
+        return unique[0]
+    if len(unique) == 1:
+        return unique[0]
+    return np.dtype(object)
+
+
+def unify_schemas(frames):
+    """
+    Work out the combined schema of several frames.
+
+    Parameters:
+    - frames (list): The DataFrames to combine.
+
+    Returns:
+    - dict: Ordered mapping of every column (in first-seen order) to its
+      common dtype.
+    """
+    dtypes = {}
+    for frame in frames:
+        for column, dtype in frame.dtypes.items():
+            dtypes.setdefault(column, []).append(dtype)
+    return {column: common_dtype(column_dtypes, has_missing=len(column_dtypes) < len(frames))
+            for column, column_dtypes in dtypes.items()}
+
+
+def combine_frames(frames, names):
+    """
+    Concatenate frames with differing schemas under a single reconciled schema.
+
+    Every frame is aligned to the union of the columns and cast to the common
+    dtype of each column before one concatenation, with a fresh index and a
+    leading 'source_file' column naming the frame each row came from.
+
+    Parameters:
+    - frames (list): The DataFrames to combine.
+    - names (list): The source name of every frame.
+
+    Returns:
+    - DataFrame: The combined frame.
+    """
+    if not frames:
+        return pd.DataFrame(columns=[SOURCE_COLUMN])
+    schema = unify_schemas(frames)
+    if SOURCE_COLUMN in schema:
+        raise ValueError(f"The files already have a '{SOURCE_COLUMN}' column.")
+    aligned = []
+    for frame in frames:
+        frame = frame.reindex(columns=list(schema))
+        aligned.append(frame.astype(schema))
+    combined = pd.concat(aligned, ignore_index=True)
+    categories = pd.Index(names).unique()
+    codes = np.repeat(categories.get_indexer(names), [len(frame) for frame in frames])
+    combined.insert(0, SOURCE_COLUMN, pd.Categorical.from_codes(codes, categories=categories))
+    return combined
+
+
+def read_concurrently(sources, reader, workers=None):
+    """
+    Read several sources in a thread pool, keeping their order.
+
+    Parameters:
+    - sources (list): Paths or file objects (e.g. Streamlit uploads).
+    - reader (callable): Called with one source; returns its DataFrame.
+    - workers (int, optional): Number of threads; defaults to one per source,
+      up to the executor's default.
+
+    Returns:
+    - list: The DataFrames, in the order of the sources.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(reader, sources))
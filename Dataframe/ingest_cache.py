@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'dataframe_ingest')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_BLOCK = 1024 * 1024
+STAT_INDEX = 'stat_index.json'
+ENTRY_EXTENSIONS = ('.arrow', '.pkl')
+
+
+def hash_file(source):
+    """
+    Return the blake2b hex digest of a file's bytes.
+
+    Parameters:
+    - source (str or file): Path, or binary file object which is rewound
+      before and after hashing.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as handle:
+            for block in iter(lambda: handle.read(HASH_BLOCK), b''):
+                digest.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK), b''):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+def _to_table(df):
+    """
+    Convert a DataFrame to an Arrow table, keeping Arrow list columns.
+
+    pandas cannot parse back the dtype names it records for Arrow list
+    columns, so they are stored as list<string> (dictionary values decoded),
+    recorded as plain objects in the pandas metadata and listed separately
+    for _from_table to restore.
+    """
+    arrow_lists = []
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype):
+            value_type = dtype.pyarrow_dtype.value_type
+            if pa.types.is_dictionary(value_type):
+                df = df.assign(**{column: df[column].astype(pd.ArrowDtype(pa.list_(value_type.value_type)))})
+            arrow_lists.append(str(column))
+    table = pa.Table.from_pandas(df)
+    if arrow_lists:
+        metadata = json.loads(table.schema.metadata[b'pandas'])
+        for column in metadata['columns']:
+            if column['name'] in arrow_lists:
+                column['numpy_type'] = 'object'
+        table = table.replace_schema_metadata({b'pandas': json.dumps(metadata),
+                                               b'arrow_lists': json.dumps(arrow_lists)})
+    return table
+
+
+def _from_table(table):
+    """Convert an Arrow table written by _to_table (or a selection of its columns) back to a DataFrame."""
+    df = table.to_pandas()
+    metadata = table.schema.metadata or {}
+    for column in json.loads(metadata.get(b'arrow_lists', b'[]')):
+        if column not in table.column_names:
+            continue
+        df[column] = pd.Series(pd.arrays.ArrowExtensionArray(table.column(column)), index=df.index)
+    return df
+
+
+class IngestCache:
+    """
+    Content-addressed cache of parsed (or parsed and extracted) DataFrames.
+
+    Entries are keyed by a hash of the source file's bytes plus a variant
+    string naming how it was read (sheet, extractor settings, ...), so a
+    renamed or copied file still hits and an edited file misses. DataFrames
+    are stored uncompressed as Arrow IPC (Feather) files, so a hit needs no
+    parsing or decompression: the file is memory-mapped and converted back
+    with to_pandas, which copies numeric columns into ordinary, writable
+    arrays (text columns keep wrapping the mapped Arrow buffers). Frames
+    Arrow cannot hold are pickled instead. The
+    hash of a file on disk is remembered by path, size and modification time,
+    so unchanged files are not hashed twice.
+
+    The cache is bounded in bytes; when a new entry pushes it over the bound,
+    the least recently used entries are evicted.
+
+    Parameters:
+    - cache_dir (str, optional): Directory the entries are kept in.
+    - max_bytes (int): Largest total size of the entries.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        if max_bytes < 1:
+            raise ValueError("The cache size must be at least 1 byte.")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._stat_index_path = os.path.join(cache_dir, STAT_INDEX)
+        self._stat_index = {}
+        if os.path.exists(self._stat_index_path):
+            with open(self._stat_index_path, encoding='utf-8') as handle:
+                self._stat_index = json.load(handle)
+
+    def content_hash(self, source):
+        """
+        Hash the bytes of a file path or an open binary file object.
+
+        Parameters:
+        - source (str or file): Path, or file-like object (e.g. a Streamlit
+          upload) which is rewound afterwards.
+
+        Returns:
+        - str: The hex digest.
+        """
+        if not isinstance(source, (str, os.PathLike)):
+            return hash_file(source)
+
+        path = os.path.abspath(source)
+        stat = os.stat(path)
+        known = self._stat_index.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hash_file(path)
+        self._stat_index[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self._save_stat_index()
+        return digest
+
+    def _temp_path(self, path):
+        """Return a new, unique temporary file next to path, for a write renamed into place."""
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=os.path.basename(path) + '.', suffix='.tmp')
+        os.close(handle)
+        return temp_path
+
+    def _save_stat_index(self):
+        # Unique temporary names, so concurrent sessions and processes never write to the same file
+        temp_path = self._temp_path(self._stat_index_path)
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(self._stat_index, handle)
+        os.replace(temp_path, self._stat_index_path)
+
+    def key(self, source, variant=''):
+        """Return the cache key of a source read in a given way."""
+        variant_hash = hashlib.blake2b(str(variant).encode('utf-8'), digest_size=8).hexdigest()
+        return f"{self.content_hash(source)}-{variant_hash}"
+
+    def _entry_path(self, key):
+        for extension in ENTRY_EXTENSIONS:
+            path = os.path.join(self.cache_dir, key + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, key):
+        """
+        Load a cached DataFrame.
+
+        Parameters:
+        - key (str): The key returned by key().
+
+        Returns:
+        - DataFrame: The cached frame, or None on a miss.
+        """
+        path = self._entry_path(key)
+        if path is None:
+            return None
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        if path.endswith('.pkl'):
+            return pd.read_pickle(path)
+        return _from_table(pa.ipc.open_file(pa.memory_map(path)).read_all())
+
+    def put(self, key, df):
+        """
+        Store a DataFrame under a key, then evict down to the size bound.
+
+        Parameters:
+        - key (str): The key returned by key().
+        - df (DataFrame): The frame to store.
+        """
+        table = None
+        if pa is not None:
+            try:
+                table = _to_table(df)
+            except (pa.ArrowException, TypeError, ValueError):
+                table = None
+        extension = '.arrow' if table is not None else '.pkl'
+        path = os.path.join(self.cache_dir, key + extension)
+        temp_path = self._temp_path(path)
+        try:
+            if table is not None:
+                with pa.OSFile(temp_path, 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            else:
+                df.to_pickle(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.evict()
+
+    def load(self, source, reader, variant=''):
+        """
+        Return the cached DataFrame of a source, reading and caching it on a miss.
+
+        Parameters:
+        - source (str or file): Path or binary file object of the source.
+        - reader (callable): Called with the source on a miss; returns the
+          DataFrame to cache.
+        - variant (str): Distinguishes different ways of reading the same
+          bytes, e.g. the sheet name or the extractor settings.
+
+        Returns:
+        - DataFrame: The cached or freshly read frame.
+        """
+        key = self.key(source, variant)
+        df = self.get(key)
+        if df is None:
+            df = reader(source)
+            self.put(key, df)
+        return df
+
+    def entries(self):
+        """Return one row per cache entry with its size and last use, oldest first."""
+        rows = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ENTRY_EXTENSIONS):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                rows.append({'entry': name, 'bytes': stat.st_size,
+                             'last_used': pd.Timestamp(stat.st_mtime, unit='s')})
+        return pd.DataFrame(rows, columns=['entry', 'bytes', 'last_used']).sort_values('last_used',
+                                                                                      ignore_index=True)
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits its bound."""
+        entries = self.entries()
+        total = entries['bytes'].sum()
+        for name, size in zip(entries['entry'], entries['bytes']):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                # Already evicted by a concurrent load
+                pass
+            total -= size
+
+    def invalidate(self, source=None):
+        """
+        Drop cached entries.
+
+        Parameters:
+        - source (str or file, optional): Drop every variant of this source;
+          by default the whole cache is cleared.
+
+        Returns:
+        - int: The number of entries removed.
+        """
+        prefix = None if source is None else self.content_hash(source) + '-'
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ENTRY_EXTENSIONS) and (prefix is None or name.startswith(prefix)):
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    # python ingest_cache.py [list | invalidate [file ...]]
+    cache = IngestCache(os.environ.get('DATAFRAME_CACHE_DIR', DEFAULT_CACHE_DIR))
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'list':
+        entries = cache.entries()
+        print(entries.to_string(index=False))
+        print(f"{len(entries)} entries, {entries['bytes'].sum() / 2 ** 20:.1f} MB in {cache.cache_dir}")
+    elif command == 'invalidate':
+        sources = sys.argv[2:] or [None]
+        removed = sum(cache.invalidate(source) for source in sources)
+        print(f"Removed {removed} cache entries.")
+    else:
+        print("Unsupported command. Please choose 'list' or 'invalidate'.")
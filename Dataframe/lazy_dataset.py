@@ -0,0 +1,161 @@
+import re
+import pandas as pd
+from csv_reader import read_csv
+from dtype_optimizer import memory_report, optimize_dtypes, with_total
+from ingest import SOURCE_COLUMN, combine_frames, read_concurrently
+
+# Names an expression may refer to a column by: `quoted`, 'string', "string" or bare identifiers
+_NAME_PATTERN = re.compile(r"`([^`]+)`|'([^']*)'|\"([^\"]*)\"|([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def read_csv_header(source):
+    """Return the column names of a CSV path or file object, reading only its header."""
+    columns = pd.read_csv(source, nrows=0).columns.tolist()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return columns
+
+
+def read_csv_columns(source, columns):
+    """Parse only the given columns of a CSV path or file object, multi-threaded for large files."""
+    # A file object is left at its end by the previous parse, so every parse starts from the top
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return read_csv(source, usecols=columns)[columns]
+
+
+def columns_in_expression(expression, columns):
+    """
+    Return the columns an expression (a query condition or a formula) refers to.
+
+    Parameters:
+    - expression (str): The expression.
+    - columns (list): The columns it may refer to.
+
+    Returns:
+    - list: The referenced columns in dataset order; empty when none are named.
+    """
+    names = {next(group for group in match.groups() if group is not None)
+             for match in _NAME_PATTERN.finditer(expression or '')}
+    return [column for column in columns if str(column) in names]
+
+
+class LazyDataset:
+    """
+    Handle on one or more uploaded tables that loads columns only when a view needs them.
+
+    Only the headers are read up front. Views ask for the columns they touch
+    through load(); columns not loaded yet are parsed from every source
+    (concurrently, and only those columns), combined under one schema with a
+    'source_file' column and given compact dtypes. Loaded columns are kept, so
+    later views only fetch what is still missing. The columns each view asked
+    for are recorded in touched.
+
+    Parameters:
+    - sources (list): Paths or file objects.
+    - names (list): The source name of every table.
+    - read_header (callable): Called with a source; returns its column names.
+    - read_columns (callable): Called with a source and a list of its
+      columns; returns a DataFrame of just those columns.
+    - optimize (bool): Shrink fetched columns with optimize_dtypes.
+    """
+
+    def __init__(self, sources, names, read_header=read_csv_header, read_columns=read_csv_columns, optimize=True):
+        self.sources = list(sources)
+        self.names = list(names)
+        self._read_columns = read_columns
+        self.optimize = optimize
+        self.headers = [list(read_header(source)) for source in self.sources]
+        if any(SOURCE_COLUMN in header for header in self.headers):
+            raise ValueError(f"The files already have a '{SOURCE_COLUMN}' column.")
+        self.columns = [SOURCE_COLUMN] + list(dict.fromkeys(column for header in self.headers for column in header))
+        self.touched = {}
+        self._loaded = None
+        self._reports = []
+
+    @property
+    def loaded_columns(self):
+        """The columns fetched so far."""
+        return [] if self._loaded is None else self._loaded.columns.tolist()
+
+    @property
+    def num_rows(self):
+        """The number of rows, fetching the narrowest data needed to count them."""
+        return len(self.load([]))
+
+    def load(self, columns=None, view=None):
+        """
+        Return the given columns, fetching any that are not loaded yet.
+
+        Parameters:
+        - columns (list, optional): The columns the view needs; all by default.
+        - view (str, optional): Name under which to record the columns in touched.
+
+        Returns:
+        - DataFrame: The requested columns, in the order asked for.
+        """
+        columns = self.columns if columns is None else list(dict.fromkeys(columns))
+        unknown = [column for column in columns if column not in self.columns]
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(map(str, unknown))}")
+        if view is not None:
+            self.touched[view] = columns
+        missing = [column for column in columns if column not in self.loaded_columns and column != SOURCE_COLUMN]
+        if self._loaded is None or missing:
+            self._fetch(missing)
+        return self._loaded[columns]
+
+    def _fetch(self, columns):
+        # Every source contributes at least one column, so its rows are counted
+        requests = [[column for column in columns if column in header] or header[:1] for header in self.headers]
+        frames = read_concurrently(list(zip(self.sources, requests)),
+                                   lambda request: self._read_columns(*request))
+        fetched = combine_frames(frames, self.names)
+        fetched = fetched[[SOURCE_COLUMN] + columns] if self._loaded is None else fetched[columns]
+        if self.optimize:
+            optimized = optimize_dtypes(fetched)
+            self._reports.append(memory_report(fetched, optimized).iloc[:-1])
+            fetched = optimized
+        self._loaded = fetched if self._loaded is None else pd.concat([self._loaded, fetched], axis=1)
+
+    def memory_report(self):
+        """Return the memory report of every column fetched so far, with a 'TOTAL' row."""
+        if not self._reports:
+            return None
+        return with_total(pd.concat(self._reports, ignore_index=True))
+
+
+class FrameDataset:
+    """
+    The LazyDataset interface over a DataFrame that is already in memory.
+
+    Parameters:
+    - df (DataFrame): The DataFrame.
+    """
+
+    def __init__(self, df):
+        self._df = df
+        self.columns = df.columns.tolist()
+        self.loaded_columns = self.columns
+        self.touched = {}
+
+    @property
+    def num_rows(self):
+        """The number of rows."""
+        return len(self._df)
+
+    def load(self, columns=None, view=None):
+        """Return the given columns (all by default), recording them under view."""
+        columns = self.columns if columns is None else list(dict.fromkeys(columns))
+        if view is not None:
+            self.touched[view] = columns
+        return self._df[columns]
+
+    def memory_report(self):
+        """Frames in memory are not optimized here, so there is nothing to report."""
+        return None
+
+
+def as_dataset(data):
+    """Return a dataset handle for a LazyDataset or a DataFrame."""
+    return FrameDataset(data) if isinstance(data, pd.DataFrame) else data
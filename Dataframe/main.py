@@ -23,8 +23,24 @@ import visualization
 import widget
 from optimizedCSV import FileHandler, DataFrameHandler
 import sortDF
+import time
+from extraction import default_extractor, is_entities_table
+from token_index import MANIFEST, TokenIndex
+from ingest_cache import IngestCache
+from dtype_optimizer import format_memory_report
+from lazy_dataset import LazyDataset, as_dataset, read_csv_columns
+from columnar import read_columnar
+from docx_corpus import CORPUS_FORMATS, document_paragraphs
+import os
 
-def display_data_visualization_options(combined_dataframe, visualizer):
+PREVIEW_COLUMNS = 20
+# Server-side files (token indexes) are only offered from this directory,
+# never typed in, so a hosted app does not expose the rest of the server
+DATA_DIR = os.environ.get('DATAFRAME_DATA_DIR')
+
+def display_data_visualization_options(dataset, visualizer):
+    # Every chart loads only the columns it plots (a DataFrame also works)
+    dataset = as_dataset(dataset)
     selected_viz_option = st.sidebar.radio(
         "Select Visualization",
         ["Plot Histogram", "Plot Boxplot", "Plot Correlation Heatmap", "Plot Scatterplot", "Pivot Table"]
@@ -32,37 +48,149 @@ def display_data_visualization_options(combined_dataframe, visualizer):
 
     if selected_viz_option == "Plot Histogram":
         st.subheader("Histogram")
-        column = st.sidebar.selectbox("Select column for histogram", combined_dataframe.columns.tolist())
-        visualizer.plot_histogram(combined_dataframe, column)
+        column = st.sidebar.selectbox("Select column for histogram", dataset.columns)
+        visualizer.plot_histogram(dataset.load([column], view=selected_viz_option).copy(), column)
     elif selected_viz_option == "Plot Boxplot":
         st.subheader("Boxplot")
-        x_column = st.sidebar.selectbox("Select x-axis column", combined_dataframe.columns.tolist())
-        y_column = st.sidebar.selectbox("Select y-axis column", combined_dataframe.columns.tolist())
-        visualizer.plot_boxplot(combined_dataframe, x_column, y_column)
+        x_column = st.sidebar.selectbox("Select x-axis column", dataset.columns)
+        y_column = st.sidebar.selectbox("Select y-axis column", dataset.columns)
+        visualizer.plot_boxplot(dataset.load([x_column, y_column], view=selected_viz_option), x_column, y_column)
     elif selected_viz_option == "Plot Correlation Heatmap":
         st.subheader("Correlation Heatmap")
-        visualizer.plot_correlation_heatmap(combined_dataframe)
+        visualizer.plot_correlation_heatmap(dataset.load(view=selected_viz_option).copy())
     elif selected_viz_option == "Plot Scatterplot":
         st.subheader("Scatterplot")
-        x_column = st.sidebar.selectbox("Select x-axis column", combined_dataframe.columns.tolist())
-        y_column = st.sidebar.selectbox("Select y-axis column", combined_dataframe.columns.tolist())
-        visualizer.plot_scatterplot(combined_dataframe, x_column, y_column)
+        x_column = st.sidebar.selectbox("Select x-axis column", dataset.columns)
+        y_column = st.sidebar.selectbox("Select y-axis column", dataset.columns)
+        visualizer.plot_scatterplot(dataset.load([x_column, y_column], view=selected_viz_option), x_column, y_column)
     elif selected_viz_option == "Pivot Table":
         st.subheader("Pivot Table Settings:")
-        index_columns = st.selectbox("Select index column", combined_dataframe.columns.tolist())
-        columns = st.selectbox("Select columns (optional)", ["None"] + combined_dataframe.columns.tolist())
-        values = st.multiselect("Select values column(s)", combined_dataframe.columns.tolist())
+        index_columns = st.selectbox("Select index column", dataset.columns)
+        columns = st.selectbox("Select columns (optional)", ["None"] + dataset.columns)
+        values = st.multiselect("Select values column(s)", dataset.columns)
         agg_func = st.selectbox("Select aggregation function", ["sum", "mean", "count", "min", "max"])
         fill_value = st.text_input("Fill missing values with", "")
 
+        columns = None if columns == "None" else columns
+        pivot_columns = [index_columns] + ([columns] if columns is not None else []) + values
+        pivot_df = dataset.load(pivot_columns, view=selected_viz_option)
+
          # Create pivot table
-        pivot_table = pd.pivot_table(combined_dataframe, index=index_columns, columns=columns, values=values, aggfunc=agg_func, fill_value=fill_value)
+        pivot_table = pd.pivot_table(pivot_df, index=index_columns, columns=columns, values=values, aggfunc=agg_func, fill_value=fill_value)
 
         # Display pivot table
         st.write("Pivot Table:")
         st.write(pivot_table)
     
 
+@st.cache_resource
+def get_ingest_cache():
+    # One content-addressed cache shared by every session of the server
+    return IngestCache()
+
+@st.cache_resource
+def load_token_index(index_dir):
+    # Kept across reruns; the index reloads itself when the processors update it
+    return TokenIndex(index_dir)
+
+def find_token_indexes(data_dir):
+    """List the token index directories under the data directory, relative to it."""
+    return sorted(os.path.relpath(root, data_dir) for root, _, files in os.walk(data_dir) if MANIFEST in files)
+
+def find_corpus_files(data_dir):
+    """List the Parquet and Feather files under the data directory, relative to it."""
+    extensions = tuple(CORPUS_FORMATS.values())
+    return sorted(os.path.relpath(os.path.join(root, name), data_dir)
+                  for root, _, files in os.walk(data_dir) for name in files if name.endswith(extensions))
+
+def display_token_search():
+    st.subheader("Search Extracted Tokens")
+    if not DATA_DIR:
+        st.caption("Set DATAFRAME_DATA_DIR to the directory holding the processed files to search their token indexes.")
+        return
+    index_dirs = find_token_indexes(DATA_DIR)
+    if not index_dirs:
+        st.caption(f"No token index (an 'index' folder next to 'output') found under {DATA_DIR}.")
+        return
+    index_dir = st.selectbox("Token index", index_dirs)
+
+    token_index = load_token_index(os.path.join(DATA_DIR, index_dir))
+    query = st.text_input("Email, word or URL to look up")
+    if query:
+        started = time.perf_counter()
+        matches = token_index.query(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        st.write(f"{len(matches)} row(s) in {matches['file'].nunique()} file(s), found in {elapsed_ms:.1f} ms")
+        st.write(matches)
+    else:
+        st.write("Indexed files:")
+        st.write(token_index.file_summary())
+
+def get_upload_dataset(csv_files):
+    """Return this session's lazy handle on the uploaded CSV files, replacing it when the uploads change."""
+    key = tuple((file.name, file.size, getattr(file, 'file_id', None)) for file in csv_files)
+    if st.session_state.get('upload_key') != key:
+        ingest_cache = get_ingest_cache()
+
+        # Column selections read before (in any session) come from the cache
+        def read_columns(file, columns):
+            return ingest_cache.load(file, lambda upload: read_csv_columns(upload, columns),
+                                     variant=f"usecols={columns}")
+
+        st.session_state['upload_dataset'] = LazyDataset(csv_files, [file.name for file in csv_files],
+                                                         read_columns=read_columns)
+        st.session_state['upload_key'] = key
+    return st.session_state['upload_dataset']
+
+@st.cache_resource
+def load_corpus(corpus_file, modified):
+    # Read once per build of the file (modified is part of the key) and shared by every session
+    return read_columnar(corpus_file)
+
+def get_doc_corpus(doc_files):
+    """Return this session's paragraph table of the uploaded Word files, rebuilding it when the uploads change."""
+    key = tuple((file.name, file.size, getattr(file, 'file_id', None)) for file in doc_files)
+    if st.session_state.get('doc_corpus_key') != key:
+        extractor = default_extractor()
+        st.session_state['doc_corpus'] = pd.concat(
+            [document_paragraphs(file, file.name, extractor) for file in doc_files], ignore_index=True)
+        st.session_state['doc_corpus_key'] = key
+    return st.session_state['doc_corpus']
+
+def display_corpus(corpus, analyzer, visualizer):
+    # One set of widgets for the whole corpus, however many documents it holds
+    st.subheader("Paragraph Corpus")
+    st.caption(f"{len(corpus)} paragraphs from {corpus['doc_id'].nunique()} document(s)")
+    st.write(corpus)
+    st.markdown("---")
+
+    st.sidebar.subheader("Data Analysis")
+    display_data_analysis_options(corpus, analyzer)
+    st.markdown("---")
+
+    st.sidebar.subheader("Data Visualization")
+    display_data_visualization_options(corpus, visualizer)
+    st.markdown("---")
+
+    st.sidebar.subheader("Community Detection")
+    if st.sidebar.button("Detect Communities"):
+        G = nx.Graph()
+        communities = analyzer.analyze_dataframe(corpus, G)
+        st.write("Communities detected:")
+        st.write(communities)
+    st.markdown("---")
+
+def display_dataset_memory(dataset):
+    st.sidebar.subheader("Memory")
+    st.sidebar.write(f"{len(dataset.loaded_columns)} of {len(dataset.columns)} columns loaded")
+    report = dataset.memory_report()
+    if report is not None:
+        st.sidebar.write(format_memory_report(report))
+        with st.sidebar.expander("Memory by column"):
+            st.dataframe(report, hide_index=True)
+    with st.sidebar.expander("Columns used by each view"):
+        st.write(dataset.touched)
+
 def run_app():
     st.title("Data Analysis and Visualization")
 
@@ -72,67 +200,90 @@ def run_app():
     # Upload CSV files
     csv_files = st.file_uploader("Upload CSV File(s)", type=["csv"], accept_multiple_files=True)
 
-    # Combine CSV dataframes
-    combined_df = pd.concat([pd.read_csv(file) for file in csv_files]) if csv_files else None
+    # Only the headers are read here; each view below loads the columns it
+    # touches from every file (concurrently, with compact dtypes) and the
+    # loaded columns are kept for the rest of the session
+    dataset = get_upload_dataset(csv_files) if csv_files else None
 
-    if combined_df is not None:
+    if dataset is not None:
         st.subheader("Combined DataFrame")
-        st.write(combined_df)
+        if len(dataset.columns) > PREVIEW_COLUMNS:
+            st.caption(f"Showing the first {PREVIEW_COLUMNS} of {len(dataset.columns)} columns")
+        st.write(dataset.load(dataset.columns[:PREVIEW_COLUMNS], view="Preview"))
         st.markdown("---")
 
         st.sidebar.subheader("Data Analysis")
-        display_data_analysis_options(combined_df, analyzer)
+        display_data_analysis_options(dataset, analyzer)
         st.markdown("---")
 
         st.sidebar.subheader("Data Visualization")
-        display_data_visualization_options(combined_df, visualizer)
+        display_data_visualization_options(dataset, visualizer)
         st.markdown("---")
 
         st.sidebar.subheader("Community Detection")
         if st.sidebar.button("Detect Communities"):
             G = nx.Graph()
-            communities = analyzer.analyze_dataframe(combined_df, G)
+            communities = analyzer.analyze_dataframe(dataset.load(view="Community Detection"), G)
             st.write("Communities detected:")
             st.write(communities)
         st.markdown("---")
 
-    # Upload DOC files
+        # Reported last, once every view has loaded what it needs
+        display_dataset_memory(dataset)
+
+    # Upload Feather/Parquet files produced by the processors. Pickle files are
+    # not accepted: unpickling an upload can run arbitrary code on the server.
+    output_files = st.file_uploader("Upload Feather or Parquet File(s)",
+                                    type=["feather", "parquet"], accept_multiple_files=True)
+
+    if output_files:
+        for output_file in output_files:
+            # Columnar outputs: read only the columns picked for the view
+            info = analyzer.read_columnar_info(output_file)
+            if info is None:
+                continue
+            st.caption(f"{output_file.name}: {info['rows']} rows, {len(info['columns'])} columns")
+            columns = st.multiselect(f"Columns to load from {output_file.name}", info['columns'],
+                                     default=info['columns'][:10])
+            output_df = analyzer.read_columnar_to_dataframe(output_file, columns)
+            if output_df is None:
+                continue
+            st.subheader(f"Output File: {output_file.name}")
+            if is_entities_table(output_df):
+                # Long-form (row_id, column, entity) output: summarize the entities
+                entity_counts = (output_df.groupby(['column', 'entity'], observed=True).size()
+                                 .rename('count').reset_index().sort_values('count', ascending=False))
+                st.write("Entity Counts:")
+                st.write(entity_counts)
+            st.write(output_df)
+            st.markdown("---")
+
+    # Word files: uploads are parsed into one paragraph-level corpus, or a
+    # corpus built with docx_corpus.py is picked from the data directory
     doc_files = st.file_uploader("Upload DOC File(s)", type=["doc", "docx"], accept_multiple_files=True)
+    corpus_file = None
+    if DATA_DIR:
+        corpus_file = st.selectbox("Or a corpus file built with docx_corpus.py",
+                                   [None] + find_corpus_files(DATA_DIR),
+                                   format_func=lambda name: "(none)" if name is None else name)
+
+    corpus = None
+    if corpus_file:
+        try:
+            corpus_path = os.path.join(DATA_DIR, corpus_file)
+            corpus = load_corpus(corpus_path, os.path.getmtime(corpus_path))
+        except Exception as e:
+            st.error(f"Error loading corpus file: {e}")
+    elif doc_files:
+        try:
+            corpus = get_doc_corpus(doc_files)
+        except Exception as e:
+            st.error(f"Error processing DOC file: {e}")
+    if corpus is not None:
+        display_corpus(corpus, analyzer, visualizer)
 
-    if doc_files:
-        for doc_file in doc_files:
-            try:
-                paragraphs = FileReader.read_docx(doc_file) if doc_file.name.endswith('.docx') else FileReader.read_doc(doc_file)
-                df = pd.DataFrame(paragraphs, columns=['Content'])
-
-                processor = DataProcessor()
-                processed_df = processor.process_data(df)
-
-                if processed_df is not None:
-                    st.subheader("Processed DataFrame")
-                    st.write(processed_df)
-                    st.markdown("---")
-
-                    st.sidebar.subheader("Data Analysis")
-                    display_data_analysis_options(processed_df, analyzer)
-                    st.markdown("---")
-
-                    st.sidebar.subheader("Data Visualization")
-                    display_data_visualization_options(processed_df, visualizer)
-                    st.markdown("---")
-
-                    st.sidebar.subheader("Community Detection")
-                    if st.sidebar.button("Detect Communities"):
-                        G = nx.Graph()
-                        communities = analyzer.analyze_dataframe(processed_df, G)
-                        st.write("Communities detected:")
-                        st.write(communities)
-                    st.markdown("---")
-
-                
-                
-            except Exception as e:
-                st.error(f"Error processing DOC file: {e}")
+    st.markdown("---")
+    display_token_search()
 
 if __name__ == "__main__":
     run_app()
\ No newline at end of file
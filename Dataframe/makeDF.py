@@ -1,74 +1,81 @@
 import os
 import pandas as pd
-import re
+import sys
+from columnar import (COLUMNAR_FORMATS, DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, format_write_report,
+                      prompt_parquet_options, write_columnar)
+from csv_reader import DEFAULT_CSV_ENGINE, read_csv
+from dtype_optimizer import memory_report, optimize_dtypes
+from excel_reader import read_excel_sheets
+from extraction import DEFAULT_CHUNK_SIZE, MultiPatternExtractor, to_python_lists
+from pattern_pack import SAFE_PATTERNS
+from profiler import prompt_profiler
+from raw_scan import scan_main
+from token_index import TokenIndex
 
 # Set the chained_assignment option to 'warn'
 pd.options.mode.chained_assignment = 'warn'
 
 class DataProcessor:
-    def __init__(self, patterns):
+    def __init__(self, patterns, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists', max_cell_length=None, cell_timeout=None,
+                 profiler=None, index=None, optimize=False, csv_engine=DEFAULT_CSV_ENGINE):
         self.patterns = patterns
+        self.optimize = optimize
+        self.csv_engine = csv_engine
+        self.memory_report = None
+        self.extractor = MultiPatternExtractor(patterns, backend=backend, workers=workers, chunk_size=chunk_size,
+                                               dedup=dedup, memo_size=memo_size, output=output,
+                                               max_cell_length=max_cell_length, cell_timeout=cell_timeout,
+                                               profiler=profiler, index=index)
 
     def read_file_to_dataframe(self, file_path, sheet_name=None):
         # Determine file format and read accordingly
         if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
+            df = read_csv(file_path, self.csv_engine)
         elif file_path.endswith(('.xls', '.xlsx')):
-            # If sheet_name is None, read all sheets
-            if sheet_name is None:
-                xls = pd.ExcelFile(file_path)
-                sheet_name = xls.sheet_names
-            # If sheet_name is a list, read each sheet separately and concatenate the results
-            if isinstance(sheet_name, list):
-                df = pd.concat([pd.read_excel(file_path, sheet_name=sheet) for sheet in sheet_name])
-            else:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+            # Open the workbook once and parse the sheets with the extractor's
+            # workers; all or several sheets get a 'sheet' provenance column
+            df = read_excel_sheets(file_path, sheet_name, self.extractor.workers)
         else:
             raise ValueError("Unsupported file format. Please provide a CSV or XLS/XLSX file.")
 
+        # Shrink the loaded columns to compact dtypes, keeping the sizes
+        if self.optimize:
+            optimized = optimize_dtypes(df, for_storage=True)
+            self.memory_report = memory_report(df, optimized)
+            df = optimized
+
         # Process data using regular expressions
-        df = self.process_data(df)
+        df = self.process_data(df, source=file_path)
 
         return df
 
 
-    def process_data(self, df):
-        # Apply regular expression patterns to relevant columns
-        new_columns = {}
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                for pattern_name, pattern in self.patterns.items():
-                    new_columns[column + '_' + pattern_name] = df[column].apply(lambda x: pattern.findall(str(x)))
-        return pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+    def process_data(self, df, source=None):
+        # Apply regular expression patterns to relevant columns, indexing the
+        # extracted tokens under the source file when an index is set
+        return self.extractor.process(df, source=source)
 
-    def save_dataframe(self, df, filename, format='csv'):
+    def save_dataframe(self, df, filename, format='csv', partition_column=None,
+                       compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
         # Save DataFrame based on format
         if format == 'csv':
-            df.to_csv(filename, index=False)
+            to_python_lists(df).to_csv(filename, index=False)
         elif format == 'pickle':
             df.to_pickle(filename)
+        elif format in COLUMNAR_FORMATS:
+            return write_columnar(df, filename, format, row_group_size, compression, partition_column)
         else:
-            raise ValueError("Unsupported format. Please choose 'csv' or 'pickle'.")
+            raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
 
 if __name__ == "__main__":
-    patterns = {
-        'alpha_numeric': re.compile(b'[a-zA-Z]{5,15}'),
-        'url': re.compile(b'\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*'),
-        'email': re.compile(b'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}'),
-        'phone_number': re.compile(b'\d{3}-\d{3}-\d{4}'),
-        'ipv4_address': re.compile(b'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'),
-        'folder_hierarchy': re.compile(b'.+(?=((\|\/).+){2})'),
-        'email_address': re.compile(b'(([a-zA-Z0-9_\-\.]+)@((\[[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.)|(([a-zA-Z0-9\-]+\.)+))([a-zA-Z]{2,4}|[0-9]{1,3})(\]?)(\s*;\s*|\s*$))*'),
-        'password': re.compile(b'^(?=.*?[A-Z])(?=.*?[a-z])(?=.*?[0-9])(?=.*?[#?!@$ %^&*-]).{8,}$'),
-        'username_discord': re.compile(b'^.{3,32}#[0-9]{4}$'),
-        'url': re.compile(b'(https?:\/\/)?(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()!@:%_\+.~#?&\/\/=]*)'),
-        'mac_address': re.compile(b'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'),
-        'whitespace_leading': re.compile(b'^\s+'),
-        'whitespace_trailing': re.compile(b'\s+$'),
-        'whitespace_consecutive': re.compile(b'\s{2,}')
-    }
-
-    processor = DataProcessor(patterns)
+    # python makeDF.py --scan dump.csv ... [--patterns email,ipv4_address]: run the patterns
+    # over the raw bytes of the files, without building a DataFrame
+    if len(sys.argv) > 1 and sys.argv[1] == '--scan':
+        sys.exit(scan_main(sys.argv[2:], SAFE_PATTERNS))
+
+    # Linear-time pattern pack; a per-cell budget still caps any single scan
+    processor = DataProcessor(SAFE_PATTERNS, max_cell_length=100000, cell_timeout=1.0, optimize=True)
 
     while True:
         # Ask user for directory containing files
@@ -96,9 +103,29 @@ if __name__ == "__main__":
         sheet_name = input("Enter the sheet name(s) you want to read (comma-separated, or leave blank to read all): ")
         sheet_name = None if not sheet_name else [s.strip() for s in sheet_name.split(',')]
 
+        # Sparse columns are only skipped when asked for, with the columns to keep
+        processor.extractor.profiler = prompt_profiler()
+
+        # Index the extracted tokens next to the output directory
+        processor.extractor.index = TokenIndex(os.path.join(file_dir, "index"))
+
         # Read file to DataFrame
         dataframe = processor.read_file_to_dataframe(file_path, sheet_name)
 
+        # Show how much memory the compact dtypes saved
+        print("Memory report:")
+        print(processor.memory_report.to_string(index=False))
+
+        # Show which columns were sampled as too sparse to scan
+        profile_report = processor.extractor.profile_report()
+        if profile_report is not None:
+            print("Column profile:")
+            print(profile_report.to_string(index=False))
+
+        # Show how often each pattern was skipped, matched and how long it took
+        print("Pattern report:")
+        print(processor.extractor.pattern_report().to_string(index=False))
+
         # Enter the filename for the output file
         output_filename = input("Enter the filename for the output file (without extension): ")
         output_dir = os.path.join(file_dir, "output")
@@ -108,7 +135,7 @@ if __name__ == "__main__":
             os.makedirs(output_dir)
 
         # Choose output format
-        format_choice = input("Choose output format ('csv' or 'pickle'): ")
+        format_choice = input("Choose output format ('csv', 'pickle', 'feather' or 'parquet'): ")
 
         # Save DataFrame
         try:
@@ -120,7 +147,15 @@ if __name__ == "__main__":
                 output_file = os.path.join(output_dir, f"{output_filename}.pickle")
                 processor.save_dataframe(dataframe, output_file, 'pickle')
                 print(f"DataFrame saved as pickle: {output_file}")
+            elif format_choice.lower() in COLUMNAR_FORMATS:
+                format_choice = format_choice.lower()
+                output_file = os.path.join(output_dir, f"{output_filename}{COLUMNAR_FORMATS[format_choice]}")
+                partition_column, compression = (prompt_parquet_options() if format_choice == 'parquet'
+                                                   else (None, DEFAULT_COMPRESSION))
+                report = processor.save_dataframe(dataframe, output_file, format_choice, partition_column, compression)
+                print(f"DataFrame saved as {format_choice}: {output_file}")
+                print(format_write_report(report))
             else:
-                print("Unsupported format. Please choose 'csv' or 'pickle'.")
+                print("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
         except ValueError as ve:
             print(f"Error: {ve}")
@@ -0,0 +1,41 @@
+import re
+
+# Pattern registry makeDF.py shipped with. Several entries backtrack badly on
+# long cells (email_address, folder_hierarchy, whitespace_trailing) and the
+# second 'url' entry hides the first; kept for comparison in benchmarks.
+LEGACY_PATTERNS = {
+    'alpha_numeric': re.compile(rb'[a-zA-Z]{5,15}'),
+    'email': re.compile(rb'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}'),
+    'phone_number': re.compile(rb'\d{3}-\d{3}-\d{4}'),
+    'ipv4_address': re.compile(rb'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'),
+    'folder_hierarchy': re.compile(rb'.+(?=((\|\/).+){2})'),
+    'email_address': re.compile(rb'(([a-zA-Z0-9_\-\.]+)@((\[[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.)|(([a-zA-Z0-9\-]+\.)+))([a-zA-Z]{2,4}|[0-9]{1,3})(\]?)(\s*;\s*|\s*$))*'),
+    'password': re.compile(rb'^(?=.*?[A-Z])(?=.*?[a-z])(?=.*?[0-9])(?=.*?[#?!@$ %^&*-]).{8,}$'),
+    'username_discord': re.compile(rb'^.{3,32}#[0-9]{4}$'),
+    'url': re.compile(b'(https?:\\/\\/)?(www\\.)?[-a-zA-Z0-9@:%._\\+~#=]{1,256}\\.[a-zA-Z0-9()]{1,6}\\b([-a-zA-Z0-9()!@:%_\\+.~#?&\\/\\/=]*)'),
+    'mac_address': re.compile(rb'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'),
+    'whitespace_leading': re.compile(rb'^\s+'),
+    'whitespace_trailing': re.compile(rb'\s+$'),
+    'whitespace_consecutive': re.compile(rb'\s{2,}'),
+}
+
+# Curated replacements that run in time linear in the cell length. Every
+# unbounded run is either anchored or preceded by a lookbehind that only lets
+# it start at the beginning of a run, so a failing match is never retried from
+# every position inside the same run, and no two adjacent quantifiers can
+# consume the same characters. Benchmarked by benchmark_patterns.py.
+SAFE_PATTERNS = {
+    'alpha_numeric': re.compile(r'[a-zA-Z]{5,15}'),
+    'url': re.compile(r'(?<![A-Za-z0-9+.-])(?:[A-Za-z][A-Za-z0-9+.-]*://|www\.)[^\s<>"\']+'),
+    'email': re.compile(r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,4}\b'),
+    'phone_number': re.compile(r'\d{3}-\d{3}-\d{4}'),
+    'ipv4_address': re.compile(r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b'),
+    'folder_hierarchy': re.compile(r'(?<![^\s\\/])(?:[^\s\\/]+[\\/]){2,}[^\s\\/]*'),
+    'email_address': re.compile(r'(?<![A-Za-z0-9_.-])[A-Za-z0-9_.-]+@(?:\[\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\]|[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,4}\b)'),
+    'password': re.compile(r'^(?=[^A-Z]*[A-Z])(?=[^a-z]*[a-z])(?=[^0-9]*[0-9])(?=[^#?!@$ %^&*-]*[#?!@$ %^&*-]).{8,}$'),
+    'username_discord': re.compile(r'^.{3,32}#[0-9]{4}$'),
+    'mac_address': re.compile(r'^(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}$'),
+    'whitespace_leading': re.compile(r'^\s+'),
+    'whitespace_trailing': re.compile(r'(?<!\s)\s+$|^\s+$'),
+    'whitespace_consecutive': re.compile(r'\s{2,}'),
+}
@@ -0,0 +1,293 @@
+import re
+import time
+import pandas as pd
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+
+# Largest character class turned into an "any of these characters" check.
+MAX_CLASS_SIZE = 8
+
+# Flags shared by re and regex that are carried over to a timed pattern.
+_TIMED_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE | re.ASCII
+
+
+def _literal(code, kind):
+    return bytes([code]) if kind is bytes else chr(code)
+
+
+def _class_literals(items, kind):
+    """Return the characters of a small positive character class, or None."""
+    chars = set()
+    for op, av in items:
+        name = str(op)
+        if name == 'LITERAL':
+            chars.add(_literal(av, kind))
+        elif name == 'RANGE' and av[1] - av[0] < MAX_CLASS_SIZE:
+            chars.update(_literal(code, kind) for code in range(av[0], av[1] + 1))
+        else:
+            return None
+    return chars if 0 < len(chars) <= MAX_CLASS_SIZE else None
+
+
+def _walk(items, kind):
+    """Collect the literal requirements of a parsed pattern sequence."""
+    requirements = []
+    run = []
+
+    def flush():
+        if run:
+            requirements.append(frozenset([kind().join(run)]))
+            run.clear()
+
+    for op, av in items:
+        name = str(op)
+        if name == 'LITERAL':
+            run.append(_literal(av, kind))
+            continue
+        flush()
+        if name == 'IN':
+            chars = _class_literals(av, kind)
+            if chars:
+                requirements.append(frozenset(chars))
+        elif name == 'SUBPATTERN':
+            add_flags, body = av[1], av[3]
+            if not add_flags & re.IGNORECASE:
+                requirements.extend(_walk(body, kind))
+        elif name == 'ATOMIC_GROUP':
+            requirements.extend(_walk(av, kind))
+        elif name == 'ASSERT':
+            # A positive lookaround still needs its text to be present.
+            requirements.extend(_walk(av[1], kind))
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+            if av[0] >= 1:
+                requirements.extend(_walk(av[2], kind))
+        elif name == 'BRANCH':
+            # Any branch may match, so only the union of one requirement per
+            # branch is certain to be present.
+            alternatives = set()
+            for branch in av[1]:
+                branch_requirements = _walk(branch, kind)
+                if not branch_requirements:
+                    alternatives = None
+                    break
+                alternatives.update(branch_requirements[0])
+            if alternatives:
+                requirements.append(frozenset(alternatives))
+    flush()
+    return requirements
+
+
+def required_literals(pattern):
+    """
+    Derive cheap literal checks that every match of a pattern must satisfy.
+
+    Parameters:
+    - pattern (Pattern): The compiled pattern.
+
+    Returns:
+    - list: Requirements, each a tuple of alternative substrings of which at
+      least one must occur in a text for the pattern to match it. An empty list
+      means the pattern cannot be prefiltered.
+    """
+    if pattern.flags & re.IGNORECASE:
+        return []
+    kind = type(pattern.pattern)
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return []
+    requirements = []
+    for requirement in _walk(list(parsed), kind):
+        if requirement not in requirements:
+            requirements.append(requirement)
+    return [tuple(sorted(requirement)) for requirement in requirements]
+
+
+class PatternStats:
+    """Running counters for one pattern of a PatternSet."""
+
+    def __init__(self):
+        self.cells = 0
+        self.scanned = 0
+        self.hits = 0
+        self.matches = 0
+        self.over_budget = 0
+        self.seconds = 0.0
+
+    def merge(self, other):
+        """Add the counters of another PatternStats."""
+        self.cells += other.cells
+        self.scanned += other.scanned
+        self.hits += other.hits
+        self.matches += other.matches
+        self.over_budget += other.over_budget
+        self.seconds += other.seconds
+
+
+class PatternSet:
+    """
+    Run a registry of compiled patterns over text cells, skipping every pattern
+    whose literal prefilter rules out a cell before the regex is run.
+
+    Prefilters are derived from the patterns (e.g. an email pattern needs '@'
+    and a URL pattern '://'), and can be replaced per pattern. The set keeps
+    per-pattern counters of cells seen, cells scanned, cells with a match and
+    time spent.
+
+    A per-cell budget guards against patterns that backtrack catastrophically:
+    cells longer than max_cell_length are not scanned, and with cell_timeout
+    every scan is run through the 'regex' module and abandoned after that many
+    seconds. Cells over budget yield no matches and are counted per pattern.
+
+    Parameters:
+    - patterns (dict): Mapping of name to compiled pattern.
+    - prefilters (dict, optional): Mapping of name to a list of substrings of
+      which at least one must occur for the pattern to be run; an empty list
+      disables the prefilter of that pattern.
+    - max_cell_length (int, optional): Longest cell (in characters, or bytes
+      for bytes patterns) that is scanned.
+    - cell_timeout (float, optional): Seconds a single scan may take.
+    """
+
+    def __init__(self, patterns, prefilters=None, max_cell_length=None, cell_timeout=None):
+        if max_cell_length is not None and max_cell_length < 0:
+            raise ValueError("The maximum cell length cannot be negative.")
+        if cell_timeout is not None:
+            if cell_timeout <= 0:
+                raise ValueError("The cell timeout must be positive.")
+            if regex is None:
+                raise ImportError("A cell timeout requires the 'regex' package to be installed.")
+        self.patterns = patterns
+        self.max_cell_length = max_cell_length
+        self.cell_timeout = cell_timeout
+        self.timed_patterns = {}
+        if cell_timeout is not None:
+            self.timed_patterns = {name: regex.compile(pattern.pattern, pattern.flags & _TIMED_FLAGS)
+                                   for name, pattern in patterns.items()}
+        self.requirements = {name: required_literals(pattern) for name, pattern in patterns.items()}
+        for name, substrings in (prefilters or {}).items():
+            if name not in patterns:
+                raise ValueError(f"No pattern named '{name}'.")
+            self.requirements[name] = [tuple(substrings)] if substrings else []
+        self.stats = {name: PatternStats() for name in patterns}
+
+    def may_match(self, name, text):
+        """Return False if the prefilter proves the pattern cannot match the text."""
+        return all(any(substring in text for substring in requirement)
+                   for requirement in self.requirements[name])
+
+    def _findall(self, name, stats):
+        """Return the findall function of a pattern, wrapped in the cell budget."""
+        if self.max_cell_length is None and self.cell_timeout is None:
+            return self.patterns[name].findall
+        max_cell_length = self.max_cell_length
+        if self.cell_timeout is None:
+            scan = self.patterns[name].findall
+        else:
+            timed, timeout = self.timed_patterns[name], self.cell_timeout
+
+            def scan(text):
+                return timed.findall(text, timeout=timeout)
+
+        def findall(text):
+            if max_cell_length is not None and len(text) > max_cell_length:
+                stats.over_budget += 1
+                return []
+            try:
+                return scan(text)
+            except TimeoutError:
+                stats.over_budget += 1
+                return []
+
+        return findall
+
+    def findall_column(self, name, texts, cells=None, record=True):
+        """
+        Run one pattern's findall over a list of texts.
+
+        Parameters:
+        - name (str): The pattern to run.
+        - texts (list): The texts (bytes for bytes patterns).
+        - cells (int, optional): Number of cells the texts were selected from,
+          for the statistics; defaults to the number of texts.
+        - record (bool): Add the scan to the statistics; off for scans that
+          are not part of the extraction (e.g. a profiler's sample).
+
+        Returns:
+        - list: The findall result of every text.
+        """
+        stats = self.stats[name] if record else PatternStats()
+        findall = self._findall(name, stats)
+        requirements = self.requirements[name]
+        started = time.perf_counter()
+        if not requirements:
+            values = [findall(text) for text in texts]
+            scanned = len(texts)
+        elif len(requirements) == 1 and len(requirements[0]) == 1:
+            substring = requirements[0][0]
+            values = [findall(text) if substring in text else [] for text in texts]
+            scanned = sum(1 for text in texts if substring in text)
+        else:
+            values = []
+            scanned = 0
+            for text in texts:
+                for requirement in requirements:
+                    for substring in requirement:
+                        if substring in text:
+                            break
+                    else:
+                        values.append([])
+                        break
+                else:
+                    values.append(findall(text))
+                    scanned += 1
+        stats.seconds += time.perf_counter() - started
+        stats.cells += len(texts) if cells is None else cells
+        stats.scanned += scanned
+        hits = [len(value) for value in values if value]
+        stats.hits += len(hits)
+        stats.matches += sum(hits)
+        return values
+
+    def merge_stats(self, stats):
+        """Add per-pattern statistics collected elsewhere (e.g. in a worker)."""
+        for name, other in stats.items():
+            self.stats[name].merge(other)
+
+    def reset_stats(self):
+        """Clear the per-pattern statistics."""
+        self.stats = {name: PatternStats() for name in self.patterns}
+
+    def report(self):
+        """
+        Summarize the per-pattern statistics.
+
+        Returns:
+        - DataFrame: One row per pattern with the cells seen, the cells skipped
+          by the prefilter, the cells with at least one match, the hit rate,
+          the number of matches, the cells abandoned for exceeding the cell
+          budget and the seconds spent.
+        """
+        rows = []
+        for name, stats in self.stats.items():
+            rows.append({
+                'pattern': name,
+                'prefilter': ' & '.join('|'.join(map(repr, requirement)) for requirement in self.requirements[name]),
+                'cells': stats.cells,
+                'skipped': stats.cells - stats.scanned,
+                'hits': stats.hits,
+                'hit_rate': stats.hits / stats.cells if stats.cells else 0.0,
+                'matches': stats.matches,
+                'over_budget': stats.over_budget,
+                'seconds': round(stats.seconds, 4),
+            })
+        return pd.DataFrame(rows)
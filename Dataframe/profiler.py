@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+
+class ColumnProfiler:
+    """
+    Decide which text columns are worth scanning by running the patterns on a
+    sample of each column first.
+
+    The density of a pattern in a column is the share of sampled non-empty
+    cells in which it finds at least one match. Columns in which no pattern is
+    denser than min_density (ID columns, numbers stored as text, JSON blobs)
+    are skipped. A rare entity can be missed by a sample, so the report lists
+    every decision, and columns named in always_scan are scanned regardless.
+
+    Profiles are cached per schema: the column names and dtypes, the patterns
+    and the profiler settings. Every later DataFrame with the same schema
+    reuses the decision without sampling again.
+
+    Parameters:
+    - sample_size (int): Number of non-empty cells sampled per column.
+    - min_density (float): Columns whose best pattern density is at most this
+      value are skipped; 0.0 (default) skips columns without any match in the
+      sample.
+    - always_scan (list, optional): Columns that are never skipped.
+    - cache_path (str, optional): JSON file the profiles are kept in across
+      runs; by default they are only kept in memory.
+    - random_state (int): Seed of the sample.
+    """
+
+    def __init__(self, sample_size=1000, min_density=0.0, always_scan=None, cache_path=None, random_state=0):
+        if sample_size < 1:
+            raise ValueError("The sample size must be at least 1.")
+        if not 0.0 <= min_density < 1.0:
+            raise ValueError("The minimum density must be at least 0 and below 1.")
+        self.sample_size = sample_size
+        self.min_density = min_density
+        self.always_scan = list(always_scan or [])
+        self.cache_path = cache_path
+        self.random_state = random_state
+        self.cache = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as handle:
+                self.cache = json.load(handle)
+        self.last_report = None
+
+    def schema_key(self, df, extractor, columns):
+        """Return the cache key of a DataFrame's columns profiled with an extractor's patterns."""
+        schema = {
+            'columns': [[str(column), str(df[column].dtype)] for column in columns],
+            'patterns': [[name, repr(pattern.pattern), pattern.flags] for name, pattern in extractor.patterns.items()],
+            'settings': [self.sample_size, self.min_density, self.random_state],
+        }
+        return hashlib.sha1(json.dumps(schema, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _sample(self, series):
+        values = series.dropna()
+        if len(values) > self.sample_size:
+            values = values.sample(self.sample_size, random_state=self.random_state)
+        return [str(value) for value in values]
+
+    def profile(self, df, extractor, columns):
+        """
+        Estimate the match density of every pattern in every candidate column.
+
+        Parameters:
+        - df (DataFrame): The DataFrame to profile.
+        - extractor (MultiPatternExtractor): The extractor whose patterns are run.
+        - columns (list): The candidate columns.
+
+        Returns:
+        - DataFrame: One row per column with its dtype, the number of sampled
+          cells, the density of every pattern, whether it is scanned and why.
+        """
+        key = self.schema_key(df, extractor, columns)
+        records = self.cache.get(key) if columns else []
+        if records is None:
+            records = []
+            for column in columns:
+                texts = self._sample(df[column])
+                record = {'column': str(column), 'dtype': str(df[column].dtype), 'sampled': len(texts)}
+                # The sample is scanned within the same prefilters and cell budget as the real scan
+                for name, found in extractor.extract_texts(texts, record=False).items():
+                    record[name] = sum(1 for matches in found if matches) / len(texts) if texts else 0.0
+                records.append(record)
+            self.cache[key] = records
+            self._save()
+        report = pd.DataFrame(records, columns=['column', 'dtype', 'sampled'] + extractor.names)
+        best = report[extractor.names].max(axis=1) if len(report) else pd.Series(dtype='float64')
+        forced = report['column'].isin([str(column) for column in self.always_scan])
+        report['scan'] = forced | (best > self.min_density)
+        report['reason'] = 'dense'
+        report.loc[~report['scan'], 'reason'] = 'below min_density'
+        report.loc[forced, 'reason'] = 'always_scan'
+        self.last_report = report
+        return report
+
+    def select(self, df, extractor, columns):
+        """
+        Return the candidate columns that the profile says are worth scanning.
+
+        Parameters:
+        - df (DataFrame): The DataFrame to profile.
+        - extractor (MultiPatternExtractor): The extractor whose patterns are run.
+        - columns (list): The candidate columns.
+
+        Returns:
+        - list: The columns to scan, in their original order.
+        """
+        # Profiled even without candidates, so last_report always describes this DataFrame
+        report = self.profile(df, extractor, columns)
+        return [column for column, scan in zip(columns, report['scan']) if scan]
+
+    def skipped(self):
+        """Return the columns skipped by the last profile."""
+        if self.last_report is None:
+            return []
+        return self.last_report.loc[~self.last_report['scan'], 'column'].tolist()
+
+    def clear_cache(self):
+        """Forget every cached profile."""
+        self.cache = {}
+        self._save()
+
+    def _save(self):
+        if self.cache_path:
+            with open(self.cache_path, 'w', encoding='utf-8') as handle:
+                json.dump(self.cache, handle)
+
+
+def prompt_profiler():
+    """
+    Ask whether to skip sparse text columns, and with which overrides.
+
+    Returns:
+    - ColumnProfiler: The profiler to use, or None to scan every text column.
+    """
+    choice = input("Skip text columns without matches in a sample? (y/N): ").strip().lower()
+    if choice not in ('y', 'yes'):
+        return None
+    always_scan = input("Columns to always scan (comma-separated, leave blank for none): ")
+    min_density = input("Minimum match density to scan a column (leave blank for 0): ").strip()
+    return ColumnProfiler(min_density=float(min_density) if min_density else 0.0,
+                          always_scan=[column.strip() for column in always_scan.split(',') if column.strip()])
@@ -0,0 +1,309 @@
+import argparse
+import csv
+import itertools
+import mmap
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pattern_pack import SAFE_PATTERNS
+from pattern_set import required_literals
+
+DEFAULT_SCAN_CHUNK = 64 * 2 ** 20
+DEFAULT_SCAN_PATTERNS = ('email', 'url', 'ipv4_address', 'phone_number')
+MATCH_COLUMNS = ['file', 'offset', 'line', 'pattern', 'match']
+# Below one literal hit per this many bytes, only the lines holding a hit are run through the pattern
+SPARSE_BYTES_PER_HIT = 4096
+
+
+def to_bytes_pattern(pattern):
+    """
+    Compile a pattern for scanning raw bytes.
+
+    str patterns are encoded (classes such as \\d, \\w and \\s then match
+    ASCII only) and every pattern gets MULTILINE, so ^ and $ anchor to the
+    lines of the file rather than to cells.
+
+    Parameters:
+    - pattern (Pattern): A str or bytes pattern.
+
+    Returns:
+    - Pattern: The bytes pattern.
+    """
+    source = pattern.pattern if isinstance(pattern.pattern, bytes) else pattern.pattern.encode('utf-8')
+    flags = (pattern.flags & ~re.UNICODE) | re.MULTILINE
+    return re.compile(source, flags)
+
+
+def scan_patterns(patterns, names=None):
+    """Return bytes versions of the named patterns of a pattern pack (all by default)."""
+    names = list(patterns) if names is None else list(names)
+    unknown = [name for name in names if name not in patterns]
+    if unknown:
+        raise ValueError(f"Unknown pattern(s): {', '.join(unknown)}. Please choose from {', '.join(patterns)}.")
+    return {name: to_bytes_pattern(patterns[name]) for name in names}
+
+
+def chunk_ranges(buffer, chunk_size=DEFAULT_SCAN_CHUNK):
+    """
+    Split a buffer into byte ranges of about chunk_size that end at line breaks.
+
+    Returns:
+    - list: (start, end) pairs covering the buffer.
+    """
+    ranges = []
+    start = 0
+    while start < len(buffer):
+        end = buffer.find(b'\n', min(start + chunk_size, len(buffer)) - 1)
+        end = len(buffer) if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _count_lines(buffer, start, end):
+    """Count the line breaks in a range of a memory-mapped buffer (mmap has no count())."""
+    return buffer[start:end].count(b'\n')
+
+
+def _rarest_requirement(buffer, start, end, pattern):
+    """
+    Return the literals a match needs that occur least often in the range, with their count.
+
+    Returns:
+    - tuple: The alternative literals (one of which every match contains)
+      and how often they occur, or (None, None) when the pattern has none.
+    """
+    best, best_hits = None, None
+    for literals in required_literals(pattern):
+        hits = sum(buffer[start:end].count(literal) for literal in literals)
+        if best_hits is None or hits < best_hits:
+            best, best_hits = literals, hits
+    return best, best_hits
+
+
+def _candidate_lines(buffer, start, end, literals):
+    """Yield the (start, end) of every line of the range that holds one of the literals, in order."""
+    next_hits = {literal: buffer.find(literal, start, end) for literal in literals}
+    position = start
+    while True:
+        for literal, hit in next_hits.items():
+            if hit != -1 and hit < position:
+                next_hits[literal] = buffer.find(literal, position, end)
+        hits = [hit for hit in next_hits.values() if hit != -1]
+        if not hits:
+            return
+        hit = min(hits)
+        line_start = buffer.rfind(b'\n', start, hit) + 1 or start
+        line_end = buffer.find(b'\n', hit, end)
+        line_end = end if line_end == -1 else line_end
+        yield max(line_start, position), line_end
+        position = line_end + 1
+
+
+def _window_end(buffer, position):
+    """Return the end of the line after the one holding position (the buffer's end if there is none)."""
+    line_end = buffer.find(b'\n', position + 1)
+    return len(buffer) if line_end == -1 else line_end + 1
+
+
+def _span_matches(pattern, buffer, start, end):
+    """
+    Yield the matches of a pattern that start in a span, as a scan of the whole buffer finds them.
+
+    The pattern sees the text past the span up to the end of the next line,
+    so $, \\Z and lookaheads do not take the span's end for the end of the
+    text. A match reaching that window's end may run on or only match there
+    because the text stops, so it is searched again in a window twice as
+    long, up to the buffer's end.
+    """
+    position = start
+    window = _window_end(buffer, end)
+    while position < end:
+        for match in pattern.finditer(buffer, position, window):
+            if match.end() == window and window < len(buffer):
+                position, window = match.start(), _window_end(buffer, 2 * window - end)
+                break
+            if match.start() >= end:
+                return
+            yield match
+        else:
+            return
+
+
+def _scan_range(file_path, start, end, patterns):
+    """
+    Scan one range of a file in a worker.
+
+    A pattern whose matches need a literal that is rare in the range (such
+    as the '@' of an email) is only run over the lines holding it.
+
+    Returns:
+    - tuple: The matches as (offset, line within the range, pattern name,
+      matched bytes) in offset order, and the number of line breaks in the
+      range.
+    """
+    matches = []
+    with open(file_path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for name, pattern in patterns.items():
+            literals, hits = _rarest_requirement(buffer, start, end, pattern)
+            if literals is not None and hits * SPARSE_BYTES_PER_HIT < end - start:
+                spans = _candidate_lines(buffer, start, end, literals)
+            else:
+                spans = [(start, end)]
+            line, position, last_end = 0, start, start
+            for span_start, span_end in spans:
+                # A match may run on into the next candidate line; the scan resumes after it
+                for match in _span_matches(pattern, buffer, max(span_start, last_end), span_end):
+                    line += _count_lines(buffer, position, match.start())
+                    position, last_end = match.start(), match.end()
+                    matches.append((match.start(), line, name, match.group()))
+        newlines = _count_lines(buffer, start, end)
+    # Sorted by offset; matches at the same offset stay in pattern order
+    matches.sort(key=lambda match: match[0])
+    return matches, newlines
+
+
+def _resume_matches(buffer, pattern, name, matches, resume, start, end):
+    """
+    Redo one pattern's matches of a range from where a match of the previous range ended.
+
+    A match that runs on past its range covers text the next range's worker
+    scanned from the range's start, as it could not know. Its matches are
+    redone from the end of that match until one starts where a worker match
+    does, from which on the two agree.
+
+    Returns:
+    - list: The pattern's matches in the range, as _scan_range returns them.
+    """
+    found = [match for match in matches if match[2] == name]
+    starts = {match[0]: match for match in found}
+    redone = []
+    for match in _span_matches(pattern, buffer, resume, end):
+        if starts.get(match.start(), (None,) * 4)[3] == match.group():
+            return redone + [found_match for found_match in found if found_match[0] >= match.start()]
+        redone.append((match.start(), _count_lines(buffer, start, match.start()), name, match.group()))
+    return redone
+
+
+def iter_matches(file_path, patterns, workers=None, chunk_size=DEFAULT_SCAN_CHUNK):
+    """
+    Run bytes patterns over a memory-mapped file, chunk by chunk across processes.
+
+    No DataFrame is built and nothing is decoded: the file is split into
+    line-aligned chunks that worker processes map and scan directly, and
+    the matches come back in file order, the same whatever the chunk size.
+    Lines without the literals a pattern needs are skipped, so a pattern
+    that could match across a line break may miss such matches.
+
+    Parameters:
+    - file_path (str): The file to scan (CSV, log, dump, ...).
+    - patterns (dict): Mapping of name to bytes pattern; see scan_patterns.
+    - workers (int, optional): Number of worker processes; every CPU by default.
+    - chunk_size (int): Bytes per chunk.
+
+    Returns:
+    - iterator: (byte offset, line number (from 1), pattern name, matched
+      bytes) tuples.
+    """
+    if any(not isinstance(pattern.pattern, bytes) for pattern in patterns.values()):
+        raise ValueError("Raw scans need bytes patterns; convert them with scan_patterns.")
+    if os.path.getsize(file_path) == 0:
+        return
+    order = {name: position for position, name in enumerate(patterns)}
+    with open(file_path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        ranges = iter(chunk_ranges(buffer, chunk_size))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Only a few chunks per worker are in flight, so finished matches never pile up
+            window = 2 * (workers or os.cpu_count() or 1)
+            pending = deque((start, end, executor.submit(_scan_range, file_path, start, end, patterns))
+                            for start, end in itertools.islice(ranges, window))
+            first_line = 1
+            # Where the last match of every pattern ended
+            resume = dict.fromkeys(patterns, 0)
+            while pending:
+                start, end, future = pending.popleft()
+                matches, newlines = future.result()
+                for next_start, next_end in itertools.islice(ranges, 1):
+                    pending.append((next_start, next_end,
+                                    executor.submit(_scan_range, file_path, next_start, next_end, patterns)))
+                overrun = [name for name in patterns if resume[name] > start]
+                if overrun:
+                    kept = [match for match in matches if match[2] not in overrun]
+                    for name in overrun:
+                        kept += _resume_matches(buffer, patterns[name], name, matches, resume[name], start, end)
+                    matches = sorted(kept, key=lambda match: (match[0], order[match[2]]))
+                for offset, line, name, text in matches:
+                    resume[name] = offset + len(text)
+                    yield offset, first_line + line, name, text
+                first_line += newlines
+
+
+def scan_files(file_paths, output, patterns, workers=None, chunk_size=DEFAULT_SCAN_CHUNK):
+    """
+    Scan files and write every match as a CSV row (file, offset, line, pattern, match).
+
+    Parameters:
+    - file_paths (list): The files to scan.
+    - output (file): Text stream the rows are written to.
+    - patterns (dict): Mapping of name to bytes pattern.
+    - workers (int, optional): Number of worker processes.
+    - chunk_size (int): Bytes per chunk.
+
+    Returns:
+    - dict: The number of matches of every pattern.
+    """
+    writer = csv.writer(output)
+    writer.writerow(MATCH_COLUMNS)
+    counts = dict.fromkeys(patterns, 0)
+    for file_path in file_paths:
+        for offset, line, name, text in iter_matches(file_path, patterns, workers, chunk_size):
+            writer.writerow([file_path, offset, line, name, text.decode('utf-8', 'backslashreplace')])
+            counts[name] += 1
+    return counts
+
+
+def scan_main(argv, patterns=SAFE_PATTERNS, default_names=DEFAULT_SCAN_PATTERNS):
+    """
+    Parse the scan command line and run it.
+
+    Parameters:
+    - argv (list): The arguments after the script name (or scan flag).
+    - patterns (dict): The pattern pack to choose from.
+    - default_names (tuple): The patterns used when none are named.
+
+    Returns:
+    - int: The exit status.
+    """
+    parser = argparse.ArgumentParser(description="Find pattern matches in raw files without parsing them.")
+    parser.add_argument('files', nargs='+', help="files to scan")
+    parser.add_argument('--patterns', default=','.join(default_names),
+                        help=f"comma-separated pattern names (from: {', '.join(patterns)})")
+    parser.add_argument('--output', default=None, help="CSV file for the matches (default: standard output)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: every CPU)")
+    parser.add_argument('--chunk-mb', type=int, default=DEFAULT_SCAN_CHUNK // 2 ** 20, help="megabytes per chunk")
+    args = parser.parse_args(argv)
+    try:
+        selected = scan_patterns(patterns, [name.strip() for name in args.patterns.split(',') if name.strip()])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    started = time.perf_counter()
+    if args.output is None:
+        counts = scan_files(args.files, sys.stdout, selected, args.workers, args.chunk_mb * 2 ** 20)
+    else:
+        with open(args.output, 'w', newline='', encoding='utf-8') as output:
+            counts = scan_files(args.files, output, selected, args.workers, args.chunk_mb * 2 ** 20)
+    seconds = time.perf_counter() - started
+    megabytes = sum(os.path.getsize(file_path) for file_path in args.files) / 2 ** 20
+    summary = ', '.join(f"{name}: {count}" for name, count in counts.items())
+    print(f"Scanned {megabytes:.1f} MB in {seconds:.2f}s ({megabytes / seconds:.1f} MB/s); {summary}",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    # python raw_scan.py dump1.csv dump2.log [--patterns email,ipv4_address] [--output matches.csv]
+    sys.exit(scan_main(sys.argv[1:]))
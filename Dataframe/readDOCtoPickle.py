@@ -1,17 +1,21 @@
 import os
 import pandas as pd
-import docx
-from docx import Document
 import pickle
 import re
+import sys
+from batch import batch_main
+from columnar import (COLUMNAR_FORMATS, DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, format_write_report,
+                      write_columnar)
+from csv_reader import DEFAULT_CSV_ENGINE, read_csv
+from docx_reader import read_docx_paragraphs
+from extraction import DEFAULT_CHUNK_SIZE, default_extractor, to_python_lists
 
 class FileReader:
     @staticmethod
     def read_docx(file_path):
         try:
-            doc = docx.Document(file_path)
-            paragraphs = [para.text for para in doc.paragraphs]
-            return paragraphs
+            # Streamed out of the zip instead of building the python-docx model
+            return read_docx_paragraphs(file_path)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return None
@@ -20,9 +24,7 @@ class FileReader:
     def read_doc(file_path):
         try:
             with open(file_path, 'rb') as doc_file:
-                doc = Document(doc_file)
-                paragraphs = [para.text for para in doc.paragraphs]
-                return paragraphs
+                return read_docx_paragraphs(doc_file)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return None
@@ -48,41 +50,37 @@ class FileHandler:
             return None
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists'):
         self.email_pattern = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}')
         self.word_pattern = re.compile(r'\b[a-zA-Z]{5,15}\b')
         self.url_pattern = re.compile(r'\b\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*\b')
+        self.extractor = default_extractor(self.email_pattern, self.word_pattern, self.url_pattern,
+                                           backend=backend, workers=workers, chunk_size=chunk_size,
+                                           dedup=dedup, memo_size=memo_size, output=output)
 
     def process_data(self, df):
         try:
-            new_columns = {}
-            for column in df.columns:
-                if df[column].dtype == 'object':
-                    new_columns[column + '_emails'] = df[column].apply(lambda x: self.email_pattern.findall(str(x)))
-                    new_columns[column + '_words'] = df[column].apply(lambda x: self.word_pattern.findall(str(x)))
-                    new_columns[column + '_urls'] = df[column].apply(lambda x: self.url_pattern.findall(str(x)))
-            return pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+            return self.extractor.process(df)
         except Exception as e:
             print(f"Error processing data: {e}")
             return None
 
 class DataFrameHandler:
     @staticmethod
-    def read_file_to_dataframe(file_path):
+    def read_file_to_dataframe(file_path, engine=DEFAULT_CSV_ENGINE):
         try:
             if file_path.endswith('.csv'):
-                return pd.read_csv(file_path)
+                return read_csv(file_path, engine)
             elif file_path.endswith(('.xls', '.xlsx')):
                 return pd.read_excel(file_path)
             elif file_path.endswith('.docx'):
-                doc = docx.Document(file_path)
-                paragraphs = [para.text for para in doc.paragraphs]
+                paragraphs = read_docx_paragraphs(file_path)
                 df = pd.DataFrame(paragraphs, columns=['Content'])
                 return df.transpose()  # Transpose to create separate columns for each paragraph
             elif file_path.endswith('.doc'):
                 with open(file_path, 'rb') as doc_file:
-                    doc = Document(doc_file)
-                    paragraphs = [para.text for para in doc.paragraphs]
+                    paragraphs = read_docx_paragraphs(doc_file)
                     df = pd.DataFrame(paragraphs, columns=['Content'])
                     return df.transpose()  # Transpose to create separate columns for each paragraph
             else:
@@ -92,15 +90,22 @@ class DataFrameHandler:
             return None
 
     @staticmethod
-    def save_dataframe(df, filename, format='csv'):
+    def save_dataframe(df, filename, format='csv', partition_column=None,
+                       compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
         try:
+            report = None
             if format == 'csv':
-                df.to_csv(filename, index=False)
+                to_python_lists(df).to_csv(filename, index=False)
             elif format == 'pickle':
                 df.to_pickle(filename)
+            elif format in COLUMNAR_FORMATS:
+                report = write_columnar(df, filename, format, row_group_size, compression, partition_column)
             else:
-                raise ValueError("Unsupported format. Please choose 'csv' or 'pickle'.")
+                raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
             print(f"DataFrame saved as {format.upper()}: {filename}")
+            if report is not None:
+                print(format_write_report(report))
+            return report
         except Exception as e:
             print(f"Error saving {format.upper()} file: {e}")
 
@@ -140,14 +145,30 @@ def process_file(file_dir, files):
 def save_dataframe(output_dir, dataframe):
     try:
         output_filename = input("Enter the filename for the output file (without extension): ")
-        format_choice = input("Choose output format ('csv' or 'pickle'): ").lower()
+        format_choice = input("Choose output format ('csv', 'pickle', 'feather' or 'parquet'): ").lower()
 
         output_file = os.path.join(output_dir, f"{output_filename}.{format_choice}")
         DataFrameHandler.save_dataframe(dataframe, output_file, format_choice)
     except Exception as e:
         print(f"Error saving DataFrame: {e}")
 
+def process_to_file(file_path, output_file, format):
+    """Read one file and save it; the worker function of the batch mode."""
+    dataframe = DataFrameHandler.read_file_to_dataframe(file_path)
+    if dataframe is None:
+        raise ValueError(f"{file_path} could not be read.")
+    DataFrameHandler.save_dataframe(dataframe, output_file, format)
+    # save_dataframe reports errors instead of raising them
+    if not os.path.exists(output_file):
+        raise ValueError(f"{output_file} could not be written.")
+    return len(dataframe)
+
 if __name__ == "__main__":
+    # python readDOCtoPickle.py <directory or glob> [--format parquet] [--workers N]
+    if len(sys.argv) > 1:
+        sys.exit(batch_main(sys.argv[1:], process_to_file, ('.doc', '.docx'),
+                            "Read every Word document and save its paragraphs as a DataFrame."))
+
     try:
         processor = DataProcessor()
 
@@ -1,8 +1,14 @@
 import os
 import pandas as pd
 import re
-import docx
-import docx2txt
+import sys
+from batch import batch_main
+from columnar import (COLUMNAR_FORMATS, DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, format_write_report,
+                      prompt_parquet_options, write_columnar)
+from csv_reader import DEFAULT_CSV_ENGINE, read_csv
+from docx_reader import iter_docx_paragraphs
+from excel_reader import read_excel_sheets
+from extraction import DEFAULT_CHUNK_SIZE, default_extractor, to_python_lists
 
 class FileHandler:
     @staticmethod
@@ -19,54 +25,50 @@ class FileHandler:
         return output_dir
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists'):
         self.email_pattern = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}')
         self.word_pattern = re.compile(r'\b[a-zA-Z]{5,15}\b')
         self.url_pattern = re.compile(r'\b\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*\b')
+        self.extractor = default_extractor(self.email_pattern, self.word_pattern, self.url_pattern,
+                                           backend=backend, workers=workers, chunk_size=chunk_size,
+                                           dedup=dedup, memo_size=memo_size, output=output)
 
     def process_data(self, df):
         """Process data in the DataFrame."""
-        new_columns = {}
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                new_columns[column + '_emails'] = df[column].apply(lambda x: self.email_pattern.findall(str(x)))
-                new_columns[column + '_words'] = df[column].apply(lambda x: self.word_pattern.findall(str(x)))
-                new_columns[column + '_urls'] = df[column].apply(lambda x: self.url_pattern.findall(str(x)))
-        return pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+        return self.extractor.process(df)
 
 class DataFrameHandler:
     @staticmethod
-    def read_file_to_dataframe(file_path, sheet_name=None):
+    def read_file_to_dataframe(file_path, sheet_name=None, workers=1, engine=DEFAULT_CSV_ENGINE):
         """Read a file into a DataFrame."""
         if file_path.endswith('.csv'):
-            return pd.read_csv(file_path)
+            return read_csv(file_path, engine)
         elif file_path.endswith(('.xls', '.xlsx')):
-            if sheet_name is None:
-                xls = pd.ExcelFile(file_path)
-                sheet_name = xls.sheet_names
-            if isinstance(sheet_name, list):
-                return pd.concat([pd.read_excel(file_path, sheet_name=sheet) for sheet in sheet_name])
-            else:
-                return pd.read_excel(file_path, sheet_name=sheet_name)
+            # Open the workbook once; multiple sheets get a 'sheet' column
+            return read_excel_sheets(file_path, sheet_name, workers)
         elif file_path.endswith('.docx'):
-            text = docx2txt.process(file_path)
+            # Paragraphs and table cells, streamed out of the zip
+            text = '\n'.join(iter_docx_paragraphs(file_path, tables=True))
             return pd.DataFrame({'Text': [text]})
         elif file_path.endswith('.doc'):
-            doc = docx.Document(file_path)
-            text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+            text = '\n'.join(iter_docx_paragraphs(file_path))
             return pd.DataFrame({'Text': [text]})
         else:
             raise ValueError("Unsupported file format. Please provide a CSV, XLS/XLSX, DOC, or DOCX file.")
 
     @staticmethod
-    def save_dataframe(df, filename, format='csv'):
+    def save_dataframe(df, filename, format='csv', partition_column=None,
+                       compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
         """Save DataFrame to a file."""
         if format == 'csv':
-            df.to_csv(filename, index=False)
+            to_python_lists(df).to_csv(filename, index=False)
         elif format == 'pickle':
             df.to_pickle(filename)
+        elif format in COLUMNAR_FORMATS:
+            return write_columnar(df, filename, format, row_group_size, compression, partition_column)
         else:
-            raise ValueError("Unsupported format. Please choose 'csv' or 'pickle'.")
+            raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
 
 def get_directory():
     """Get directory input from the user."""
@@ -103,7 +105,7 @@ def process_file(file_dir, files):
 def save_dataframe(output_dir, dataframe):
     """Save the DataFrame to a file."""
     output_filename = input("Enter the filename for the output file (without extension): ")
-    format_choice = input("Choose output format ('csv' or 'pickle'): ")
+    format_choice = input("Choose output format ('csv', 'pickle', 'feather' or 'parquet'): ")
 
     try:
         if format_choice.lower() == 'csv':
@@ -114,12 +116,31 @@ def save_dataframe(output_dir, dataframe):
             output_file = os.path.join(output_dir, f"{output_filename}.pickle")
             DataFrameHandler.save_dataframe(dataframe, output_file, 'pickle')
             print(f"DataFrame saved as pickle: {output_file}")
+        elif format_choice.lower() in COLUMNAR_FORMATS:
+            format_choice = format_choice.lower()
+            output_file = os.path.join(output_dir, f"{output_filename}{COLUMNAR_FORMATS[format_choice]}")
+            partition_column, compression = (prompt_parquet_options() if format_choice == 'parquet'
+                                               else (None, DEFAULT_COMPRESSION))
+            report = DataFrameHandler.save_dataframe(dataframe, output_file, format_choice, partition_column, compression)
+            print(f"DataFrame saved as {format_choice}: {output_file}")
+            print(format_write_report(report))
         else:
-            print("Unsupported format. Please choose 'csv' or 'pickle'.")
+            print("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
     except ValueError as ve:
         print(f"Error: {ve}")
 
+def process_to_file(file_path, output_file, format):
+    """Read one file and save it; the worker function of the batch mode."""
+    dataframe = DataFrameHandler.read_file_to_dataframe(file_path)
+    DataFrameHandler.save_dataframe(dataframe, output_file, format)
+    return len(dataframe)
+
 if __name__ == "__main__":
+    # python readWordtoPickle.py <directory or glob> [--format parquet] [--workers N]
+    if len(sys.argv) > 1:
+        sys.exit(batch_main(sys.argv[1:], process_to_file, ('.csv', '.xls', '.xlsx', '.doc', '.docx'),
+                            "Read every CSV, Excel and Word file and save it as a DataFrame."))
+
     dir_gen = get_directory()
     for file_dir, files in dir_gen:
         output_dir = FileHandler.create_output_directory(file_dir)
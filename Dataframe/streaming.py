@@ -0,0 +1,97 @@
+import pandas as pd
+from excel_reader import read_xlsx_chunks
+from extraction import DEFAULT_CHUNK_SIZE, entities_table, is_text_column, to_python_lists
+
+STREAMABLE_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def read_csv_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read a CSV file lazily in row chunks.
+
+    Parameters:
+    - file_path (str): The path to the CSV file.
+    - chunk_size (int): Number of rows per chunk.
+
+    Returns:
+    - iterator: DataFrames of at most chunk_size rows, with row labels
+      continuing from one chunk to the next.
+    """
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1.")
+    return pd.read_csv(file_path, chunksize=chunk_size)
+
+
+def read_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None):
+    """
+    Read a CSV or XLSX file lazily in row chunks.
+
+    Parameters:
+    - file_path (str): The path to the file.
+    - chunk_size (int): Number of rows per chunk.
+    - sheet_name (str, optional): The sheet of an XLSX file; the first by
+      default.
+
+    Returns:
+    - iterator: DataFrames of at most chunk_size rows.
+    """
+    if file_path.endswith('.csv'):
+        return read_csv_chunks(file_path, chunk_size)
+    if file_path.endswith('.xlsx'):
+        return read_xlsx_chunks(file_path, sheet_name, chunk_size)
+    raise ValueError("Unsupported file format. Only CSV and XLSX files can be streamed.")
+
+
+def stream_extract(extractor, chunks, output_file, format='csv', source=None):
+    """
+    Extract DataFrame chunks one at a time and append every result to the
+    output file, so only one chunk is held in memory and the first rows are
+    written as soon as the first chunk is done.
+
+    The columns to scan are fixed by the first chunk: its text columns plus
+    the columns that are entirely empty in it, whose dtype cannot be told yet.
+    Every chunk therefore produces the same output columns even when a later
+    chunk's values are parsed with a different dtype. An extractor's profiler
+    is run on the first chunk only. With a token index, the matches of every
+    chunk are written to it as the chunk is done, and replace the source
+    file's earlier postings once the last chunk is.
+
+    Parameters:
+    - extractor (MultiPatternExtractor): The extractor to run on each chunk.
+    - chunks (iterable): DataFrames to process, e.g. from read_chunks.
+    - output_file (str): The CSV file to write; it is overwritten.
+    - format (str): The output format; only 'csv' can be appended to.
+    - source (str, optional): The file the chunks are read from; the name the
+      matches are indexed under.
+
+    Returns:
+    - int: The number of input rows processed.
+    """
+    if format != 'csv':
+        raise ValueError("Unsupported streaming format. Please choose 'csv'.")
+    columns = None
+    rows = 0
+    # Every chunk's matches are written to the index as the chunk is done and
+    # replace the file's earlier postings once the last chunk is
+    writer = extractor.index.stage(source) if extractor.index is not None and source is not None else None
+    try:
+        with open(output_file, 'w', newline='', encoding='utf-8') as handle:
+            for chunk in chunks:
+                if columns is None:
+                    columns = [column for column in chunk.columns
+                               if is_text_column(chunk[column]) or chunk[column].isna().all()]
+                    if extractor.profiler is not None:
+                        columns = extractor.profiler.select(chunk, extractor, columns)
+                new_columns = extractor.process_dataframe(chunk, columns=columns)
+                if writer is not None:
+                    writer.add(entities_table(new_columns))
+                processed = extractor.assemble(chunk, new_columns)
+                to_python_lists(processed).to_csv(handle, header=rows == 0, index=False)
+                rows += len(chunk)
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    if writer is not None:
+        writer.commit()
+    return rows
@@ -0,0 +1,26 @@
+import os
+import pandas as pd
+from batch import MANIFEST_NAME, read_manifest, run_batch
+
+
+def copy_csv(file_path, output_file, format):
+    dataframe = pd.read_csv(file_path)
+    dataframe.to_csv(output_file, index=False)
+    return len(dataframe)
+
+
+def test_second_run_does_not_take_outputs_as_inputs(tmp_path):
+    (tmp_path / 'nested').mkdir()
+    inputs = [tmp_path / 'a.csv', tmp_path / 'nested' / 'b.csv']
+    for path in inputs:
+        pd.DataFrame({'x': [1, 2]}).to_csv(path, index=False)
+    target = str(tmp_path / '**' / '*.csv')
+
+    first = run_batch(target, copy_csv, ('.csv',), format='csv', workers=1)
+    second = run_batch(target, copy_csv, ('.csv',), format='csv', workers=1)
+
+    output_dir = tmp_path / 'output'
+    assert len(first) == 2 and len(second) == 0
+    assert sorted(path for path, _ in read_manifest(str(output_dir / MANIFEST_NAME))) == sorted(map(str, inputs))
+    assert not (output_dir / 'output').exists()
+    assert sorted(os.listdir(output_dir)) == ['a.csv', 'b.csv', MANIFEST_NAME]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from excel_reader import read_xlsx_chunks, spill_excel
+
+pytest.importorskip('openpyxl')
+pytest.importorskip('pyarrow')
+
+ROWS = 30
+
+
+def numpy_dtype(dtype):
+    """The NumPy type an Arrow-backed column stands for; other dtypes as they are."""
+    return dtype.numpy_dtype if isinstance(dtype, pd.ArrowDtype) else dtype
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'sheet.xlsx'
+    pd.DataFrame({
+        'id': range(ROWS),
+        'amount': np.arange(ROWS) / 2,
+        'name': [f'user{i}' for i in range(ROWS)],
+        'empty': [None] * ROWS,
+        'late_int': [None] * 12 + list(range(ROWS - 12)),
+        'late_text': [None] * 12 + ['x'] * (ROWS - 12),
+        'gap': list(range(14)) + [None] + list(range(15)),
+        'joined': pd.date_range('2024-01-01', periods=ROWS),
+    }).to_excel(path, index=False)
+    return str(path)
+
+
+def test_spill_matches_read_excel_dtypes(workbook):
+    expected = pd.read_excel(workbook)
+    for chunk_size in (5, 12, 1000):
+        spilled = spill_excel(workbook, chunk_size=chunk_size)
+        assert [numpy_dtype(dtype) for dtype in spilled.dtypes] == list(expected.dtypes)
+        pd.testing.assert_frame_equal(spilled.astype(object).where(spilled.notna(), None),
+                                      expected.astype(object).where(expected.notna(), None))
+
+
+def test_spill_dtypes_do_not_depend_on_chunk_size(workbook):
+    dtypes = [list(spill_excel(workbook, chunk_size=chunk_size).dtypes) for chunk_size in (5, 12, 1000)]
+    assert dtypes[0] == dtypes[1] == dtypes[2]
+
+
+def test_empty_columns_of_a_chunk_are_float(workbook):
+    first = next(iter(read_xlsx_chunks(workbook, chunk_size=10)))
+    assert first['empty'].dtype == np.float64
+    assert first['late_int'].dtype == np.float64
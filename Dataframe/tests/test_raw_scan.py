@@ -0,0 +1,48 @@
+import random
+from pattern_pack import LEGACY_PATTERNS, SAFE_PATTERNS
+from raw_scan import iter_matches, scan_patterns
+
+# Backtracking-heavy entries of the legacy pack are left out to keep the test quick
+SKIPPED = ('folder_hierarchy', 'email_address', 'password')
+
+
+def write_sample(path, rows=2000):
+    """Mix blank, whitespace-only and trailing-whitespace lines with emails, IPs, phones and URLs."""
+    rng = random.Random(1)
+    lines = []
+    for i in range(rows):
+        kind = rng.random()
+        if kind < 0.1:
+            lines.append('')
+        elif kind < 0.2:
+            lines.append(f'row {i} trailing   ')
+        elif kind < 0.3:
+            lines.append(f'mail user{i}@example.com from 10.0.0.{i % 255} at 555-123-{i % 10000:04d}')
+        elif kind < 0.35:
+            lines.append('   ')
+        else:
+            lines.append(f'plain text line {i} https://example.com/{i}')
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def test_matches_do_not_depend_on_chunk_size(tmp_path):
+    file_path = tmp_path / 'sample.txt'
+    write_sample(file_path)
+    for pack in (SAFE_PATTERNS, LEGACY_PATTERNS):
+        patterns = scan_patterns(pack, [name for name in pack if name not in SKIPPED])
+        whole = list(iter_matches(str(file_path), patterns, workers=1, chunk_size=2 ** 30))
+        assert whole
+        for chunk_size in (64, 1000, 50000):
+            assert list(iter_matches(str(file_path), patterns, workers=1, chunk_size=chunk_size)) == whole
+
+
+def test_matches_are_those_of_a_whole_file_scan(tmp_path):
+    file_path = tmp_path / 'sample.txt'
+    write_sample(file_path)
+    patterns = scan_patterns(SAFE_PATTERNS, [name for name in SAFE_PATTERNS if name not in SKIPPED])
+    data = file_path.read_bytes()
+    expected = sorted((match.start(), name, match.group())
+                      for name, pattern in patterns.items() for match in pattern.finditer(data))
+    found = sorted((offset, name, text) for offset, _, name, text in
+                   iter_matches(str(file_path), patterns, workers=1, chunk_size=64))
+    assert found == expected
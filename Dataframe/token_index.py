@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+POSTINGS_SUFFIX = '.npz'
+VOCABULARY_SUFFIX = '.vocab.json'
+QUERY_COLUMNS = ['file', 'row']
+
+
+def normalize_token(token):
+    """Return the form a token is indexed and queried under (decoded, lowercase)."""
+    if isinstance(token, bytes):
+        token = token.decode('utf-8', errors='replace')
+    return str(token).strip().lower()
+
+
+def _write_atomic(path, write):
+    """Write a file under a unique temporary name and rename it into place."""
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            write(stream)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _write_segment(directory, segment, entities):
+    """
+    Write the postings of a long-form entities table as one segment.
+
+    Returns:
+    - tuple: The number of distinct tokens and of postings written.
+    """
+    tokens = entities['entity'].map(normalize_token)
+    postings = pd.DataFrame({'token': tokens.to_numpy(dtype=object),
+                             'row': entities['row_id'].to_numpy(dtype=np.int64)})
+    postings = postings[postings['token'] != ''].drop_duplicates().sort_values(['token', 'row'])
+    vocabulary, starts = np.unique(postings['token'].to_numpy(dtype=object), return_index=True)
+    rows = postings['row'].to_numpy()
+    deltas = rows.copy()
+    deltas[1:] -= rows[:-1]
+    deltas[starts] = rows[starts]
+    offsets = np.append(starts, len(rows))
+    _write_atomic(os.path.join(directory, segment + VOCABULARY_SUFFIX),
+                  lambda handle: handle.write(json.dumps(vocabulary.tolist()).encode('utf-8')))
+    _write_atomic(os.path.join(directory, segment + POSTINGS_SUFFIX),
+                  lambda handle: np.savez_compressed(handle, offsets=offsets, deltas=deltas))
+    return len(vocabulary), len(rows)
+
+
+def _remove_segment(directory, segment):
+    for suffix in (VOCABULARY_SUFFIX, POSTINGS_SUFFIX):
+        segment_path = os.path.join(directory, segment + suffix)
+        if os.path.exists(segment_path):
+            os.remove(segment_path)
+
+
+class TokenIndex:
+    """
+    Persistent inverted index from extracted tokens to the (file, row) pairs
+    they were found in.
+
+    Each indexed file has its own segments (one, or one per chunk of a
+    streamed file): a sorted vocabulary as JSON and, per token, the
+    delta-encoded rows it occurs in as a compressed NumPy archive (plain
+    arrays, so reading an index never unpickles). Adding a file writes new
+    segments and then swaps them in for the file's old ones, so the index is
+    updated incrementally as files are processed. A query looks the token up
+    in the vocabulary of every segment, without touching the extracted
+    columns.
+
+    Parameters:
+    - path (str): Directory the index is kept in; created on the first add.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self._segments = {}
+        self._manifest_mtime = None
+        self._load_manifest()
+
+    def _manifest_path(self):
+        return os.path.join(self.path, MANIFEST)
+
+    def _load_manifest(self):
+        manifest_path = self._manifest_path()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as handle:
+                files = json.load(handle)['files']
+            # Segments of older indexes were pickled; they are not read, and
+            # their files are indexed again when they are next processed
+            self.files = {}
+            for file, entry in files.items():
+                if 'segment' in entry:
+                    if entry['segment'].endswith('.gz'):
+                        continue
+                    entry = {'segments': [entry['segment']], 'tokens': entry['tokens'], 'postings': entry['postings']}
+                self.files[file] = entry
+            self._manifest_mtime = os.path.getmtime(manifest_path)
+        self._segments = {}
+
+    def _save_manifest(self):
+        manifest_path = self._manifest_path()
+        manifest = json.dumps({'files': self.files}, indent=1).encode('utf-8')
+        _write_atomic(manifest_path, lambda handle: handle.write(manifest))
+        self._manifest_mtime = os.path.getmtime(manifest_path)
+
+    def refresh(self):
+        """Reload the manifest if another process has updated the index."""
+        manifest_path = self._manifest_path()
+        if os.path.exists(manifest_path) and os.path.getmtime(manifest_path) != self._manifest_mtime:
+            self._load_manifest()
+
+    def add(self, file, entities):
+        """
+        Index the entities extracted from one file, replacing any earlier
+        postings of that file.
+
+        Parameters:
+        - file (str): The source file the entities were extracted from.
+        - entities (DataFrame): Long-form (row_id, column, entity) table, as
+          built by extraction.entities_table; row_id must be integer.
+
+        Returns:
+        - int: The number of distinct tokens indexed for the file.
+        """
+        writer = self.stage(file)
+        writer.add(entities)
+        return writer.commit()
+
+    def stage(self, file):
+        """
+        Start indexing a file in parts, e.g. chunk by chunk while it is streamed.
+
+        Parameters:
+        - file (str): The source file the entities are extracted from.
+
+        Returns:
+        - SegmentWriter: Takes the entities of each part and swaps them in
+          for the file's earlier postings on commit.
+        """
+        return SegmentWriter(self, file)
+
+    def _replace(self, file, entry):
+        """Point a file at new segments and delete the segments it had."""
+        self.refresh()
+        old = self.files.get(file)
+        self.files[file] = entry
+        self._save_manifest()
+        for segment in old['segments'] if old is not None else []:
+            _remove_segment(self.path, segment)
+            self._segments.pop(segment, None)
+
+    def remove(self, file):
+        """Drop a file and its postings from the index."""
+        self.refresh()
+        entry = self.files.pop(file, None)
+        if entry is None:
+            return
+        self._save_manifest()
+        for segment in entry['segments']:
+            _remove_segment(self.path, segment)
+            self._segments.pop(segment, None)
+
+    def _segment(self, segment):
+        if segment not in self._segments:
+            segment_path = os.path.join(self.path, segment)
+            with open(segment_path + VOCABULARY_SUFFIX, encoding='utf-8') as handle:
+                vocabulary = json.load(handle)
+            with np.load(segment_path + POSTINGS_SUFFIX, allow_pickle=False) as arrays:
+                offsets, deltas = arrays['offsets'], arrays['deltas']
+            lookup = {token: i for i, token in enumerate(vocabulary)}
+            self._segments[segment] = (lookup, offsets, deltas)
+        return self._segments[segment]
+
+    def query(self, token):
+        """
+        Find the rows a token was extracted from.
+
+        Parameters:
+        - token (str): The email, word or URL to look up; case-insensitive.
+
+        Returns:
+        - DataFrame: One (file, row) pair per matching row.
+        """
+        self.refresh()
+        token = normalize_token(token)
+        frames = []
+        for file, entry in self.files.items():
+            for segment in entry['segments']:
+                lookup, offsets, deltas = self._segment(segment)
+                i = lookup.get(token)
+                if i is None:
+                    continue
+                rows = np.cumsum(deltas[offsets[i]:offsets[i + 1]])
+                frames.append(pd.DataFrame({'file': file, 'row': rows}))
+        if not frames:
+            return pd.DataFrame(columns=QUERY_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def file_summary(self):
+        """
+        Return one row per indexed file with its token and posting counts.
+
+        A token found in several chunks of a streamed file is counted once
+        per chunk.
+        """
+        return pd.DataFrame([{'file': file, 'tokens': entry['tokens'], 'postings': entry['postings']}
+                             for file, entry in self.files.items()],
+                            columns=['file', 'tokens', 'postings'])
+
+
+class SegmentWriter:
+    """
+    Writes a file's postings to the index one part at a time.
+
+    Each part is written as its own segment as soon as it is added, so only
+    one part's entities are held in memory. The file keeps its earlier
+    postings until commit, which points the manifest at the new segments in
+    one write; discard deletes them instead.
+
+    Parameters:
+    - index (TokenIndex): The index to write to.
+    - file (str): The source file the entities are extracted from.
+    """
+
+    def __init__(self, index, file):
+        self.index = index
+        self.file = file
+        # A fresh name for every staging, so the segments being replaced stay readable
+        digest = hashlib.sha1(os.path.abspath(file).encode('utf-8')).hexdigest()[:16]
+        self.prefix = f"{digest}-{os.urandom(4).hex()}"
+        self.segments = []
+        self.tokens = 0
+        self.postings = 0
+
+    def add(self, entities):
+        """
+        Write the entities of one part as a segment.
+
+        Parameters:
+        - entities (DataFrame): Long-form table with integer row_id and
+          entity columns; rows must not repeat those of earlier parts.
+        """
+        if len(entities) == 0:
+            return
+        os.makedirs(self.index.path, exist_ok=True)
+        segment = f"{self.prefix}-{len(self.segments)}"
+        tokens, postings = _write_segment(self.index.path, segment, entities)
+        self.segments.append(segment)
+        self.tokens += tokens
+        self.postings += postings
+
+    def commit(self):
+        """
+        Swap the written segments in for the file's earlier postings.
+
+        Returns:
+        - int: The number of distinct tokens indexed (summed over the parts).
+        """
+        os.makedirs(self.index.path, exist_ok=True)
+        self.index._replace(self.file, {'segments': self.segments, 'tokens': self.tokens, 'postings': self.postings})
+        return self.tokens
+
+    def discard(self):
+        """Delete the segments written so far, leaving the file's earlier postings in place."""
+        for segment in self.segments:
+            _remove_segment(self.index.path, segment)
+        self.segments = []
@@ -2,6 +2,10 @@ import os
 import pandas as pd
 import re
 import streamlit as st
+from columnar import (COLUMNAR_FORMATS, DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, PARQUET_COMPRESSION,
+                      format_write_report, write_columnar)
+from excel_reader import read_excel_sheets
+from extraction import DEFAULT_CHUNK_SIZE, default_extractor, to_python_lists
 
 class FileHandler:
     @staticmethod
@@ -16,44 +20,40 @@ class FileHandler:
         return output_dir
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, backend='python', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 dedup=False, memo_size=0, output='lists'):
         self.email_pattern = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}')
         self.word_pattern = re.compile(r'\b[a-zA-Z]{5,15}\b')
         self.url_pattern = re.compile(r'\b\w+:\/\/[\w@][\w.:@]+\/?[\w.\.?=%&=\-@$,]*\b')
+        self.extractor = default_extractor(self.email_pattern, self.word_pattern, self.url_pattern,
+                                           backend=backend, workers=workers, chunk_size=chunk_size,
+                                           dedup=dedup, memo_size=memo_size, output=output)
 
     def process_data(self, df):
-        new_columns = {}
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                new_columns[column + '_emails'] = df[column].apply(lambda x: self.email_pattern.findall(str(x)))
-                new_columns[column + '_words'] = df[column].apply(lambda x: self.word_pattern.findall(str(x)))
-                new_columns[column + '_urls'] = df[column].apply(lambda x: self.url_pattern.findall(str(x)))
-        return pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+        return self.extractor.process(df)
 
 class DataFrameHandler:
     @staticmethod
-    def read_file_to_dataframe(file_path, sheet_name=None):
+    def read_file_to_dataframe(file_path, sheet_name=None, workers=1):
         if file_path.endswith('.csv'):
             return pd.read_csv(file_path)
         elif file_path.endswith(('.xls', '.xlsx')):
-            if sheet_name is None:
-                xls = pd.ExcelFile(file_path)
-                sheet_name = xls.sheet_names
-            if isinstance(sheet_name, list):
-                return pd.concat([pd.read_excel(file_path, sheet_name=sheet) for sheet in sheet_name])
-            else:
-                return pd.read_excel(file_path, sheet_name=sheet_name)
+            # Open the workbook once; multiple sheets get a 'sheet' column
+            return read_excel_sheets(file_path, sheet_name, workers)
         else:
             raise ValueError("Unsupported file format. Please provide a CSV or XLS/XLSX file.")
 
     @staticmethod
-    def save_dataframe(df, filename, format='csv'):
+    def save_dataframe(df, filename, format='csv', partition_column=None,
+                       compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
         if format == 'csv':
-            df.to_csv(filename, index=False)
+            to_python_lists(df).to_csv(filename, index=False)
         elif format == 'pickle':
             df.to_pickle(filename)
+        elif format in COLUMNAR_FORMATS:
+            return write_columnar(df, filename, format, row_group_size, compression, partition_column)
         else:
-            raise ValueError("Unsupported format. Please choose 'csv' or 'pickle'.")
+            raise ValueError("Unsupported format. Please choose 'csv', 'pickle', 'feather' or 'parquet'.")
 
 def main():
     st.title("CSV and Excel File Processor")
@@ -94,7 +94,14 @@ def main():
 
     output_filename = st.text_input("Enter the filename for the output file (without extension):")
 
-    format_choice = st.selectbox("Choose output format:", options=['csv', 'pickle'])
+    format_choice = st.selectbox("Choose output format:", options=['csv', 'pickle', 'feather', 'parquet'])
+
+    partition_column, compression = None, DEFAULT_COMPRESSION
+    if format_choice == 'parquet':
+        partition_column = st.selectbox("Partition by column:", options=[None] + list(dataframe.columns),
+                                        format_func=lambda column: "(single file)" if column is None else column)
+        compression = st.selectbox("Compression codec:", options=list(PARQUET_COMPRESSION),
+                                   index=list(PARQUET_COMPRESSION).index(DEFAULT_COMPRESSION))
 
     if st.button("Save"):
         try:
@@ -106,6 +113,12 @@ def main():
                 output_file = os.path.join(output_dir, f"{output_filename}.pickle")
                 DataFrameHandler.save_dataframe(dataframe, output_file, 'pickle')
                 st.success(f"DataFrame saved as pickle: {output_file}")
+            elif format_choice in COLUMNAR_FORMATS:
+                output_file = os.path.join(output_dir, f"{output_filename}{COLUMNAR_FORMATS[format_choice]}")
+                report = DataFrameHandler.save_dataframe(dataframe, output_file, format_choice,
+                                                         partition_column, compression)
+                st.success(f"DataFrame saved as {format_choice}: {output_file}")
+                st.caption(format_write_report(report))
         except ValueError as ve:
             st.error(f"Error: {ve}")
 